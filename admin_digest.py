@@ -0,0 +1,187 @@
+import html
+import time
+import atexit
+import logging
+import threading
+from datetime import datetime
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Callable, Iterable, List, Optional
+
+from logging_setup import log_event
+from templates import ADMIN_EMAIL_TEMPLATE
+
+logger = logging.getLogger(__name__)
+
+# characters of each event's details shown in the digest table
+PREVIEW_CHARS = 200
+
+_CELL = 'style="padding:6px 8px;border-bottom:1px solid #e5e7eb;text-align:left;vertical-align:top;"'
+_HEAD = 'style="padding:6px 8px;border-bottom:2px solid #e5e7eb;text-align:left;color:#6b7280;font-size:11px;text-transform:uppercase;"'
+
+
+class AdminDigest:
+    """
+    Collects admin notifications (emails sent, meetings booked, ...) and
+    mails them to the admin as one table every `interval` seconds, instead
+    of one admin email per action. A digest also goes out early once
+    `max_events` are waiting.
+
+    Events whose kind is in `immediate_kinds`, or that are recorded with
+    immediate=True, trigger a flush right away (together with whatever is
+    already pending). interval=0 sends every event on its own.
+    """
+
+    def __init__(self, send: Callable[[list], bool], sender: Optional[str], recipient: Optional[str],
+                 interval: float, max_events: int, immediate_kinds: Iterable[str] = ()):
+        self.send = send
+        self.sender = sender
+        self.recipient = recipient
+        self.interval = interval
+        self.max_events = max_events
+        self.immediate_kinds = set(immediate_kinds)
+
+        self._events: List[dict] = []
+        self._cond = threading.Condition()
+        self._urgent = False
+        self._stopping = False
+        self._thread = None
+
+        self.events_recorded = 0
+        self.digests_sent = 0
+        self.digests_failed = 0
+        self.last_sent: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.recipient)
+
+    # ---------- producer side ----------
+    def notify(self, kind: str, recipients: Iterable[str], subject: str, details: str = "",
+               status: str = "sent", immediate: bool = False):
+        if not self.enabled:
+            return
+        event = {
+            "at": time.time(),
+            "kind": kind,
+            "recipients": list(recipients),
+            "subject": subject,
+            "details": details,
+            "status": status,
+        }
+        with self._cond:
+            self._events.append(event)
+            self.events_recorded += 1
+            if immediate or kind in self.immediate_kinds or self.interval <= 0 \
+                    or len(self._events) >= self.max_events:
+                self._urgent = True
+                self._cond.notify_all()
+        self._start()
+
+    # ---------- flusher ----------
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="admin-digest", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopping or self._urgent, self.interval or None)
+                events, self._events = self._events, []
+                self._urgent = False
+                done = self._stopping
+
+            if events:
+                self._send(events)
+            if done:
+                return
+
+    def _send(self, events: List[dict]):
+        try:
+            self.send([(self.recipient, self.render(events))])
+            self.digests_sent += 1
+            self.last_sent = time.time()
+            log_event(logger, "admin.digest_sent", sample=False, events=len(events))
+        except Exception as e:
+            # send() already queues through the outbox on outages; anything
+            # raised here (bad credentials, rejected address) won't fix itself
+            self.digests_failed += 1
+            log_event(logger, "admin.digest_failed", level=logging.ERROR, sample=False,
+                      events=len(events), error=repr(e))
+
+    # ---------- rendering ----------
+    def render(self, events: List[dict]) -> MIMEMultipart:
+        recipients = sorted({r for event in events for r in event["recipients"]})
+        kinds = sorted({event["kind"] for event in events})
+
+        msg = MIMEMultipart()
+        msg["From"] = self.sender
+        msg["To"] = self.recipient
+        if len(events) == 1:
+            msg["Subject"] = f"[{events[0]['kind'].upper()}] {events[0]['subject']}"
+        else:
+            msg["Subject"] = f"Admin digest: {len(events)} actions ({', '.join(kinds)})"
+
+        admin_html = (
+            ADMIN_EMAIL_TEMPLATE
+                .replace("{to_email}", html.escape(", ".join(recipients)) or "-")
+                .replace("{subject}", html.escape(msg["Subject"]))
+                .replace("{message}", render_table(events))
+        )
+        msg.attach(MIMEText(admin_html, "html"))
+        return msg
+
+    # ---------- lifecycle ----------
+    def flush(self):
+        """Send whatever is pending now."""
+        with self._cond:
+            self._urgent = True
+            self._cond.notify_all()
+
+    def stop(self, timeout: float = 10.0):
+        """Send the pending digest and stop the flusher."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._events),
+            "events_recorded": self.events_recorded,
+            "digests_sent": self.digests_sent,
+            "digests_failed": self.digests_failed,
+            "interval_seconds": self.interval,
+            "last_sent": self.last_sent,
+        }
+
+
+def render_table(events: List[dict]) -> str:
+    """One HTML table row per event. No newlines: the template cell is white-space:pre-wrap."""
+    head = "".join(f"<th {_HEAD}>{name}</th>" for name in ("Time", "Event", "Recipients", "Subject", "Details", "Status"))
+    rows = []
+    for event in events:
+        details = event["details"]
+        if len(details) > PREVIEW_CHARS:
+            details = details[:PREVIEW_CHARS] + "…"
+        cells = (
+            datetime.fromtimestamp(event["at"]).strftime("%Y-%m-%d %H:%M:%S"),
+            event["kind"],
+            ", ".join(event["recipients"]),
+            event["subject"],
+            details,
+            event["status"],
+        )
+        rows.append("<tr>" + "".join(f"<td {_CELL}>{html.escape(str(c))}</td>" for c in cells) + "</tr>")
+    return (
+        '<table width="100%" cellspacing="0" cellpadding="0" style="border-collapse:collapse;font-size:13px;white-space:normal;">'
+        f"<tr>{head}</tr>{''.join(rows)}</table>"
+    )
@@ -0,0 +1,259 @@
+import math
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import config
+from logging_setup import log_event
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """The /chat queue is past its latency SLO (or full); retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ShuttingDown(Exception):
+    """The server is draining for shutdown and takes no new agent runs."""
+
+
+SHUTTING_DOWN = "Server is shutting down; retry on another instance"
+
+
+class AdmissionController:
+    """
+    Admission control for agent runs, in front of the LLM scheduler.
+
+    - identical in-flight messages from one session share one run
+    - at most `max_concurrent` runs overall and `max_per_session` per session;
+      the rest wait in line
+    - a request whose wait plus run would take longer than `latency_slo`
+      (estimated from the average run time, `run_estimate` until runs have
+      been measured, see estimated_wait), or that finds `max_queue`
+      requests already waiting, is rejected with Overloaded instead of
+      queued
+    - close() (shutdown) fails new and waiting requests with ShuttingDown;
+      wait_idle() then waits for the admitted runs to finish
+
+    Runs on the event loop, so the bookkeeping needs no locks.
+    """
+
+    def __init__(self, max_concurrent: int, max_per_session: int, max_queue: int,
+                 latency_slo: float, max_wait: float, run_estimate: float, coalesce: bool = True):
+        self.max_concurrent = max_concurrent
+        self.max_per_session = max_per_session
+        self.max_queue = max_queue
+        self.latency_slo = latency_slo
+        self.max_wait = max_wait
+        self.coalesce = coalesce
+
+        self._cond = asyncio.Condition()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._by_session: Dict[str, int] = defaultdict(int)
+        self._waiting_by_session: Dict[str, int] = defaultdict(int)
+        self._runs: Dict[object, Tuple[str, float]] = {}   # run -> (session, start)
+        self.running = 0
+        self.waiting = 0
+        self.avg_run_seconds = run_estimate   # EWMA of agent run time
+        self.run_deviation = 0.0              # EWMA of |run time - average|
+        self._measured = False
+        self.accepting = True
+
+        self.admitted = 0
+        self.coalesced = 0
+        self.rejected = {"slo": 0, "queue_full": 0, "timeout": 0}
+
+    # ---------- public API ----------
+    async def run(self, session_id: str, message: str, work: Callable[[], Awaitable[str]]) -> str:
+        if not self.accepting:
+            raise ShuttingDown(SHUTTING_DOWN)
+        key = (session_id, message.strip())
+        shared = self._inflight.get(key) if self.coalesce else None
+        if shared is not None:
+            self.coalesced += 1
+            log_event(logger, "chat.coalesced", session_id=session_id)
+            # shield: a follower going away must not cancel the shared run
+            return await asyncio.shield(shared)
+
+        future = asyncio.get_running_loop().create_future()
+        if self.coalesce:
+            self._inflight[key] = future
+        try:
+            result = await self._admit_and_run(session_id, work)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()   # followers may not exist; don't warn about it
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def open(self):
+        self.accepting = True
+
+    async def close(self):
+        """Stop admitting runs (shutdown): queued requests fail with ShuttingDown, admitted runs carry on."""
+        async with self._cond:
+            self.accepting = False
+            self._cond.notify_all()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """Wait until no run is admitted or queued. False if `timeout` passed first."""
+        try:
+            async with self._cond:
+                await asyncio.wait_for(self._cond.wait_for(lambda: not self.running and not self.waiting), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def estimated_wait(self, session_id: Optional[str] = None) -> float:
+        """
+        Seconds a new request would wait for a slot, going by recent run
+        times: runs in progress free their slot after what's left of an
+        average run, and each request queued ahead then holds a slot for a
+        whole one. The session's own runs and queued requests are counted
+        the same way against `max_per_session`.
+        """
+        now = time.monotonic()
+        run_seconds = self.run_seconds(now)
+        left = [(sid, max(0.0, run_seconds - (now - start))) for sid, start in self._runs.values()]
+        wait = self._slot_wait([rest for _, rest in left], self.max_concurrent, self.waiting)
+        if session_id is not None:
+            own = [rest for sid, rest in left if sid == session_id]
+            wait = max(wait, self._slot_wait(own, self.max_per_session, self._waiting_by_session.get(session_id, 0)))
+        return wait
+
+    def _slot_wait(self, remaining: List[float], slots: int, ahead: int) -> float:
+        """When a slot frees up for the request after `ahead` queued ones (slots keep their order)."""
+        free_at = sorted(remaining + [0.0] * max(0, slots - len(remaining)))
+        return free_at[ahead % slots] + (ahead // slots) * self.run_seconds()
+
+    def run_seconds(self, now: Optional[float] = None) -> float:
+        """
+        Expected length of a run: the average of finished runs, or the
+        median age of the runs in progress if that is already longer (the
+        average is stale, e.g. at the start of a burst).
+        """
+        if not self._runs:
+            return self.avg_run_seconds
+        now = now or time.monotonic()
+        ages = sorted(now - start for _, start in self._runs.values())
+        return max(self.avg_run_seconds, ages[len(ages) // 2])
+
+    def run_budget(self) -> float:
+        """Time to allow for a run against the SLO: the expected length plus 4x its spread (like TCP's RTO)."""
+        return self.run_seconds() + 4 * self.run_deviation
+
+    # ---------- slots ----------
+    def _has_room(self, session_id: str) -> bool:
+        return self.running < self.max_concurrent and self._by_session.get(session_id, 0) < self.max_per_session
+
+    def _reject(self, reason: str, wait: float):
+        self.rejected[reason] += 1
+        retry_after = max(1, math.ceil(wait))
+        log_event(logger, "chat.rejected", level=logging.WARNING, reason=reason,
+                  queue_depth=self.waiting, retry_after=retry_after)
+        raise Overloaded(f"Server is busy ({reason}); retry in {retry_after}s", retry_after)
+
+    async def _acquire(self, session_id: str):
+        if not self._has_room(session_id):
+            wait = self.estimated_wait(session_id)
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full", wait)
+            if wait + self.run_budget() > self.latency_slo:
+                self._reject("slo", wait)
+
+        # past this a queued request can no longer be served within the SLO
+        arrived = time.monotonic()
+        max_wait = min(self.max_wait, max(0.0, self.latency_slo - self.run_budget()))
+        async with self._cond:
+            self.waiting += 1
+            self._waiting_by_session[session_id] += 1
+            queued = not self._has_room(session_id)
+            try:
+                if queued:
+                    await asyncio.wait_for(
+                        self._cond.wait_for(lambda: not self.accepting or self._has_room(session_id)), max_wait
+                    )
+            except asyncio.TimeoutError:
+                self._reject("timeout", self.estimated_wait())
+            finally:
+                self.waiting -= 1
+                self._waiting_by_session[session_id] -= 1
+                if not self._waiting_by_session[session_id]:
+                    del self._waiting_by_session[session_id]
+                if not self.accepting:
+                    self._cond.notify_all()   # wait_idle() is watching the queue drain
+            if not self.accepting:
+                raise ShuttingDown(SHUTTING_DOWN)
+            if queued and time.monotonic() - arrived + self.run_budget() > self.latency_slo:
+                # runs got slower while it waited; pass the free slot on
+                self._cond.notify_all()
+                self._reject("timeout", self.estimated_wait())
+            self.running += 1
+            self._by_session[session_id] += 1
+            self.admitted += 1
+            run = object()
+            self._runs[run] = (session_id, time.monotonic())
+            return run
+
+    async def _release(self, session_id: str, run: object):
+        async with self._cond:
+            del self._runs[run]
+            self.running -= 1
+            self._by_session[session_id] -= 1
+            if not self._by_session[session_id]:
+                del self._by_session[session_id]
+            self._cond.notify_all()
+
+    async def _admit_and_run(self, session_id: str, work: Callable[[], Awaitable[str]]) -> str:
+        run = await self._acquire(session_id)
+        started = time.monotonic()
+        try:
+            return await work()
+        finally:
+            elapsed = time.monotonic() - started
+            if self._measured:
+                self.run_deviation = 0.8 * self.run_deviation + 0.2 * abs(elapsed - self.avg_run_seconds)
+                self.avg_run_seconds = 0.8 * self.avg_run_seconds + 0.2 * elapsed
+            else:
+                self.avg_run_seconds, self._measured = elapsed, True
+            await self._release(session_id, run)
+
+    def stats(self) -> dict:
+        return {
+            "accepting": self.accepting,
+            "running": self.running,
+            "queue_depth": self.waiting,
+            "in_flight_messages": len(self._inflight),
+            "admitted": self.admitted,
+            "coalesced": self.coalesced,
+            "rejected": dict(self.rejected),
+            "rejected_total": sum(self.rejected.values()),
+            "avg_run_seconds": round(self.avg_run_seconds, 3),
+            "run_deviation_seconds": round(self.run_deviation, 3),
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+            "latency_slo_seconds": self.latency_slo,
+        }
+
+
+admission = AdmissionController(
+    max_concurrent=config.CHAT_MAX_CONCURRENT,
+    max_per_session=config.CHAT_MAX_PER_SESSION,
+    max_queue=config.CHAT_MAX_QUEUE,
+    latency_slo=config.CHAT_LATENCY_SLO_SECONDS,
+    max_wait=config.CHAT_MAX_WAIT_SECONDS,
+    run_estimate=config.CHAT_RUN_ESTIMATE_SECONDS,
+    coalesce=config.CHAT_COALESCE,
+)
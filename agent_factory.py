@@ -0,0 +1,40 @@
+import logging
+from typing import Iterable, List
+
+from langchain.agents import create_openai_tools_agent
+from langchain_core.memory import BaseMemory
+
+from tool_executor import ParallelAgentExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class AgentFactory:
+    """
+    Builds the parts of the agent every request shares once: the LLM with
+    the tool schemas bound, the prompt, the tool list and callbacks. They
+    are never mutated, so any number of runs can use them at the same time.
+
+    executor(memory) hands out a fresh executor bound to one session's
+    memory. The template below is validated once here; per-request
+    executors copy its fields with construct(), which skips pydantic
+    validation and costs a few microseconds.
+    """
+
+    def __init__(self, llm, tools: List, prompt, callbacks: Iterable = ()):
+        self.tools = list(tools)
+        self._template = ParallelAgentExecutor(
+            agent = create_openai_tools_agent(llm, self.tools, prompt),
+            tools = self.tools,
+            verbose = False,
+            callbacks = list(callbacks),
+            handle_parsing_errors = True
+        )
+        self._fields = dict(self._template.__dict__)
+        self._fields_set = set(self._template.__fields_set__) | {"memory"}
+
+    def executor(self, memory: BaseMemory) -> ParallelAgentExecutor:
+        return ParallelAgentExecutor.construct(
+            _fields_set=self._fields_set,
+            **{**self._fields, "memory": memory},
+        )
@@ -0,0 +1,226 @@
+import os
+import json
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+
+import config
+from logging_setup import log_event
+from resilience import CircuitOpenError, get_breaker
+from token_store import token_store
+
+logger = logging.getLogger(__name__)
+
+# Sheets rejects cells over 50k characters
+MAX_CELL_CHARS = 45000
+# rows per values.append call
+MAX_APPEND_ROWS = 1000
+
+
+class AuditSink:
+    """
+    Buffers audit rows (timestamp, event, session, details) and writes them
+    to a Google Sheet with one values.append per flush. A flush happens
+    every `flush_interval` seconds or as soon as `batch_rows` are waiting.
+
+    When the buffer is full, record() waits up to `put_timeout` for room and
+    then writes the row to the spill file instead, so request threads are
+    never held up for long. Rows that can't be appended (Sheets down,
+    breaker open) are spilled too, and replayed in order once an append
+    succeeds again.
+    """
+
+    def __init__(self, spreadsheet_id: Optional[str], sheet_range: str, account: str,
+                 flush_interval: float, batch_rows: int, max_buffer: int,
+                 put_timeout: float, spill_path: str):
+        self.spreadsheet_id = spreadsheet_id
+        self.sheet_range = sheet_range
+        self.account = account
+        self.flush_interval = flush_interval
+        self.batch_rows = batch_rows
+        self.max_buffer = max_buffer
+        self.put_timeout = put_timeout
+        self.spill_path = spill_path
+
+        self._buffer = deque()
+        self._cond = threading.Condition()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._service = None
+        self._http = None
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_spilled = 0
+        self.rows_replayed = 0
+        self.backpressure_waits = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.spreadsheet_id)
+
+    # ---------- producer side ----------
+    def record(self, event: str, session_id: Optional[str] = None, **details):
+        if not self.enabled:
+            return
+        row = [
+            datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            event,
+            session_id or "",
+            json.dumps(details, default=str, ensure_ascii=False)[:MAX_CELL_CHARS],
+        ]
+
+        with self._cond:
+            has_room = True
+            if len(self._buffer) >= self.max_buffer:
+                self.backpressure_waits += 1
+                has_room = self._cond.wait_for(lambda: len(self._buffer) < self.max_buffer, self.put_timeout)
+            if has_room:
+                self._buffer.append(row)
+                if len(self._buffer) >= self.batch_rows:
+                    self._cond.notify_all()
+
+        if not has_room:
+            self._spill([row])   # still full: overflow to disk rather than hold the caller
+        self._start()
+
+    # ---------- flusher ----------
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None and not self._stopping:
+                self._thread = threading.Thread(target=self._run, name="audit-sink", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_rows,
+                    self.flush_interval,
+                )
+                rows = [self._buffer.popleft() for _ in range(min(len(self._buffer), MAX_APPEND_ROWS))]
+                done = self._stopping and not self._buffer
+                self._cond.notify_all()   # room for producers waiting on a full buffer
+
+            if rows or os.path.exists(self.spill_path):
+                self._flush(rows)
+            if done:
+                return
+
+    def _sheets(self):
+        # only the flusher thread calls Sheets, so one http is enough
+        credentials = token_store.get(self.account)
+        if self._service is None or self._http.credentials is not credentials:
+            client_options = (
+                {"api_endpoint": config.SHEETS_API_ENDPOINT} if config.SHEETS_API_ENDPOINT else None
+            )
+            self._service = build(
+                "sheets", "v4", credentials=credentials, client_options=client_options, cache_discovery=False
+            )
+            self._http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=config.SHEETS_TIMEOUT))
+        return self._service
+
+    def _append(self, rows: List[list]):
+        request = self._sheets().spreadsheets().values().append(
+            spreadsheetId=self.spreadsheet_id,
+            range=self.sheet_range,
+            valueInputOption="RAW",
+            insertDataOption="INSERT_ROWS",
+            body={"values": rows},
+            fields="updates(updatedRows)",
+        )
+        get_breaker("sheets").call(request.execute, http=self._http)
+
+    def _flush(self, rows: List[list]):
+        try:
+            self._replay()
+            if rows:
+                self._append(rows)
+                self.rows_written += len(rows)
+            self.flushes += 1
+            self.last_error = None
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                self.last_error = repr(e)
+                log_event(logger, "audit.flush_failed", level=logging.WARNING, sample=False,
+                          rows=len(rows), error=repr(e))
+            self._spill(rows)
+
+    # ---------- spill file ----------
+    def _spill(self, rows: List[list]):
+        if not rows:
+            return
+        with self._spill_lock:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            self.rows_spilled += len(rows)
+
+    def _replay(self):
+        """Append spilled rows (oldest first) before anything newer."""
+        with self._spill_lock:
+            if not os.path.exists(self.spill_path):
+                return
+            with open(self.spill_path, encoding="utf-8") as f:
+                pending = [json.loads(line) for line in f if line.strip()]
+
+            while pending:
+                chunk = pending[:MAX_APPEND_ROWS]
+                try:
+                    self._append(chunk)
+                except Exception:
+                    with open(self.spill_path, "w", encoding="utf-8") as f:
+                        f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in pending)
+                    raise
+                pending = pending[len(chunk):]
+                self.rows_replayed += len(chunk)
+                self.rows_written += len(chunk)
+            os.remove(self.spill_path)
+        log_event(logger, "audit.replayed", sample=False, rows=self.rows_replayed)
+
+    # ---------- lifecycle ----------
+    def stop(self, timeout: float = 10.0):
+        """Flush what's buffered (spilling it if Sheets is unreachable) and stop the flusher."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "buffered": len(self._buffer),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_spilled": self.rows_spilled,
+            "rows_replayed": self.rows_replayed,
+            "spill_pending": os.path.exists(self.spill_path),
+            "backpressure_waits": self.backpressure_waits,
+            "last_error": self.last_error,
+        }
+
+
+audit = AuditSink(
+    spreadsheet_id=config.AUDIT_SHEET_ID,
+    sheet_range=config.AUDIT_SHEET_RANGE,
+    account=config.AUDIT_SHEETS_ACCOUNT,
+    flush_interval=config.AUDIT_FLUSH_SECONDS,
+    batch_rows=config.AUDIT_BATCH_ROWS,
+    max_buffer=config.AUDIT_MAX_BUFFER,
+    put_timeout=config.AUDIT_PUT_TIMEOUT,
+    spill_path=config.AUDIT_SPILL_FILE,
+)
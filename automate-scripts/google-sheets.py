@@ -2,17 +2,31 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse, RedirectResponse
 import json
 import os
+import sys
+import secrets
 from google_auth_oauthlib.flow import Flow
 from google.oauth2.credentials import Credentials
 
+# tokens go into the shared, encrypted token store (repo root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from token_store import token_store
+
 app = FastAPI()
 
 GOOGLE_CLIENT_CONFIG = json.load(open("client_secret_sheets.json"))
 
 REDIRECT_URI = "http://localhost:8000/oauth/callback"
 
+# the account the chatbot's audit sink writes with
+DEFAULT_ACCOUNT = config.AUDIT_SHEETS_ACCOUNT
+
+# OAuth state -> account being authorized
+pending_logins = {}
+
 SCOPES =[
-    "https://www.googleapis.com/auth/speadsheets"
+    "https://www.googleapis.com/auth/spreadsheets"
 ]
 
 @app.get("/")
@@ -20,7 +34,7 @@ def home():
     return {"message": "Welcome to the Google Sheets OAuth2 Demo!"}
 
 @app.get("/login")
-def login():
+def login(account: str = DEFAULT_ACCOUNT):
     """
     Step 1: Redirect the user to Google for login & cosent.
     """
@@ -32,12 +46,15 @@ def login():
 
     flow.redirect_uri = REDIRECT_URI
     
+    state = secrets.token_urlsafe(24)
+    pending_logins[state] = account
+
     authorization_url, state = flow.authorization_url(
         access_type = "offline", # ensures refresh token is returned
-        include_granted_scopes = "true"
+        include_granted_scopes = "true",
+        state = state,
     )
 
-    # store state securely later - here just return redirect
     return RedirectResponse(url=authorization_url)
 
 @app.get("/oauth/callback")
@@ -47,6 +64,10 @@ def oauth_callback(request: Request):
     We exchange code -> access-token + refresh_token
     """
 
+    account = pending_logins.pop(request.query_params.get("state"), None)
+    if account is None:
+        return JSONResponse({"message": "Unknown or expired OAuth state. Start again at /login."}, status_code=400)
+
     flow = Flow.from_client_config(
         GOOGLE_CLIENT_CONFIG,
         scopes=SCOPES
@@ -60,16 +81,16 @@ def oauth_callback(request: Request):
 
     credentials: Credentials = flow.credentials
 
-    # Token received
+    # Token received: keep it encrypted server-side, never in the response
+    token_store.save(account, credentials)
+
     token_data = {
-        "access_token": credentials.token,
-        "refresh_token": credentials.refresh_token,
+        "account": account,
         "token_expiry": str(credentials.expiry),
+        "has_refresh_token": bool(credentials.refresh_token),
         "scope":credentials.scopes
     }
 
-    # TODO : Save refresh_token securely in DB
-
     return JSONResponse(
         {
             "message":"Google OAuth login successful!",
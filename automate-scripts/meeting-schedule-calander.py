@@ -1,17 +1,36 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import RedirectResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from typing import List, Optional
 import os
+import sys
 import json
+import secrets
 
-# app = FastAPI()
+# share the chatbot's cached Calendar client (repo root)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from token_store import NotAuthorizedError, token_store
+from calendar_client import (
+    EVENT_FIELDS,
+    SCOPES,
+    calendar_service,
+    execute,
+    insert_events,
+    list_events,
+    sync_events,
+)
+
+app = FastAPI()
 
-SCOPES = ['https://www.googleapis.com/auth/calendar']
 REDIRECT_URI = "http://localhost:8000/oauth2callback"   # change later on VM
 
+# OAuth state -> account being authorized
+pending_authorizations = {}
+
 # ----------- INPUT MODEL ----------
 class Meeting(BaseModel):
     topic: str
@@ -19,24 +38,37 @@ class Meeting(BaseModel):
     start_time: str    # HH:MM 24hr
     end_time: str      # HH:MM 24hr
     timezone: str = "Asia/Kolkata"
+    attendees: List[str] = []
+
+
+class MeetingBatch(BaseModel):
+    meetings: List[Meeting] = Field(..., min_length=1, max_length=1000)
 
 
 # ----------- STEP 1: START AUTH ----------
 @app.get("/authorize")
-def authorize():
+def authorize(account: str = config.GOOGLE_ACCOUNT):
     flow = Flow.from_client_secrets_file(
         "credentials.json",
         scopes=SCOPES,
         redirect_uri=REDIRECT_URI
     )
 
-    auth_url, _ = flow.authorization_url(prompt='consent')
+    state = secrets.token_urlsafe(24)
+    pending_authorizations[state] = account
+
+    # offline access so the token store gets a refresh token
+    auth_url, _ = flow.authorization_url(prompt='consent', access_type='offline', state=state)
     return RedirectResponse(auth_url)
 
 
 # ----------- STEP 2: HANDLE CALLBACK ----------
 @app.get("/oauth2callback")
-def oauth2callback(code: str):
+def oauth2callback(code: str, state: str):
+
+    account = pending_authorizations.pop(state, None)
+    if account is None:
+        raise HTTPException(400, "Unknown or expired OAuth state. Start again at /authorize.")
 
     flow = Flow.from_client_secrets_file(
         "credentials.json",
@@ -48,29 +80,24 @@ def oauth2callback(code: str):
 
     creds = flow.credentials
 
-    # save token
-    with open("token.json", "w") as f:
-        f.write(creds.to_json())
+    # encrypted, shared with the chatbot; cached clients pick it up
+    token_store.save(account, creds)
 
-    return "Google Calendar authorization successful! You can now call /schedule"
+    return f"Google Calendar authorization successful for {account!r}! You can now call /schedule"
 
 
 # ----------- UTILITY ----------
-def get_calendar_service():
-    if not os.path.exists("token.json"):
+def google_call(fn):
+    """Run a Calendar call, passing Google's status code through on failure."""
+    try:
+        return fn()
+    except NotAuthorizedError:
         raise HTTPException(401, "Not authorized. Visit /authorize first.")
-
-    creds = Credentials.from_authorized_user_file("token.json", SCOPES)
-    service = build("calendar", "v3", credentials=creds)
-    return service
+    except HttpError as e:
+        raise HTTPException(e.resp.status, e.reason or str(e))
 
 
-# ----------- STEP 3: CREATE EVENT ----------
-@app.post("/schedule")
-def schedule(meeting: Meeting):
-
-    service = get_calendar_service()
-
+def to_event(meeting: Meeting) -> dict:
     start = f"{meeting.date}T{meeting.start_time}:00"
     end = f"{meeting.date}T{meeting.end_time}:00"
 
@@ -85,11 +112,82 @@ def schedule(meeting: Meeting):
             "timeZone": meeting.timezone,
         }
     }
+    if meeting.attendees:
+        event["attendees"] = [{"email": e} for e in meeting.attendees]
+    return event
 
-    created = service.events().insert(calendarId="primary", body=event).execute()
+
+def list_mask(fields: Optional[str]) -> str:
+    """Per-event field mask -> full mask that still carries the paging/sync tokens."""
+    return f"items({fields or EVENT_FIELDS}),nextPageToken,nextSyncToken"
+
+
+# ----------- STEP 3: CREATE EVENT ----------
+@app.post("/schedule")
+def schedule(meeting: Meeting, account: Optional[str] = None):
+
+    created = google_call(lambda: execute(
+        calendar_service(account).events().insert(calendarId="primary", body=to_event(meeting), fields=EVENT_FIELDS),
+        account,
+    ))
 
     return {
         "status": "success",
         "eventLink": created.get("htmlLink"),
         "eventId": created.get("id")
     }
+
+
+@app.post("/schedule/batch")
+def schedule_batch(batch: MeetingBatch, account: Optional[str] = None):
+    """Create many events in batched requests; results come back in input order."""
+    results = google_call(lambda: insert_events([to_event(m) for m in batch.meetings], account=account))
+
+    return {
+        "status": "success" if all("event" in r for r in results) else "partial",
+        "results": [
+            {"eventId": r["event"].get("id"), "eventLink": r["event"].get("htmlLink")}
+            if "event" in r else {"error": r["error"]}
+            for r in results
+        ],
+    }
+
+
+# ----------- LIST / SYNC ----------
+@app.get("/events")
+def events(
+    calendar_id: str = "primary",
+    page_token: Optional[str] = None,
+    max_results: int = Query(250, ge=1, le=2500),
+    time_min: Optional[str] = Query(None, description="RFC3339, e.g. 2025-01-01T00:00:00Z"),
+    fields: Optional[str] = Query(None, description="per-event field mask, e.g. id,summary,start"),
+    account: Optional[str] = None,
+):
+    filters = {"timeMin": time_min, "singleEvents": True, "orderBy": "startTime"} if time_min else {}
+    page = google_call(lambda: list_events(
+        calendar_id,
+        page_token=page_token,
+        max_results=max_results,
+        fields=list_mask(fields),
+        account=account,
+        **filters,
+    ))
+    return {
+        "items": page.get("items", []),
+        "next_page_token": page.get("nextPageToken"),
+        "next_sync_token": page.get("nextSyncToken"),
+    }
+
+
+@app.get("/events/sync")
+def events_sync(
+    calendar_id: str = "primary",
+    sync_token: Optional[str] = Query(None, description="next_sync_token from the previous call"),
+    fields: Optional[str] = Query(None, description="per-event field mask, e.g. id,summary,start"),
+    account: Optional[str] = None,
+):
+    """
+    Without a sync_token: every event plus a token. With one: only the events
+    added, changed or cancelled since then. Pass next_sync_token back next time.
+    """
+    return google_call(lambda: sync_events(calendar_id, sync_token, list_mask(fields), account))
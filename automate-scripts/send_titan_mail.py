@@ -1,62 +1,516 @@
-from fastapi import FastAPI, HTTPException
-import smtplib
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from pydantic import BaseModel, EmailStr
+from email_validator import validate_email, EmailNotValidError
+from pydantic import BaseModel, EmailStr, Field
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
 import os
+import re
+import csv
+import html
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
 
-SMTP_SERVER = "smtp.titan.email"
-SMTP_PORT = 587
+SMTP_SERVER = os.getenv("TITAN_SMTP_SERVER", "smtp.titan.email")
+SMTP_PORT = int(os.getenv("TITAN_SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("TITAN_SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("TITAN_SMTP_TIMEOUT", "30"))
 
 SENDER_EMAIL = os.getenv("TITAN_SENDER_EMAIL")
 SENDER_PASSWORD = os.getenv("TITAN_APP_PASSWORD")
 
+# Authenticated sessions opened on startup and shared by every request and
+# bulk job; sessions idle longer than SMTP_IDLE_CHECK get a NOOP before reuse
+SMTP_POOL_SIZE = int(os.getenv("TITAN_POOL_SIZE", "3"))
+SMTP_POOL_TIMEOUT = float(os.getenv("TITAN_POOL_TIMEOUT", "30"))
+SMTP_IDLE_CHECK = float(os.getenv("TITAN_IDLE_CHECK", "30"))
+
+# Bulk campaigns: paced to stay under the provider's sending limit
+BULK_RATE_PER_MINUTE = int(os.getenv("TITAN_RATE_PER_MINUTE", "60"))
+BULK_MAX_RECIPIENTS = int(os.getenv("TITAN_BULK_MAX_RECIPIENTS", "50000"))
+BULK_MAX_JOBS = 100       # finished jobs kept for status lookups
+BULK_MAX_ERRORS = 100     # per-recipient errors kept per job
+
 print('Mail:',repr(SENDER_EMAIL))
-print("PWD:", repr(SENDER_PASSWORD[:10]),".....")
+print("PWD:", "set" if SENDER_PASSWORD else "missing")
 
 class EmailRequest(BaseModel):
     to: EmailStr
     subject: str
     body: str
     is_html: bool = True
-    
-    
+
+
+class Recipient(BaseModel):
+    email: str
+    fields: Dict[str, str] = {}
+
+
+class BulkEmailRequest(BaseModel):
+    """subject/body may contain {field} placeholders filled per recipient."""
+    subject: str
+    body: str
+    is_html: bool = True
+    recipients: List[Recipient] = Field(..., min_length=1, max_length=BULK_MAX_RECIPIENTS)
+
+
+def build_message(to, subject, body, is_html):
+    msg = MIMEMultipart()
+    msg["From"] = SENDER_EMAIL
+    msg["To"] = to
+    msg["Subject"] = subject
+
+    if is_html:
+        msg.attach(MIMEText(body, "html" ))
+    else:
+        msg.attach(MIMEText(body, "plain" ))
+    return msg
+
+
+def is_transient_smtp_error(e: Exception) -> bool:
+    if isinstance(e, aiosmtplib.SMTPResponseException):
+        return 400 <= e.code < 500
+    return isinstance(e, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, OSError))
+
+
+# ---------------------------------------------------------
+# SMTP session pool
+# ---------------------------------------------------------
+class PoolExhausted(Exception):
+    """No session came free within SMTP_POOL_TIMEOUT."""
+
+
+class SMTPPool:
+    """
+    Up to `size` authenticated aiosmtplib sessions. open() warms them on
+    startup, session() checks one out (reconnecting if the server dropped
+    it), close() quits them all on shutdown.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: "asyncio.LifoQueue[tuple]" = None   # (smtp, last_used)
+        self._slots: asyncio.Semaphore = None
+        self.opened = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.closed = True
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=SMTP_SERVER, port=SMTP_PORT, timeout=SMTP_TIMEOUT, start_tls=SMTP_STARTTLS
+        )
+        try:
+            await smtp.connect()
+            await smtp.login(SENDER_EMAIL, SENDER_PASSWORD)
+        except Exception as e:
+            self.failures += 1
+            self.last_error = repr(e)
+            smtp.close()
+            raise
+        self.opened += 1
+        self.last_error = None
+        return smtp
+
+    async def open(self):
+        self._idle = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(self.size)
+        self.closed = False
+        results = await asyncio.gather(*(self._connect() for _ in range(self.size)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"SMTP pool warm-up: {result!r}")
+            else:
+                self._idle.put_nowait((result, time.monotonic()))
+
+    async def close(self):
+        self.closed = True
+        while self._idle is not None and not self._idle.empty():
+            smtp, _ = self._idle.get_nowait()
+            await self._quit(smtp)
+
+    @staticmethod
+    async def _quit(smtp):
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        while not self._idle.empty():
+            smtp, last_used = self._idle.get_nowait()
+            if not smtp.is_connected:
+                continue
+            if time.monotonic() - last_used < SMTP_IDLE_CHECK:
+                return smtp
+            try:
+                await smtp.noop()
+                return smtp
+            except Exception:
+                smtp.close()
+        return await self._connect()
+
+    @asynccontextmanager
+    async def session(self):
+        if self.closed:
+            raise aiosmtplib.SMTPServerDisconnected("SMTP pool is closed")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), SMTP_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PoolExhausted(f"no SMTP session free after {SMTP_POOL_TIMEOUT:g}s") from None
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        smtp = None
+        try:
+            smtp = await self._checkout()
+            yield smtp
+        except BaseException as e:
+            if smtp is not None and is_transient_smtp_error(e):
+                smtp.close()
+                smtp = None
+            raise
+        finally:
+            if smtp is not None and not self.closed:
+                self._idle.put_nowait((smtp, time.monotonic()))
+            elif smtp is not None:
+                await self._quit(smtp)
+            self.in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "opened": self.opened,
+            "connect_failures": self.failures,
+            "last_error": self.last_error,
+            "closed": self.closed,
+        }
+
+
+async def send_with_pool(msg, to: str):
+    """Send one message over a pooled session; a dropped session is replaced and retried once."""
+    for attempt in range(2):
+        try:
+            async with smtp_pool.session() as smtp:
+                await smtp.send_message(msg, sender=SENDER_EMAIL, recipients=[to])
+            return
+        except Exception as e:
+            if attempt == 0 and isinstance(e, (aiosmtplib.SMTPServerDisconnected, OSError)):
+                continue
+            raise
+
+
+class RateLimiter:
+    """Spaces sends evenly so all jobs together stay under `per_minute`."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+smtp_pool = SMTPPool(SMTP_POOL_SIZE)
+rate_limiter = RateLimiter(BULK_RATE_PER_MINUTE)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if SENDER_EMAIL and SENDER_PASSWORD:
+        await smtp_pool.open()
+    yield
+    await smtp_pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
 @app.get("/")
 def status():
     return {"status":"Application running successfully"}
 
 
+@app.get("/health/live")
+def health_live():
+    return {"status": "ok"}
 
-@app.post("/send-email")
-def send_email(email: EmailRequest):
-    
+
+@app.get("/health/ready")
+def health_ready():
+    """Ready when the pool is open and holds, or last managed to open, a session."""
+    pool = smtp_pool.stats()
+    ready = not pool["closed"] and (pool["idle"] + pool["in_use"] > 0 or pool["last_error"] is None)
+    return JSONResponse(
+        {"status": "ok" if ready else "degraded", "smtp_pool": pool},
+        status_code=200 if ready else 503,
+    )
+
+
+def require_credentials():
     if not SENDER_PASSWORD or not SENDER_EMAIL:
         raise HTTPException(status_code=500, detail="Email credentials not configured")
-    
+
+
+@app.post("/send-email")
+async def send_email(email: EmailRequest):
+
+    require_credentials()
+
     # Build message
-    msg = MIMEMultipart()
-    msg["From"] = SENDER_EMAIL
-    msg["To"] = email.to
-    msg["Subject"] = email.subject
-    
-    if email.is_html:
-        msg.attach(MIMEText(email.body, "html" ))
-    else:
-        msg.attach(MIMEText(email.body, "plain" ))
-        
+    msg = build_message(email.to, email.subject, email.body, email.is_html)
+
     try:
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.sendmail(SENDER_EMAIL,email.to, msg.as_string())
-        server.quit()
-        
+        await send_with_pool(msg, email.to)
+
         return {"message":"Email sent successfully"}
-    
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ---------------------------------------------------------
+# Bulk jobs
+# ---------------------------------------------------------
+FIELD_PATTERN = re.compile(r"\{(\w+)\}")
+FINISHED = ("done", "failed")
+
+
+def render(template: str, fields: Dict[str, str], escape: bool) -> str:
+    """Fill {field} placeholders; unknown ones (and CSS braces) are left alone."""
+    def fill(match):
+        if match.group(1) not in fields:
+            return match.group(0)
+        value = str(fields[match.group(1)])
+        return html.escape(value) if escape else value
+    return FIELD_PATTERN.sub(fill, template)
+
+
+@dataclass
+class BulkJob:
+    id: str
+    subject: str
+    body: str
+    is_html: bool
+    status: str = "queued"
+    total: Optional[int] = None   # unknown until a CSV has been read to the end
+    sent: int = 0
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def record(self, email: str, error: Optional[str] = None):
+        if error is None:
+            self.sent += 1
+            return
+        self.failed += 1
+        self.note(error, email)
+
+    def note(self, error: str, email: Optional[str] = None):
+        if len(self.errors) < BULK_MAX_ERRORS:
+            self.errors.append({"email": email, "error": error})
+
+    def snapshot(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "sent": self.sent,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+jobs: Dict[str, BulkJob] = {}
+_job_tasks = set()
+
+
+async def _send_worker(job: BulkJob, work: asyncio.Queue):
+    while True:
+        item = await work.get()
+        if item is None:
+            return
+        email, fields = item
+        msg = build_message(
+            email,
+            render(job.subject, fields, escape=False),
+            render(job.body, fields, escape=job.is_html),
+            job.is_html,
+        )
+        await rate_limiter.wait()
+        try:
+            await send_with_pool(msg, email)
+            job.record(email)
+        except aiosmtplib.SMTPRecipientsRefused:
+            job.record(email, "recipient refused")
+        except Exception as e:
+            job.record(email, str(e))
+
+
+async def run_job(job: BulkJob, recipients):
+    """
+    Feed (email, fields) pairs to SMTP_POOL_SIZE sender tasks through a
+    small bounded queue, so a large CSV is read only as fast as it's sent.
+    """
+    job.status = "running"
+    work = asyncio.Queue(maxsize=SMTP_POOL_SIZE * 10)
+    workers = [asyncio.create_task(_send_worker(job, work)) for _ in range(SMTP_POOL_SIZE)]
+
+    total = 0
+    try:
+        for email, fields in recipients:
+            if total >= BULK_MAX_RECIPIENTS:
+                job.note(f"recipient limit of {BULK_MAX_RECIPIENTS} reached; rest skipped")
+                break
+            total += 1
+            try:
+                email = validate_email(email, check_deliverability=False).normalized
+            except EmailNotValidError:
+                job.record(email, "invalid address")
+                continue
+            await work.put((email, {**fields, "email": email}))
+        job.total = total
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error(f"Bulk job {job.id} stopped reading recipients: {e}")
+        job.status = "failed"
+        job.note(f"could not read recipients: {e}")
+    finally:
+        for _ in workers:
+            await work.put(None)
+        await asyncio.gather(*workers)
+
+    if job.status != "failed":
+        job.status = "done"
+    job.finished_at = time.time()
+    logger.info(f"Bulk job {job.id} {job.status}: {job.sent} sent, {job.failed} failed")
+
+
+def start_job(subject, body, is_html, recipients) -> BulkJob:
+    job = BulkJob(id=uuid.uuid4().hex, subject=subject, body=body, is_html=is_html)
+    finished = [j for j in jobs.values() if j.status in FINISHED]
+    for old in finished[:max(0, len(jobs) - BULK_MAX_JOBS + 1)]:
+        del jobs[old.id]
+    jobs[job.id] = job
+    # keep a reference so the task isn't garbage collected mid-run
+    task = asyncio.create_task(run_job(job, recipients))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    return job
+
+
+def csv_recipients(path: str):
+    """Yield (email, fields) rows from a spooled CSV upload, then delete it."""
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            for row in csv.DictReader(f):
+                fields = {k.strip(): (v or "").strip() for k, v in row.items() if k}
+                yield fields.pop("email", ""), fields
+    finally:
+        os.unlink(path)
+
+
+def spool_csv(upload) -> str:
+    """Copy the upload to a temp file and check its header; returns the path."""
+    spool = tempfile.NamedTemporaryFile("wb", suffix=".csv", delete=False)
+    with spool:
+        shutil.copyfileobj(upload, spool)
+
+    with open(spool.name, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    if "email" not in [column.strip() for column in header]:
+        os.unlink(spool.name)
+        raise HTTPException(status_code=400, detail="CSV needs an 'email' column")
+    return spool.name
+
+
+def job_response(job: BulkJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status_url": f"/send-email/jobs/{job.id}",
+        "stream_url": f"/send-email/jobs/{job.id}/stream",
+    }
+
+
+@app.post("/send-email/bulk", status_code=202)
+async def send_bulk_email(request: BulkEmailRequest):
+    require_credentials()
+    recipients = ((r.email, r.fields) for r in request.recipients)
+    job = start_job(request.subject, request.body, request.is_html, recipients)
+    return job_response(job)
+
+
+@app.post("/send-email/bulk/csv", status_code=202)
+async def send_bulk_email_csv(
+    file: UploadFile = File(..., description="CSV with an 'email' column; other columns are template fields"),
+    subject: str = Form(...),
+    body: str = Form(...),
+    is_html: bool = Form(True),
+):
+    require_credentials()
+
+    # copy the upload off the request so the job can stream it row by row
+    # after this response has been sent
+    path = await run_in_threadpool(spool_csv, file.file)
+
+    job = start_job(subject, body, is_html, csv_recipients(path))
+    return job_response(job)
+
+
+def get_job(job_id: str) -> BulkJob:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
+
+
+@app.get("/send-email/jobs/{job_id}")
+def bulk_job_status(job_id: str):
+    return get_job(job_id).snapshot()
+
+
+@app.get("/send-email/jobs/{job_id}/stream")
+async def bulk_job_stream(job_id: str):
+    """Server-sent events: one `data:` line per progress change until the job ends."""
+    job = get_job(job_id)
+
+    async def events():
+        last = None
+        while True:
+            snapshot = job.snapshot()
+            if snapshot != last:
+                yield f"data: {json.dumps(snapshot)}\n\n"
+                last = snapshot
+            if snapshot["status"] in FINISHED:
+                return
+            await asyncio.sleep(1)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
@@ -0,0 +1,95 @@
+"""
+Offline benchmark for /chat admission control.
+
+Every session double-submits its message (a client retry), and the whole
+burst arrives at once. Reports how many runs were coalesced, how many
+requests were shed with 429 + Retry-After, and the latency of the ones
+that were served, and fails if the served p95 is over the SLO.
+
+The SLO is checked against the server-side time of each request (the
+"ms" of its audit row, from arrival to reply). The client-side figures
+also include the HTTP overhead of the load generator, which shares this
+process with the server.
+
+    python benchmarks/bench_admission.py --sessions 200 --llm-latency 0.2
+    python benchmarks/bench_admission.py --max-concurrent 4 --slo 1
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_chat import percentile, serve, start_stack  # noqa: E402
+
+
+def submit(base_url, session_id, message):
+    import requests
+
+    started = time.perf_counter()
+    res = requests.post(f"{base_url}/chat", json={"message": message, "session_id": session_id})
+    return res.status_code, res.headers.get("Retry-After"), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--copies", type=int, default=2, help="identical submissions per session")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="simulated seconds per LLM call")
+    parser.add_argument("--max-concurrent", type=int, default=8)
+    parser.add_argument("--slo", type=float, default=2.0, help="CHAT_LATENCY_SLO_SECONDS")
+    parser.add_argument("--no-coalesce", action="store_true")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    os.environ.update({
+        "CHAT_MAX_CONCURRENT": str(args.max_concurrent),
+        "CHAT_LATENCY_SLO_SECONDS": str(args.slo),
+        # one scripted LLM call per turn, so the run time is known up front
+        "CHAT_RUN_ESTIMATE_SECONDS": str(args.llm_latency),
+        "CHAT_COALESCE": "false" if args.no_coalesce else "true",
+    })
+    logging.disable(logging.WARNING)
+    main_module, fake_llm, _, http = start_stack(args.llm_latency)
+    serve(main_module.app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    jobs = [(f"bench-{i}", "What is the capital of France?") for i in range(args.sessions) for _ in range(args.copies)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        results = list(pool.map(lambda job: submit(base_url, *job), jobs))
+    elapsed = time.perf_counter() - started
+
+    served = [lat for status, _, lat in results if status == 200]
+    shed = [(status, retry) for status, retry, _ in results if status == 429]
+    stats = main_module.admission.stats()
+    main_module.audit.stop()   # flush the audit rows
+    server = [json.loads(row[3])["ms"] / 1000 for row in http.sheet_rows if row[1] == "chat"]
+
+    print(f"sessions={args.sessions} copies={args.copies} llm_latency={args.llm_latency}s "
+          f"max_concurrent={args.max_concurrent} slo={args.slo}s coalesce={not args.no_coalesce}")
+    print(f"requests:         {len(results)} in {elapsed:.2f}s")
+    print(f"served:           {len(served)}  shed (429): {len(shed)}  "
+          f"other errors: {len(results) - len(served) - len(shed)}")
+    print(f"agent runs:       {stats['admitted']}  coalesced: {stats['coalesced']}  rejected: {stats['rejected']}")
+    print(f"LLM calls:        {fake_llm.calls}")
+    if served:
+        print(f"served p50/p95:   {percentile(server, 50) * 1000:.0f} / {percentile(server, 95) * 1000:.0f} ms "
+              f"server, {percentile(served, 50) * 1000:.0f} / {percentile(served, 95) * 1000:.0f} ms client "
+              f"(mean {statistics.fmean(served) * 1000:.0f} ms)")
+    if shed:
+        print(f"Retry-After:      {sorted({int(r) for _, r in shed if r})} s")
+
+    assert len(server) == len(served), f"{len(served)} served but {len(server)} audit rows"
+    p95 = percentile(server, 95)
+    assert p95 <= args.slo, f"served p95 {p95:.2f}s is over the {args.slo}s SLO"
+
+
+if __name__ == "__main__":
+    main()
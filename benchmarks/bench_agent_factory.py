@@ -0,0 +1,72 @@
+"""
+Per-request agent construction cost.
+
+Compares building the whole agent for every request (tool schemas bound to
+the LLM, prompt, executor validation) with AgentFactory.executor(), which
+binds a session's memory to the parts built once at startup.
+
+    python benchmarks/bench_agent_factory.py --requests 2000
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_chat import start_stack  # noqa: E402
+
+
+def per_call_us(fn, n):
+    started = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    main_module, _, _, _ = start_stack(0.0)
+
+    from langchain.agents import create_openai_tools_agent
+    from agent_factory import AgentFactory
+    from logging_setup import AgentTraceHandler
+    from sessions import sessions
+    from tool_executor import ParallelAgentExecutor
+
+    def rebuild(i):
+        ParallelAgentExecutor(
+            agent=create_openai_tools_agent(main_module.llm, main_module.tools, main_module.prompt),
+            tools=main_module.tools,
+            callbacks=[AgentTraceHandler()],
+            memory=sessions.memory(f"bench-{i}"),
+            handle_parsing_errors=True,
+        )
+
+    def from_factory(i):
+        main_module.agent_factory.executor(sessions.memory(f"bench-{i}"))
+
+    startup = per_call_us(
+        lambda i: AgentFactory(main_module.llm, main_module.tools, main_module.prompt, [AgentTraceHandler()]), 50
+    )
+    rebuild_us = per_call_us(rebuild, args.requests)
+    factory_us = per_call_us(from_factory, args.requests)
+
+    a = main_module.agent_factory.executor(sessions.memory("a"))
+    b = main_module.agent_factory.executor(sessions.memory("b"))
+
+    print(f"requests={args.requests}")
+    print(f"factory startup:           {startup:8.1f} us (once)")
+    print(f"rebuild agent per request: {rebuild_us:8.1f} us")
+    print(f"factory executor:          {factory_us:8.1f} us  ({rebuild_us / factory_us:.0f}x cheaper)")
+    print(f"shared between sessions:   agent={a.agent is b.agent} tools={a.tools is b.tools} "
+          f"memory={a.memory is b.memory}")
+
+
+if __name__ == "__main__":
+    main()
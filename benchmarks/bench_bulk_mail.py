@@ -0,0 +1,97 @@
+"""
+Offline benchmark for the bulk campaign endpoints of
+automate-scripts/send_titan_mail.py against a local SMTP sink.
+
+Sends one JSON job and one CSV job, follows the progress stream of each
+and reports messages/sec and how many SMTP sessions were opened. Rendering,
+escaping and per-recipient results are tested in tests/test_bulk_mail.py.
+
+    python benchmarks/bench_bulk_mail.py --recipients 2000 --pool-size 3
+    python benchmarks/bench_bulk_mail.py --rate 600   # paced like production
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "automate-scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_chat import serve  # noqa: E402
+from fakes import SMTPSink  # noqa: E402
+
+TEMPLATE = "<p>Hi {name},</p><p>Your code is <b>{code}</b>.</p><style>p { margin: 0 }</style>"
+
+
+def follow(base_url, job_id):
+    """Read the job's event stream until it finishes; return the last snapshot."""
+    import requests
+
+    last = None
+    with requests.get(f"{base_url}/send-email/jobs/{job_id}/stream", stream=True) as res:
+        for line in res.iter_lines(decode_unicode=True):
+            if line.startswith("data: "):
+                last = json.loads(line[len("data: "):])
+    return last
+
+
+def report(label, snapshot, elapsed):
+    print(f"{label:<5} status={snapshot['status']} total={snapshot['total']} sent={snapshot['sent']} "
+          f"failed={snapshot['failed']}  {snapshot['sent'] / elapsed:.0f} msg/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=1000)
+    parser.add_argument("--pool-size", type=int, default=3)
+    parser.add_argument("--rate", type=int, default=0, help="messages per minute (0 = unpaced)")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    smtp = SMTPSink().start()
+    os.environ.update({
+        "TITAN_SMTP_SERVER": "127.0.0.1",
+        "TITAN_SMTP_PORT": str(smtp.port),
+        "TITAN_SMTP_STARTTLS": "false",
+        "TITAN_SENDER_EMAIL": "campaigns@example.com",
+        "TITAN_APP_PASSWORD": "bench",
+        "TITAN_POOL_SIZE": str(args.pool_size),
+        "TITAN_RATE_PER_MINUTE": str(args.rate),
+    })
+    logging.disable(logging.WARNING)
+    import send_titan_mail
+    import requests
+
+    serve(send_titan_mail.app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    # every 100th address is refused by the sink, every 250th is malformed
+    def address(i):
+        if i % 250 == 249:
+            return f"broken-{i}@"
+        return f"reject-{i}@example.com" if i % 100 == 99 else f"user{i}@example.com"
+
+    recipients = [{"email": address(i), "fields": {"name": f"User {i}", "code": f"C{i:05d}"}}
+                  for i in range(args.recipients)]
+    started = time.perf_counter()
+    job = requests.post(f"{base_url}/send-email/bulk",
+                        json={"subject": "Hello {name}", "body": TEMPLATE, "recipients": recipients}).json()
+    report("json", follow(base_url, job["job_id"]), time.perf_counter() - started)
+
+    rows = "email,name,code\n" + "".join(f"{address(i)},User {i},C{i:05d}\n" for i in range(args.recipients))
+    started = time.perf_counter()
+    job = requests.post(f"{base_url}/send-email/bulk/csv",
+                        data={"subject": "Hello {name}", "body": TEMPLATE},
+                        files={"file": ("list.csv", rows, "text/csv")}).json()
+    report("csv", follow(base_url, job["job_id"]), time.perf_counter() - started)
+
+    print(f"messages accepted by sink: {smtp.messages}")
+    print(f"SMTP sessions opened:      {smtp.sessions} (pool size {args.pool_size})")
+    print(f"pool:                      {requests.get(f'{base_url}/health/ready').json()['smtp_pool']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Offline benchmark for the shared Calendar client (calendar_client.py)
+against the local Calendar stand-in.
+
+    python benchmarks/bench_calendar.py --events 500 --changes 10
+
+Compares:
+- one insert per event vs batched inserts (HTTP requests, time)
+- listing with and without a fields= mask (bytes received)
+- a full listing vs an incremental sync after a few changes
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeHTTPBackend  # noqa: E402
+
+
+def event(i):
+    return {
+        "summary": f"Meeting {i}",
+        "start": {"dateTime": "2030-01-01T10:00:00", "timeZone": "Asia/Kolkata"},
+        "end": {"dateTime": "2030-01-01T11:00:00", "timeZone": "Asia/Kolkata"},
+        "attendees": [{"email": f"guest{i}@example.com"}],
+    }
+
+
+def measure(http, fn):
+    """(seconds, HTTP requests, response bytes) spent in fn()."""
+    requests_before = sum(http.hits.values())
+    bytes_before = http.bytes_out
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started, sum(http.hits.values()) - requests_before, http.bytes_out - bytes_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--changes", type=int, default=10, help="events added between the two syncs")
+    args = parser.parse_args()
+
+    http = FakeHTTPBackend().start()
+    token_file = os.path.join(tempfile.mkdtemp(), "token.json")
+    with open(token_file, "w") as f:
+        json.dump({
+            "token": "bench", "refresh_token": "bench", "client_id": "bench",
+            "client_secret": "bench", "expiry": "2999-01-01T00:00:00Z",
+        }, f)
+    os.environ.update({
+        "GOOGLE_TOKEN_FILE": token_file,  # imported into the token store on first use
+        "TOKEN_STORE_PATH": os.path.join(os.path.dirname(token_file), "tokens.db"),
+        "CALENDAR_API_ENDPOINT": http.url,
+    })
+    logging.disable(logging.WARNING)
+    import calendar_client as cal
+
+    service = cal.calendar_service()
+
+    def one_by_one():
+        for i in range(args.events):
+            cal.execute(service.events().insert(calendarId="primary", body=event(i)))
+
+    _, seconds, requests, _ = measure(http, one_by_one)
+    # batch requests count once per HTTP round trip
+    print(f"insert one by one: {args.events} events  {requests:5d} HTTP requests  {seconds * 1000:8.1f} ms")
+    results, seconds, _, _ = measure(http, lambda: cal.insert_events(event(i) for i in range(args.events)))
+    print(f"insert batched:    {len(results)} events  {http.hits['batch']:5d} HTTP requests  {seconds * 1000:8.1f} ms")
+
+    _, _, _, full_bytes = measure(http, lambda: cal.sync_events(fields="*"))
+    first, _, _, masked_bytes = measure(http, lambda: cal.sync_events())
+    print(f"full listing:      {len(first['items'])} events  {full_bytes / 1024:8.1f} KiB without mask, "
+          f"{masked_bytes / 1024:8.1f} KiB with fields=")
+
+    for i in range(args.changes):
+        cal.execute(service.events().insert(calendarId="primary", body=event(10_000 + i)))
+    changed, _, requests, sync_bytes = measure(http, lambda: cal.sync_events(sync_token=first["next_sync_token"]))
+    print(f"incremental sync:  {len(changed['items'])} changed events  {requests} HTTP requests  "
+          f"{sync_bytes / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
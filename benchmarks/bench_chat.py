@@ -0,0 +1,173 @@
+"""
+Offline end-to-end benchmark for POST /chat.
+
+Runs main.app under uvicorn with every external dependency replaced by a
+local stand-in (see fakes.py) and reports latency percentiles, throughput
+and LLM calls per turn.
+
+    python benchmarks/bench_chat.py --concurrency 8 --sessions 200
+    python benchmarks/bench_chat.py --scenario email --llm-latency 0.3
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeHTTPBackend, ScriptedLLM, SMTPSink  # noqa: E402
+
+# Each scenario is a list of turns sent in order on one session
+SCENARIOS = {
+    "qa": ["What is the capital of France?"],
+    "search": ["search the web for the latest FastAPI release"],
+    "email": ["send an email to guest@example.com saying 'Hello from the benchmark'"],
+    "parallel": [
+        "tell me about Malay's profile and search the web for his projects",
+        "send this email in one step to guest@example.com saying 'Hi'",
+    ],
+    "meeting": [
+        "schedule a meeting tomorrow 4pm for an hour with guest@example.com about the roadmap",
+        "confirm meeting",
+    ],
+}
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def start_stack(llm_latency, scripted=True):
+    """
+    Start the fakes, point config at them, import main and swap in the fake
+    LLM. With scripted=False the pool keeps its real Azure clients, so
+    AZURE_DEPLOYMENTS must point them at a FakeAzureOpenAI.
+    """
+    smtp = SMTPSink().start()
+    http = FakeHTTPBackend().start()
+
+    token_file = os.path.join(tempfile.mkdtemp(), "token.json")
+    with open(token_file, "w") as f:
+        json.dump({
+            "token": "bench", "refresh_token": "bench", "client_id": "bench",
+            "client_secret": "bench", "expiry": "2999-01-01T00:00:00Z",
+        }, f)
+
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": "http://127.0.0.1:9/",
+        "AZURE_OPENAI_API_KEY": "bench",
+        "AZURE_RPM_LIMIT": "1000000",
+        "AZURE_TPM_LIMIT": "1000000000",
+        "SENDER_EMAIL": "bot@example.com",
+        "APP_PASSWORD": "bench",
+        "ADMIN_EMAIL": "admin@example.com",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp.port),
+        "SMTP_STARTTLS": "false",
+        "DUCKDUCKGO_URL": http.url,
+        "GOOGLE_TOKEN_FILE": token_file,
+        "TOKEN_STORE_PATH": os.path.join(os.path.dirname(token_file), "tokens.db"),
+        "CALENDAR_API_ENDPOINT": http.url,
+        "AUDIT_SHEET_ID": "bench",
+        "SHEETS_API_ENDPOINT": http.url,
+        "AUDIT_SPILL_FILE": os.path.join(os.path.dirname(token_file), "audit_spill.jsonl"),
+        "EMAIL_OUTBOX_FILE": os.path.join(os.path.dirname(token_file), "email_outbox.jsonl"),
+    })
+
+    os.chdir(ROOT)  # tools read malay.txt relative to the repo
+    import main
+    from google.oauth2.credentials import Credentials
+    from token_store import token_store
+
+    token_store.save("sheets", Credentials.from_authorized_user_file(token_file))  # audit sink account
+
+    if not scripted:
+        return main, None, smtp, http
+    fake_llm = ScriptedLLM(latency=llm_latency)
+    for deployment in main.llm_pool.deployments:
+        deployment.llm = fake_llm
+    return main, fake_llm, smtp, http
+
+
+def serve(app, port):
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def run_session(base_url, turns, session_id):
+    import requests
+
+    latencies = []
+    errors = 0
+    with requests.Session() as http:
+        for message in turns:
+            started = time.perf_counter()
+            res = http.post(f"{base_url}/chat", json={"message": message, "session_id": session_id})
+            latencies.append(time.perf_counter() - started)
+            errors += res.status_code != 200
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["mixed", *SCENARIOS], default="mixed")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--sessions", type=int, default=100, help="sessions to run (each runs its scenario's turns)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="simulated seconds per LLM call")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    main_module, fake_llm, smtp, http = start_stack(args.llm_latency)
+    serve(main_module.app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    names = list(SCENARIOS) if args.scenario == "mixed" else [args.scenario]
+    jobs = [SCENARIOS[names[i % len(names)]] for i in range(args.sessions)]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda ij: run_session(base_url, ij[1], f"bench-{ij[0]}"), enumerate(jobs)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [lat for lats, _ in results for lat in lats]
+    errors = sum(err for _, err in results)
+    turns = len(latencies)
+
+    print(f"scenario={args.scenario} concurrency={args.concurrency} sessions={args.sessions} "
+          f"llm_latency={args.llm_latency}s")
+    print(f"turns:            {turns} ({errors} errors)")
+    print(f"throughput:       {turns / elapsed:.1f} req/s")
+    print(f"latency p50:      {percentile(latencies, 50) * 1000:.1f} ms")
+    print(f"latency p95:      {percentile(latencies, 95) * 1000:.1f} ms")
+    print(f"latency p99:      {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"latency mean:     {statistics.fmean(latencies) * 1000:.1f} ms")
+    print(f"LLM calls/turn:   {fake_llm.calls / max(turns, 1):.2f}")
+    print(f"emails sent:      {smtp.messages} (before the final admin digest)")
+    print(f"calendar inserts: {http.hits['calendar']} (duplicates rejected: {http.hits['duplicate']})  searches: {http.hits['search']}")
+    main_module.tool_module.admin_digest.stop()
+    print(f"admin digests:    {main_module.tool_module.admin_digest.digests_sent} "
+          f"({main_module.tool_module.admin_digest.events_recorded} events)")
+    main_module.audit.stop()
+    print(f"audit rows:       {len(http.sheet_rows)} in {http.hits['sheets_append']} appends")
+
+
+if __name__ == "__main__":
+    main()
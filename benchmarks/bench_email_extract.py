@@ -0,0 +1,66 @@
+"""
+Micro-benchmark for recipient extraction.
+
+Compares the old inline regexes from save_email_details with email_extract
+on normal, large and adversarial (backtracking-prone) inputs.
+
+    python benchmarks/bench_email_extract.py
+"""
+import logging
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from email_extract import extract_message_body, extract_recipients, find_addresses  # noqa: E402
+
+
+# ---------- the previous implementation ----------
+def old_extract(text):
+    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    match = re.search(r"'(.*?)'|\"(.*?)\"|saying\s(.+)|message\s*:\s*(.+)", text, re.IGNORECASE)
+    return emails, match
+
+
+def new_extract(text):
+    return find_addresses(text), extract_message_body(text)
+
+
+def new_extract_validated(text):
+    return extract_recipients(text), extract_message_body(text)
+
+
+CASES = {
+    "typical": "send an email to anni990@gmail.com saying 'Hello from Malay'",
+    "many recipients": " ".join(f"user{i}@example.com," for i in range(200)) + " saying hi",
+    "large paste (100 KB)": ("lorem ipsum dolor sit amet " * 4000) + " mail bob@example.com",
+    "long word, no @": "a" * 20_000,
+    "dotted domain, no tld": "x@" + "a." * 5_000,
+    "unmatched quotes": "'" + "a " * 10_000 + '"' + "b " * 10_000,
+    "@ storm": "a@" * 10_000,
+}
+
+
+def bench(fn, text, min_time=0.2):
+    runs = 0
+    started = time.perf_counter()
+    while True:
+        fn(text)
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def main():
+    logging.disable(logging.WARNING)  # truncation warnings would flood the table
+    print(f"{'case':<24}{'old':>14}{'new':>14}{'new+validate':>16}")
+    for name, text in CASES.items():
+        row = [bench(fn, text) * 1e6 for fn in (old_extract, new_extract, new_extract_validated)]
+        print(f"{name:<24}" + "".join(f"{us:>12.1f}us" for us in row[:2]) + f"{row[2]:>14.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Offline benchmark for the Azure deployment pool behind POST /chat.
+
+Unlike bench_chat.py, the pool keeps its real clients (ScheduledAzureChatOpenAI
+with its scheduler) and talks HTTP to a local Azure stand-in serving four
+deployments (see FakeAzureOpenAI):
+
+    fast   router tier, 20 ms
+    slow   router tier, 150 ms
+    down   router tier, answers every call with --fail-status (429 or 5xx)
+    big    answer tier, 50 ms
+
+Phase 1 measures /chat with "down" failing; phase 2 makes "fast" slower
+than "slow". Each phase reports turn latency and how the calls split across
+deployments. Failover, cooldown, re-routing and tier choice are tested in
+tests/test_llm_pool.py.
+
+    python benchmarks/bench_llm_pool.py --sessions 60 --concurrency 4
+    python benchmarks/bench_llm_pool.py --fail-status 503
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_chat import SCENARIOS, percentile, run_session, serve, start_stack  # noqa: E402
+from fakes import FakeAzureOpenAI  # noqa: E402
+
+DEPLOYMENTS = {
+    "fast": {"latency": 0.02, "tiers": ["router"]},
+    "slow": {"latency": 0.15, "tiers": ["router"]},
+    "down": {"latency": 0.0, "tiers": ["router"]},
+    "big": {"latency": 0.05, "tiers": ["answer"]},
+}
+
+
+def run_phase(base_url, sessions, concurrency, offset):
+    names = list(SCENARIOS)
+    jobs = [SCENARIOS[names[i % len(names)]] for i in range(sessions)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(
+            lambda ij: run_session(base_url, ij[1], f"pool-{offset + ij[0]}"), enumerate(jobs)
+        ))
+    latencies = [lat for lats, _ in results for lat in lats]
+    return latencies, sum(err for _, err in results)
+
+
+def delta(after, before):
+    return {name: tuple(a - b for a, b in zip(after[name], before[name])) for name in after}
+
+
+def report(label, seconds, latencies, errors, calls):
+    print(f"{label} ({seconds:.1f}s): {len(latencies)} turns, {errors} errors, {len(latencies) / seconds:.1f} turns/s, "
+          f"p50/p95 {percentile(latencies, 50) * 1000:.0f} / {percentile(latencies, 95) * 1000:.0f} ms")
+    for name, (total, failed, answers) in calls.items():
+        print(f"    {name:<5} calls={total:<4} failed={failed:<4} answer steps={answers}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=60, help="sessions per phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--fail-status", type=int, default=429, help="status the 'down' deployment returns")
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    stub = FakeAzureOpenAI({
+        name: {"latency": spec["latency"], "fail": args.fail_status if name == "down" else None}
+        for name, spec in DEPLOYMENTS.items()
+    }).start()
+    os.environ["AZURE_DEPLOYMENTS"] = json.dumps([
+        {"name": name, "deployment": name, "endpoint": stub.url, "tiers": spec["tiers"]}
+        for name, spec in DEPLOYMENTS.items()
+    ])
+
+    logging.disable(logging.WARNING)
+    main_module, _, _, _ = start_stack(0.0, scripted=False)
+    serve(main_module.app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    # ---------- phase 1: one deployment failing ----------
+    started = time.perf_counter()
+    latencies, errors = run_phase(base_url, args.sessions, args.concurrency, 0)
+    phase1 = stub.counts()
+    report("phase 1", time.perf_counter() - started, latencies, errors, phase1)
+
+    # ---------- phase 2: "fast" becomes the slowest ----------
+    stub.set("fast", latency=0.3)
+    started = time.perf_counter()
+    latencies, errors = run_phase(base_url, args.sessions, args.concurrency, args.sessions)
+    phase2 = delta(stub.counts(), phase1)
+    report("phase 2", time.perf_counter() - started, latencies, errors, phase2)
+
+    for name, stats in main_module.llm_pool.stats().items():
+        latency = f"{stats['latency_ewma'] * 1000:.0f} ms" if stats["latency_ewma"] is not None else "-"
+        print(f"pool {name:<5} latency ewma={latency:<7} error ewma={stats['error_rate_ewma']:.2f} "
+              f"failovers={stats['failures']} scheduler 429s={stats['scheduler']['throttled_429']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Bytes per idle chat session: the old layout (ConversationBufferMemory plus
+draft dicts per session) against SessionStore's slotted records, with and
+without zlib-compressed histories.
+
+Every session holds two turns of history, an email draft and a meeting
+draft.
+
+    python benchmarks/bench_session_memory.py --sizes 10000,100000 --turns 2
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain.memory import ConversationBufferMemory  # noqa: E402
+
+from sessions import EmailDraft, MeetingDetails, SessionStore, intern  # noqa: E402
+
+HUMAN = "schedule a meeting tomorrow 4pm for an hour with guest{i}@example.com about the roadmap"
+AI = (
+    "📝 Meeting Draft Created\n\nTitle: Roadmap review {i}\nDate: 2026-10-20\n"
+    "Time: 16:00 → 17:00 (Asia/Kolkata)\n\nSay **\"confirm meeting\"** to schedule. "
+    "I have also saved an email to guest{i}@example.com with the agenda for the session."
+)
+
+
+def turns(i, count):
+    for turn in range(count):
+        yield HUMAN.format(i=f"{i}-{turn}"), AI.format(i=f"{i}-{turn}")
+
+
+def legacy(n, count):
+    store = {}
+    for i in range(n):
+        memory = ConversationBufferMemory(memory_key="chat_history", input_key="input", return_messages=True)
+        for human, ai in turns(i, count):
+            memory.save_context({"input": human}, {"output": ai})
+        store[f"session-{i}"] = {
+            "memory": memory,
+            "email": {"to_emails": [f"guest{i}@example.com"], "subject": "New Message", "body_html": f"Hello {i}"},
+            "meeting": {
+                "topic": f"Roadmap review {i}", "date": "2026-10-20", "start_time": "16:00",
+                "end_time": "17:00", "timezone": "Asia/Kolkata", "attendees": [f"guest{i}@example.com"],
+            },
+        }
+    return store
+
+
+def compact(n, count, compress):
+    store = SessionStore(maxsize=n, idle_ttl=3600)
+    for i in range(n):
+        state = store.get(f"session-{i}")
+        for human, ai in turns(i, count):
+            state.add_turn(human, ai)
+        state.email_draft = EmailDraft((f"guest{i}@example.com",), intern("New Message"), f"Hello {i}")
+        state.meeting_draft = MeetingDetails(
+            topic=f"Roadmap review {i}", date="2026-10-20", start_time="16:00",
+            end_time="17:00", timezone=intern("Asia/Kolkata"), attendees=(f"guest{i}@example.com",),
+        )
+        if compress:
+            state.compress()
+    return store
+
+
+def measure(build, n):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    store = build()
+    elapsed = time.perf_counter() - started
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del store
+    gc.collect()
+    return used / n, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--turns", type=int, default=2)
+    args = parser.parse_args()
+
+    layouts = {
+        "buffer memory + dicts": lambda n: legacy(n, args.turns),
+        "slotted session": lambda n: compact(n, args.turns, compress=False),
+        "slotted + zlib history": lambda n: compact(n, args.turns, compress=True),
+    }
+    print(f"turns per session={args.turns}")
+    for n in (int(size) for size in args.sizes.split(",")):
+        for name, build in layouts.items():
+            per_session, elapsed = measure(lambda: build(n), n)
+            print(f"{n:>7} sessions  {name:<24} {per_session:8.0f} B/session  "
+                  f"{per_session * n / 2**20:7.1f} MiB total  (built in {elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
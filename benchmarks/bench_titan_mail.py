@@ -0,0 +1,112 @@
+"""
+Load test for POST /send-email of automate-scripts/send_titan_mail.py
+against a local SMTP sink.
+
+Compares the async service (pooled aiosmtplib sessions opened on startup)
+with the previous handler, which ran blocking smtplib in the threadpool
+and connected + logged in for every request. --handshake-delay makes the
+sink's greeting and AUTH slow, like TLS + login against a real provider.
+
+    python benchmarks/bench_titan_mail.py --requests 500 --concurrency 32
+    python benchmarks/bench_titan_mail.py --handshake-delay 0.1
+"""
+import argparse
+import logging
+import os
+import smtplib
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "automate-scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_chat import percentile, serve  # noqa: E402
+from fakes import SMTPSink  # noqa: E402
+
+
+def baseline_app(service):
+    """The handler as it was before pooling: one new SMTP session per request."""
+    from fastapi import FastAPI, HTTPException
+
+    app = FastAPI()
+
+    @app.post("/send-email")
+    def send_email(email: service.EmailRequest):
+        msg = service.build_message(email.to, email.subject, email.body, email.is_html)
+        try:
+            server = smtplib.SMTP(service.SMTP_SERVER, service.SMTP_PORT)
+            server.login(service.SENDER_EMAIL, service.SENDER_PASSWORD)
+            server.sendmail(service.SENDER_EMAIL, email.to, msg.as_string())
+            server.quit()
+            return {"message": "Email sent successfully"}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return app
+
+
+def load(base_url, total, concurrency):
+    import requests
+
+    def one(i):
+        with requests.Session() as http:
+            started = time.perf_counter()
+            res = http.post(f"{base_url}/send-email", json={
+                "to": f"user{i}@example.com", "subject": "Load test", "body": f"<p>message {i}</p>",
+            })
+            return time.perf_counter() - started, res.status_code == 200
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    return time.perf_counter() - started, [lat for lat, _ in results], sum(not ok for _, ok in results)
+
+
+def report(label, elapsed, latencies, errors, sessions):
+    print(f"{label:<9} {len(latencies) / elapsed:7.1f} req/s  "
+          f"p50 {percentile(latencies, 50) * 1000:6.1f} ms  p95 {percentile(latencies, 95) * 1000:6.1f} ms  "
+          f"mean {statistics.fmean(latencies) * 1000:6.1f} ms  errors {errors}  smtp sessions {sessions}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--handshake-delay", type=float, default=0.05)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    smtp = SMTPSink(handshake_delay=args.handshake_delay).start()
+    os.environ.update({
+        "TITAN_SMTP_SERVER": "127.0.0.1",
+        "TITAN_SMTP_PORT": str(smtp.port),
+        "TITAN_SMTP_STARTTLS": "false",
+        "TITAN_SENDER_EMAIL": "service@example.com",
+        "TITAN_APP_PASSWORD": "bench",
+        "TITAN_POOL_SIZE": str(args.pool_size),
+    })
+    logging.disable(logging.WARNING)
+    import send_titan_mail
+    import requests
+
+    print(f"requests={args.requests} concurrency={args.concurrency} pool_size={args.pool_size} "
+          f"handshake_delay={args.handshake_delay}s")
+
+    serve(baseline_app(send_titan_mail), args.port)
+    before = smtp.sessions
+    report("baseline", *load(f"http://127.0.0.1:{args.port}", args.requests, args.concurrency),
+           smtp.sessions - before)
+
+    before = smtp.sessions  # include the sessions opened on startup
+    serve(send_titan_mail.app, args.port + 1)
+    base_url = f"http://127.0.0.1:{args.port + 1}"
+    report("pooled", *load(base_url, args.requests, args.concurrency), smtp.sessions - before)
+    print(f"ready: {requests.get(f'{base_url}/health/ready').json()}")
+
+
+if __name__ == "__main__":
+    main()
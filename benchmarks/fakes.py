@@ -0,0 +1,501 @@
+"""
+Deterministic local stand-ins for the chatbot's external services.
+
+- ScriptedLLM       replays tool-call sequences instead of calling Azure
+- FakeAzureOpenAI   Azure chat completions endpoint serving several
+                    deployments with the same scripts, each with its own
+                    latency and failure mode (429 / 5xx)
+- SMTPSink          accepts and counts mail on a local port (refuses
+                    recipients containing "reject")
+- FakeHTTPBackend   answers DuckDuckGo, Google Calendar (insert, get, batch
+                    insert, paged list with sync tokens) and Sheets values.append
+"""
+import itertools
+import json
+import socketserver
+import threading
+import time
+import uuid
+from email import message_from_bytes
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+# ---------------------------------------------------------
+# Scripted LLM
+# ---------------------------------------------------------
+def tool_step(name, **args):
+    return ("tool", name, args)
+
+
+def parallel_step(*steps):
+    """Several tool calls emitted in one model step."""
+    return ("tools", None, list(steps))
+
+
+def final_step(text):
+    return ("final", text, None)
+
+
+# keyword in the user message -> steps the "model" takes for that turn
+SCRIPTS = {
+    "profile and search": [
+        parallel_step(tool_step("get_malay_info", dummy="profile"), tool_step("web_search", query="{input}")),
+        final_step("Here is the profile and what the web says."),
+    ],
+    "email in one step": [
+        parallel_step(tool_step("save_email_details", text="{input}"), tool_step("send_email", trigger="send")),
+        final_step("Done, the email has been sent."),
+    ],
+    "confirm": [tool_step("schedule_meeting", _="confirm"), final_step("Your meeting is booked.")],
+    "meeting": [
+        tool_step("save_meeting_details", topic="Roadmap review", attendees=["guest@example.com"]),
+        final_step("Draft created. Say 'confirm meeting' to book it."),
+    ],
+    "email": [
+        tool_step("save_email_details", text="{input}"),
+        tool_step("send_email", trigger="send"),
+        final_step("Done, the email has been sent."),
+    ],
+    "search": [tool_step("web_search", query="{input}"), final_step("Here is what I found.")],
+    "malay": [tool_step("get_malay_info", dummy="profile"), final_step("Malay is an AI developer.")],
+}
+DEFAULT_SCRIPT = [final_step("Paris is the capital of France.")]
+
+
+class ScriptedLLM:
+    """
+    Pool member that picks a script from the user's message and returns the
+    step matching the number of model steps already taken in this turn.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _script_for(self, text):
+        lowered = text.lower()
+        for keyword, script in SCRIPTS.items():
+            if keyword in lowered:
+                return script
+        return DEFAULT_SCRIPT
+
+    def _tool_call(self, name, args, user_text):
+        args = {k: (v.format(input=user_text) if isinstance(v, str) else v) for k, v in args.items()}
+        return {
+            "id": f"call_{next(self._ids)}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps(args)},
+        }
+
+    def reply(self, messages) -> AIMessage:
+        """The scripted model message for this point of the turn."""
+        last_human = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+        user_text = str(messages[last_human].content)
+        step = sum(isinstance(m, AIMessage) for m in messages[last_human + 1:])
+        script = self._script_for(user_text)
+        kind, value, args = script[min(step, len(script) - 1)]
+
+        if kind == "final":
+            return AIMessage(content=value)
+        calls = args if kind == "tools" else [(kind, value, args)]
+        return AIMessage(
+            content="",
+            additional_kwargs={"tool_calls": [self._tool_call(name, a, user_text) for _, name, a in calls]},
+        )
+
+    def _generate(self, messages, **kwargs):
+        with self._lock:
+            self.calls += 1
+        message = self.reply(messages)
+        if self.latency:
+            time.sleep(self.latency)
+
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens + 20}},
+        )
+
+
+# ---------------------------------------------------------
+# Azure OpenAI stand-in
+# ---------------------------------------------------------
+_ROLES = {"system": SystemMessage, "user": HumanMessage, "assistant": AIMessage}
+
+
+def _to_message(item):
+    if item["role"] == "tool":
+        return ToolMessage(content=item.get("content") or "", tool_call_id=item.get("tool_call_id", ""))
+    return _ROLES[item["role"]](content=item.get("content") or "")
+
+
+class _AzureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real endpoint
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, payload, status=200, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # models.list, used by the startup warm-up
+        self.send_json({"object": "list", "data": []})
+
+    def do_POST(self):
+        # /openai/deployments/<deployment>/chat/completions?api-version=...
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        name = self.path.split("/deployments/", 1)[-1].split("/", 1)[0]
+        deployment = self.server.deployments.get(name)
+        if deployment is None:
+            return self.send_json({"error": {"code": "DeploymentNotFound", "message": name}}, status=404)
+
+        messages = request.get("messages", [])
+        with self.server.lock:
+            deployment["calls"] += 1
+            deployment["answers"] += bool(messages) and messages[-1]["role"] == "tool"
+        time.sleep(deployment["latency"])
+        status = deployment["fail"]
+        if status:
+            with self.server.lock:
+                deployment["failures"] += 1
+            return self.send_json(
+                {"error": {"code": str(status), "message": f"{name} is failing with {status}"}},
+                status=status, headers=[("retry-after-ms", "10")],
+            )
+
+        message = self.server.script.reply([_to_message(m) for m in messages])
+        tool_calls = message.additional_kwargs.get("tool_calls")
+        prompt_tokens = sum(len(str(m.get("content") or "")) for m in messages) // 4
+        self.send_json({
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": name,
+            "choices": [{
+                "index": 0,
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "message": {"role": "assistant", "content": message.content or None, "tool_calls": tool_calls},
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+        })
+
+
+class FakeAzureOpenAI(ThreadingHTTPServer):
+    """
+    Serves /openai/deployments/<name>/chat/completions for every configured
+    deployment with ScriptedLLM's scripts. Each deployment has a latency
+    and a `fail` status (None, 429, 500, 503) that can be changed while
+    the benchmark runs. Calls, failures and answer steps (calls whose
+    prompt ends with a tool result) are counted per deployment.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, deployments, host="127.0.0.1", port=0):
+        super().__init__((host, port), _AzureHandler)
+        self.script = ScriptedLLM()
+        self.lock = threading.Lock()
+        self.deployments = {
+            name: {"latency": spec.get("latency", 0.0), "fail": spec.get("fail"),
+                   "calls": 0, "failures": 0, "answers": 0}
+            for name, spec in deployments.items()
+        }
+
+    def set(self, name, **changes):
+        with self.lock:
+            self.deployments[name].update(changes)
+
+    def counts(self):
+        with self.lock:
+            return {name: (d["calls"], d["failures"], d["answers"]) for name, d in self.deployments.items()}
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+# ---------------------------------------------------------
+# SMTP sink
+# ---------------------------------------------------------
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.server.sessions += 1
+        time.sleep(self.server.handshake_delay)
+        self.reply("220 sink ESMTP ready")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+
+            if command.startswith(("EHLO", "HELO")):
+                self.wfile.write(b"250-sink\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif command.startswith("AUTH"):
+                time.sleep(self.server.handshake_delay)
+                self.reply("235 Authentication successful")
+            elif command.startswith("DATA"):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                while True:
+                    line = self.rfile.readline()
+                    if line in (b".\r\n", b".\n", b""):
+                        break
+                    data.append(line[1:] if line.startswith(b".") else line)   # dot-stuffing
+                with self.server.lock:
+                    self.server.messages += 1
+                    if self.server.keep:
+                        self.server.received.append((recipients, b"".join(data)))
+                recipients = []
+                self.reply("250 OK queued")
+            elif command.startswith("RCPT") and "REJECT" in command:
+                self.reply("550 No such user")
+            elif command.startswith("RCPT"):
+                recipients.append(line.decode().split(":", 1)[1].strip().strip("<>"))
+                self.reply("250 OK")
+            elif command.startswith(("MAIL", "RSET")):
+                recipients = []
+                self.reply("250 OK")
+            elif command.startswith("QUIT"):
+                self.reply("221 Bye")
+                return
+            else:  # NOOP and the rest
+                self.reply("250 OK")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, handshake_delay=0.0, keep=False):
+        super().__init__((host, port), _SMTPHandler)
+        self.messages = 0
+        self.sessions = 0
+        self.lock = threading.Lock()
+        # keep=True stores (recipients, raw message) pairs in `received`, for tests
+        self.keep = keep
+        self.received = []
+        # seconds added to the greeting and to AUTH, standing in for the
+        # TLS + login round trips of a real provider
+        self.handshake_delay = handshake_delay
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+# ---------------------------------------------------------
+# DuckDuckGo + Calendar stand-in
+# ---------------------------------------------------------
+def _parse_mask(mask):
+    """'items(id,start),nextPageToken' -> {"items": {"id": None, "start": None}, "nextPageToken": None}"""
+    tree, stack, name = {}, [], ""
+    for char in mask + ",":
+        if char == "(":
+            stack.append(tree)
+            tree[name.strip()] = tree = {}
+            name = ""
+        elif char in ",)":
+            if name.strip():
+                tree[name.strip()] = None
+            name = ""
+            if char == ")":
+                tree = stack.pop()
+        else:
+            name += char
+    return tree
+
+
+def apply_mask(payload, query):
+    """Honour the fields= partial-response parameter like Google does."""
+    if "fields" not in query or query["fields"][0] == "*":
+        return payload
+
+    def keep(value, tree):
+        if tree is None:
+            return value
+        if isinstance(value, list):
+            return [keep(v, tree) for v in value]
+        if isinstance(value, dict):
+            return {k: keep(v, tree[k]) for k, v in value.items() if k in tree}
+        return value
+
+    return keep(payload, _parse_mask(query["fields"][0]))
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.server.bytes_out += len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        query = parse_qs(query)
+        if "/events/" in path:
+            status, payload = self.server.get_event(path.rsplit("/", 1)[-1])
+            return self.send_json(apply_mask(payload, query), status)
+        if path.endswith("/events"):
+            status, payload = self.server.list_events(query)
+            return self.send_json(apply_mask(payload, query), status)
+        self.server.hits["search"] += 1
+        self.send_json({"Abstract": "Local search stand-in result.", "RelatedTopics": []})
+
+    def do_POST(self):
+        if self.path.split("?")[0].endswith("/batch"):
+            return self.do_batch()
+        if ":append" in self.path:
+            return self.do_sheets_append()
+        status, payload = self.server.insert_event(json.loads(self.read_body() or b"{}"))
+        self.send_json(apply_mask(payload, parse_qs(self.path.partition("?")[2])), status)
+
+    def do_sheets_append(self):
+        if self.server.sheets_down:
+            return self.send_json({"error": {"code": 503, "message": "Service unavailable"}}, status=503)
+        rows = json.loads(self.read_body() or b"{}").get("values", [])
+        with self.server.lock:
+            self.server.hits["sheets_append"] += 1
+            self.server.sheet_rows.extend(rows)
+        self.send_json({"updates": {"updatedRows": len(rows)}})
+
+    def do_batch(self):
+        """multipart/mixed batch of inserts, answered part by part."""
+        request = message_from_bytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self.read_body()
+        )
+        self.server.hits["batch"] += 1
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for part in request.get_payload():
+            head, _, body = part.get_payload().partition("\r\n\r\n")
+            status, payload = self.server.insert_event(json.loads(body or "{}"))
+            payload = apply_mask(payload, parse_qs(head.split(" ")[1].partition("?")[2]))
+            content_id = part["Content-ID"].strip("<>")
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                f"Content-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n"
+            )
+        body = ("".join(parts) + f"--{boundary}--\r\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", f"multipart/mixed; boundary={boundary}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeHTTPBackend(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0):
+        super().__init__((host, port), _HTTPHandler)
+        self.hits = {"search": 0, "calendar": 0, "duplicate": 0, "batch": 0, "list": 0, "sheets_append": 0}
+        self.sheet_rows = []
+        self.sheets_down = False
+        self.events = {}
+        self.bytes_out = 0
+        self.changes = 0        # bumped on every write; sync tokens are "s<changes>"
+        self.lock = threading.Lock()
+
+    # ---------- Calendar ----------
+    def insert_event(self, event):
+        with self.lock:
+            if event.get("id") in self.events:
+                self.hits["duplicate"] += 1
+                return 409, {"error": {"code": 409, "message": "The requested identifier already exists."}}
+            self.hits["calendar"] += 1
+            self.changes += 1
+            event_id = event.get("id") or f"evt{self.hits['calendar']}"
+            now = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+            # the metadata Google returns for every event, so field masks matter
+            event = {
+                "kind": "calendar#event",
+                "etag": f'"{self.changes:016d}"',
+                **event,
+                "id": event_id,
+                "status": "confirmed",
+                "htmlLink": f"https://calendar.local/event?eid={event_id}",
+                "created": now,
+                "updated": now,
+                "creator": {"email": "bot@example.com", "self": True},
+                "organizer": {"email": "bot@example.com", "self": True},
+                "iCalUID": f"{event_id}@google.com",
+                "sequence": 0,
+                "reminders": {"useDefault": True},
+                "eventType": "default",
+                "_change": self.changes,
+            }
+            self.events[event_id] = event
+        return 200, self._public(event)
+
+    def get_event(self, event_id):
+        event = self.events.get(event_id)
+        if event is None:
+            return 404, {"error": {"code": 404}}
+        return 200, self._public(event)
+
+    def list_events(self, query):
+        """Paged listing; with syncToken only events changed after it."""
+        self.hits["list"] += 1
+        with self.lock:
+            since = 0
+            if "syncToken" in query:
+                since = int(query["syncToken"][0].lstrip("s"))
+            changed = [e for e in self.events.values() if e["_change"] > since]
+            sync_token = f"s{self.changes}"
+        start = int(query.get("pageToken", ["0"])[0])
+        size = int(query.get("maxResults", ["250"])[0])
+        page = {"items": [self._public(e) for e in changed[start:start + size]]}
+        if start + size < len(changed):
+            page["nextPageToken"] = str(start + size)
+        else:
+            page["nextSyncToken"] = sync_token
+        return 200, page
+
+    @staticmethod
+    def _public(event):
+        return {k: v for k, v in event.items() if not k.startswith("_")}
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}/"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
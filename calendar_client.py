@@ -0,0 +1,176 @@
+import logging
+import threading
+from typing import Iterable, List, Optional
+
+import httplib2
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from googleapiclient.http import BatchHttpRequest
+
+import config
+from resilience import CircuitOpenError
+from token_store import token_store
+
+logger = logging.getLogger(__name__)
+
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+# Only what callers read; keeps list/insert responses small
+EVENT_FIELDS = "id,status,summary,start,end,attendees(email),htmlLink,updated"
+LIST_FIELDS = f"items({EVENT_FIELDS}),nextPageToken,nextSyncToken"
+
+# Google accepts up to 1000 calls per batch but recommends staying well below
+BATCH_LIMIT = 50
+
+
+def is_transient_calendar_error(e: Exception) -> bool:
+    if isinstance(e, HttpError):
+        return e.resp.status in (429,) or e.resp.status >= 500
+    return isinstance(e, (CircuitOpenError, OSError, httplib2.HttpLib2Error))
+
+
+# ---------------------------------------------------------
+# Shared client
+# ---------------------------------------------------------
+_services = {}   # account -> (credentials, service)
+_services_lock = threading.Lock()
+_local = threading.local()
+
+
+def _client(account: Optional[str] = None):
+    """
+    (credentials, service) for an account, rebuilt only when the token
+    store hands out new credentials (re-authorization).
+    """
+    account = account or config.GOOGLE_ACCOUNT
+    credentials = token_store.get(account)
+    with _services_lock:
+        cached = _services.get(account)
+        if cached is None or cached[0] is not credentials:
+            client_options = (
+                {"api_endpoint": config.CALENDAR_API_ENDPOINT} if config.CALENDAR_API_ENDPOINT else None
+            )
+            # the service object is only a request factory; requests are sent
+            # with a per-thread http (see thread_http) because httplib2 is not
+            # thread-safe
+            service = build(
+                "calendar", "v3",
+                credentials=credentials,
+                client_options=client_options,
+                cache_discovery=False,
+            )
+            cached = _services[account] = (credentials, service)
+            logger.info(f"Calendar client built for account {account!r}")
+        return cached
+
+
+def calendar_service(account: Optional[str] = None):
+    """The shared Calendar service. Execute its requests with execute()."""
+    return _client(account)[1]
+
+
+def thread_http(account: Optional[str] = None) -> AuthorizedHttp:
+    """This thread's authorized connection; all threads share one set of credentials per account."""
+    account = account or config.GOOGLE_ACCOUNT
+    credentials, _ = _client(account)
+    https = getattr(_local, "https", None)
+    if https is None:
+        https = _local.https = {}
+    cached = https.get(account)
+    if cached is None or cached[0] is not credentials:
+        cached = https[account] = (
+            credentials,
+            AuthorizedHttp(credentials, http=httplib2.Http(timeout=config.CALENDAR_TIMEOUT)),
+        )
+    return cached[1]
+
+
+def execute(request, account: Optional[str] = None):
+    return request.execute(http=thread_http(account))
+
+
+# ---------------------------------------------------------
+# Batch insert
+# ---------------------------------------------------------
+def new_batch(callback, account: Optional[str] = None) -> BatchHttpRequest:
+    # new_batch_http_request() always targets googleapis.com, even when
+    # CALENDAR_API_ENDPOINT points the rest of the client elsewhere
+    if config.CALENDAR_API_ENDPOINT:
+        return BatchHttpRequest(callback=callback, batch_uri=config.CALENDAR_API_ENDPOINT.rstrip("/") + "/batch")
+    return calendar_service(account).new_batch_http_request(callback=callback)
+
+
+def insert_events(events: Iterable[dict], calendar_id: str = "primary",
+                  account: Optional[str] = None) -> List[dict]:
+    """
+    Insert many events with one HTTP round trip per BATCH_LIMIT events.
+    Returns one entry per event, in order: {"event": {...}} or {"error": "..."}.
+    """
+    service = calendar_service(account)
+    events = list(events)
+    results: List[Optional[dict]] = [None] * len(events)
+
+    def on_response(request_id, response, exception):
+        index = int(request_id)
+        if exception is not None:
+            results[index] = {"error": str(exception)}
+        else:
+            results[index] = {"event": response}
+
+    for offset in range(0, len(events), BATCH_LIMIT):
+        batch = new_batch(on_response, account)
+        for index, event in enumerate(events[offset:offset + BATCH_LIMIT], start=offset):
+            batch.add(
+                service.events().insert(calendarId=calendar_id, body=event, fields=EVENT_FIELDS),
+                request_id=str(index),
+            )
+        batch.execute(http=thread_http(account))
+
+    return results
+
+
+# ---------------------------------------------------------
+# Listing + incremental sync
+# ---------------------------------------------------------
+def list_events(calendar_id: str = "primary", page_token: Optional[str] = None,
+                sync_token: Optional[str] = None, max_results: int = 250,
+                fields: str = LIST_FIELDS, account: Optional[str] = None, **filters) -> dict:
+    """
+    One page of events. With sync_token, only events changed since that
+    token are returned (deleted ones with status "cancelled"); Google
+    doesn't allow filters like timeMin together with a sync token.
+    """
+    params = {"calendarId": calendar_id, "maxResults": max_results, "fields": fields}
+    if page_token:
+        params["pageToken"] = page_token
+    if sync_token:
+        params["syncToken"] = sync_token
+    else:
+        params.update(filters)
+    return execute(calendar_service(account).events().list(**params), account)
+
+
+def sync_events(calendar_id: str = "primary", sync_token: Optional[str] = None,
+                fields: str = LIST_FIELDS, account: Optional[str] = None) -> dict:
+    """
+    All events changed since sync_token (every event when it's None), across
+    all pages, plus the token for the next call. An expired token (410)
+    falls back to a full sync, flagged with full_sync=True.
+    """
+    items, page_token = [], None
+    try:
+        while True:
+            page = list_events(calendar_id, page_token=page_token, sync_token=sync_token,
+                               fields=fields, account=account)
+            items.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
+    except HttpError as e:
+        if e.resp.status != 410 or not sync_token:
+            raise
+        logger.info(f"Sync token for {calendar_id} expired; doing a full sync")
+        return sync_events(calendar_id, None, fields, account)
+
+    return {"items": items, "next_sync_token": page.get("nextSyncToken"), "full_sync": sync_token is None}
@@ -1,4 +1,5 @@
 import os
+import json
 import logging
 import dotenv
 
@@ -22,6 +23,185 @@ try:
     sender_email = os.getenv("SENDER_EMAIL")
     sender_password = os.getenv("APP_PASSWORD")
     admin_email = os.getenv("ADMIN_EMAIL")
+    SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+    SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+    SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+    EMAIL_OUTBOX_MAX = int(os.getenv("EMAIL_OUTBOX_MAX", "1000"))
+    # messages the mail server refuses for good are appended here, not retried ("" = log only)
+    EMAIL_DEAD_LETTER_FILE = os.getenv("EMAIL_DEAD_LETTER_FILE", "email_dead_letters.jsonl")
+    # admin notifications are batched into one digest email per interval
+    # (0 = one email per action); kinds listed in ADMIN_IMMEDIATE_EVENTS
+    # flush the digest right away
+    ADMIN_DIGEST_SECONDS = float(os.getenv("ADMIN_DIGEST_SECONDS", "300"))
+    ADMIN_DIGEST_MAX_EVENTS = int(os.getenv("ADMIN_DIGEST_MAX_EVENTS", "100"))
+    ADMIN_IMMEDIATE_EVENTS = [
+        kind.strip() for kind in os.getenv("ADMIN_IMMEDIATE_EVENTS", "email_failed").split(",") if kind.strip()
+    ]
 except Exception as e:
     logging.error("Error loading email configuration from environment variables", exc_info=True)
-    raise e
\ No newline at end of file
+    raise e
+
+# External services (overridable so benchmarks can point at local stand-ins)
+try:
+    DUCKDUCKGO_URL = os.getenv("DUCKDUCKGO_URL", "https://api.duckduckgo.com/")
+    GOOGLE_TOKEN_FILE = os.getenv("GOOGLE_TOKEN_FILE", "token.json")  # legacy, imported once
+    GOOGLE_ACCOUNT = os.getenv("GOOGLE_ACCOUNT", "default")  # token store account the chatbot uses
+    # encrypted OAuth token store; TOKEN_STORE_KEY is a Fernet key
+    # (generated into TOKEN_STORE_PATH + ".key" when unset)
+    TOKEN_STORE_PATH = os.getenv("TOKEN_STORE_PATH", "tokens.db")
+    TOKEN_STORE_KEY = os.getenv("TOKEN_STORE_KEY")
+    TOKEN_REFRESH_AHEAD_SECONDS = float(os.getenv("TOKEN_REFRESH_AHEAD_SECONDS", "600"))
+    TOKEN_REFRESH_CHECK_SECONDS = float(os.getenv("TOKEN_REFRESH_CHECK_SECONDS", "60"))
+    CALENDAR_API_ENDPOINT = os.getenv("CALENDAR_API_ENDPOINT")  # None = Google
+    CALENDAR_TIMEOUT = float(os.getenv("CALENDAR_TIMEOUT", "10"))
+    WEB_SEARCH_TIMEOUT = float(os.getenv("WEB_SEARCH_TIMEOUT", "10"))
+    # circuit breakers: fail fast after N consecutive errors, retry after M seconds
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "30"))
+    # repeated send_email / schedule_meeting calls for the same draft within
+    # this window return the first result instead of acting twice
+    IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "600"))
+    IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+except Exception as e:
+    logging.error("Error loading external service configuration", exc_info=True)
+    raise e
+# LLM rate limiting (should match the Azure deployment quota)
+try:
+    AZURE_RPM_LIMIT = int(os.getenv("AZURE_RPM_LIMIT", "60"))
+    AZURE_TPM_LIMIT = int(os.getenv("AZURE_TPM_LIMIT", "60000"))
+    LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "60"))
+    # Keep LangChain's own retries low; the scheduler paces us instead
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+except Exception as e:
+    logging.error("Error loading LLM rate limit configuration", exc_info=True)
+    raise e
+
+# /chat admission control: concurrent agent runs, and load shedding (429)
+# once the estimated queue wait passes CHAT_LATENCY_SLO_SECONDS
+try:
+    CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", "16"))
+    CHAT_MAX_PER_SESSION = int(os.getenv("CHAT_MAX_PER_SESSION", "1"))
+    CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "200"))
+    CHAT_LATENCY_SLO_SECONDS = float(os.getenv("CHAT_LATENCY_SLO_SECONDS", "15"))
+    CHAT_MAX_WAIT_SECONDS = float(os.getenv("CHAT_MAX_WAIT_SECONDS", "30"))
+    # typical agent run time, used for the wait estimate until runs are measured
+    CHAT_RUN_ESTIMATE_SECONDS = float(os.getenv("CHAT_RUN_ESTIMATE_SECONDS", "3"))
+    # identical in-flight messages from one session share one agent run
+    CHAT_COALESCE = os.getenv("CHAT_COALESCE", "true").lower() == "true"
+except Exception as e:
+    logging.error("Error loading admission control configuration", exc_info=True)
+    raise e
+
+# Chat sessions (conversation history + drafts), dropped when idle or
+# least recently used beyond SESSION_MAX
+try:
+    SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+    SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "3600"))
+    # histories of sessions idle this long are kept zlib-compressed (0 = off)
+    SESSION_COMPRESS_AFTER_SECONDS = float(os.getenv("SESSION_COMPRESS_AFTER_SECONDS", "300"))
+except Exception as e:
+    logging.error("Error loading session configuration", exc_info=True)
+    raise e
+
+# Startup / shutdown
+try:
+    STARTUP_WARMUP_TIMEOUT = float(os.getenv("STARTUP_WARMUP_TIMEOUT", "10"))
+    # in-flight runs, the admin digest, audit rows and queued emails get
+    # this long in total; set the server's graceful timeout a bit higher
+    SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "25"))
+    # emails still queued at shutdown are saved here and sent after restart
+    EMAIL_OUTBOX_FILE = os.getenv("EMAIL_OUTBOX_FILE", "email_outbox.jsonl")
+    # optional: keep chat sessions across restarts (gzipped JSON lines)
+    SESSION_SNAPSHOT_FILE = os.getenv("SESSION_SNAPSHOT_FILE")
+except Exception as e:
+    logging.error("Error loading lifecycle configuration", exc_info=True)
+    raise e
+
+# Azure OpenAI deployment pool
+# AZURE_DEPLOYMENTS is an optional JSON list; each entry needs "deployment" and
+# may override "name", "endpoint", "api_key", "rpm", "tpm" and "tiers"
+# ("router" = tool-routing steps, "answer" = final answers). Example:
+# [{"name": "east-mini", "deployment": "gpt-4.1-mini", "tiers": ["router"]},
+#  {"name": "west-full", "deployment": "gpt-4.1", "endpoint": "https://west.openai.azure.com/", "tiers": ["answer"]}]
+try:
+    _deployments = json.loads(os.getenv("AZURE_DEPLOYMENTS") or "[]")
+    if not _deployments:
+        _deployments = [{"name": AZURE_DEPLOYMENT, "deployment": AZURE_DEPLOYMENT}]
+
+    AZURE_DEPLOYMENTS = [
+        {
+            "name": d.get("name", d["deployment"]),
+            "deployment": d["deployment"],
+            "endpoint": d.get("endpoint", AZURE_OPENAI_ENDPOINT),
+            "api_key": d.get("api_key", AZURE_OPENAI_API_KEY),
+            "rpm": int(d.get("rpm", AZURE_RPM_LIMIT)),
+            "tpm": int(d.get("tpm", AZURE_TPM_LIMIT)),
+            "tiers": d.get("tiers", ["router", "answer"]),
+        }
+        for d in _deployments
+    ]
+    logging.info(f"Azure OpenAI pool: {[d['name'] for d in AZURE_DEPLOYMENTS]}")
+except Exception as e:
+    logging.error("Error parsing AZURE_DEPLOYMENTS", exc_info=True)
+    raise e
+
+# Logging
+# LOG_LEVELS sets per-component levels, e.g. "tools=WARNING,agent.trace=DEBUG"
+try:
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | text
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))  # share of per-request logs kept
+    LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "200"))
+    LOG_LEVELS = {
+        name.strip(): level.strip().upper()
+        for name, level in (
+            pair.split("=", 1)
+            for pair in os.getenv("LOG_LEVELS", "agent.trace=INFO,httpx=WARNING,openai=WARNING").split(",")
+            if "=" in pair
+        )
+    }
+except Exception as e:
+    logging.error("Error loading logging configuration", exc_info=True)
+    raise e
+
+# Tool execution
+# TOOL_TIMEOUTS / TOOL_CONCURRENCY are "tool=value" lists, e.g. "web_search=10,send_email=60"
+def _tool_settings(name, default, cast):
+    return {
+        tool.strip(): cast(value)
+        for tool, value in (
+            pair.split("=", 1) for pair in os.getenv(name, default).split(",") if "=" in pair
+        )
+    }
+
+
+try:
+    TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "16"))
+    TOOL_TIMEOUT_DEFAULT = float(os.getenv("TOOL_TIMEOUT_DEFAULT", "30"))
+    TOOL_TIMEOUTS = _tool_settings("TOOL_TIMEOUTS", "web_search=15,send_email=60,schedule_meeting=60", float)
+    # how long a call may wait for its dependencies / a concurrency slot before it is dropped unrun
+    TOOL_QUEUE_TIMEOUT = float(os.getenv("TOOL_QUEUE_TIMEOUT", "30"))
+    TOOL_CONCURRENCY_DEFAULT = int(os.getenv("TOOL_CONCURRENCY_DEFAULT", "8"))
+    TOOL_CONCURRENCY = _tool_settings("TOOL_CONCURRENCY", "send_email=4,schedule_meeting=4", int)
+except Exception as e:
+    logging.error("Error loading tool execution configuration", exc_info=True)
+    raise e
+
+# Audit log (Google Sheets). Disabled unless AUDIT_SHEET_ID is set; the
+# Sheets token is the AUDIT_SHEETS_ACCOUNT entry of the token store
+# (authorize it with automate-scripts/google-sheets.py /login).
+try:
+    AUDIT_SHEET_ID = os.getenv("AUDIT_SHEET_ID")
+    AUDIT_SHEET_RANGE = os.getenv("AUDIT_SHEET_RANGE", "Audit!A:D")
+    AUDIT_SHEETS_ACCOUNT = os.getenv("AUDIT_SHEETS_ACCOUNT", "sheets")
+    SHEETS_API_ENDPOINT = os.getenv("SHEETS_API_ENDPOINT")  # None = Google
+    SHEETS_TIMEOUT = float(os.getenv("SHEETS_TIMEOUT", "10"))
+    AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "5"))
+    AUDIT_BATCH_ROWS = int(os.getenv("AUDIT_BATCH_ROWS", "200"))
+    AUDIT_MAX_BUFFER = int(os.getenv("AUDIT_MAX_BUFFER", "5000"))
+    AUDIT_PUT_TIMEOUT = float(os.getenv("AUDIT_PUT_TIMEOUT", "0.5"))
+    AUDIT_SPILL_FILE = os.getenv("AUDIT_SPILL_FILE", "audit_spill.jsonl")
+except Exception as e:
+    logging.error("Error loading audit configuration", exc_info=True)
+    raise e
@@ -0,0 +1,98 @@
+import re
+import logging
+from typing import List, NamedTuple, Optional
+
+from email_validator import EmailNotValidError, validate_email
+
+logger = logging.getLogger(__name__)
+
+# Longer pasted text is truncated before any regex runs
+MAX_INPUT_CHARS = 20_000
+MAX_RECIPIENTS = 50
+
+# ---------------------------------------------------------
+# Precompiled, backtracking-safe patterns
+# ---------------------------------------------------------
+# - the lookbehind pins the match to the start of a token, so a long run of
+#   word characters is scanned once instead of once per start position
+# - every quantifier is bounded and domain labels can't contain dots, so
+#   there is only one way to split a candidate
+EMAIL_PATTERN = re.compile(
+    r"(?<![\w.+-])[\w.+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){1,8}"
+)
+
+# Message body: quoted text, or whatever follows "saying" / "message:".
+# Negated classes instead of lazy .*? so an unmatched quote can't backtrack.
+BODY_PATTERNS = (
+    re.compile(r"'([^'\n]{1,5000})'"),
+    re.compile(r'"([^"\n]{1,5000})"'),
+    re.compile(r"“([^”\n]{1,5000})”"),
+    re.compile(r"\bsaying\s+([^\n]{1,5000})", re.IGNORECASE),
+    re.compile(r"\bmessage\s*:\s*([^\n]{1,5000})", re.IGNORECASE),
+)
+
+
+class Recipients(NamedTuple):
+    valid: List[str]
+    invalid: List[str]
+    truncated: bool
+
+
+def _cap(text: str) -> tuple:
+    if len(text) > MAX_INPUT_CHARS:
+        return text[:MAX_INPUT_CHARS], True
+    return text, False
+
+
+def find_addresses(text: str) -> List[str]:
+    """Candidate addresses in order of appearance, de-duplicated (case-insensitive)."""
+    text, _ = _cap(text)
+    if "@" not in text:
+        return []
+
+    seen = set()
+    found = []
+    for match in EMAIL_PATTERN.finditer(text):
+        address = match.group(0).strip(".")
+        key = address.lower()
+        if key not in seen:
+            seen.add(key)
+            found.append(address)
+            if len(found) >= MAX_RECIPIENTS:
+                break
+    return found
+
+
+def extract_recipients(text: str) -> Recipients:
+    """Find, de-duplicate and validate every address in the text."""
+    capped, truncated = _cap(text)
+    if truncated:
+        logger.warning(f"Recipient text truncated from {len(text)} to {MAX_INPUT_CHARS} chars")
+
+    valid, invalid = [], []
+    seen = set()
+    for address in find_addresses(capped):
+        try:
+            normalized = validate_email(address, check_deliverability=False).normalized
+        except EmailNotValidError:
+            invalid.append(address)
+            continue
+        # validation normalizes the domain, which can reveal new duplicates
+        if normalized.lower() not in seen:
+            seen.add(normalized.lower())
+            valid.append(normalized)
+
+    return Recipients(valid, invalid, truncated)
+
+
+def extract_message_body(text: str) -> Optional[str]:
+    """Earliest quoted / 'saying ...' / 'message: ...' segment, if any."""
+    text, _ = _cap(text)
+    best = None
+    for pattern in BODY_PATTERNS:
+        match = pattern.search(text)
+        if match and (best is None or match.start() < best.start()):
+            best = match
+    if not best:
+        return None
+    return best.group(1).strip() or None
@@ -0,0 +1,88 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
+
+import config
+from logging_setup import log_event
+
+logger = logging.getLogger(__name__)
+
+
+def idempotency_key(session_id: str, action: str, payload: Any) -> str:
+    """Stable key for one user intent: same session + same draft -> same key."""
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(f"{session_id}|{action}|{body}".encode()).hexdigest()
+
+
+class IdempotencyCache:
+    """
+    Bounded, TTL'd map of key -> result for side-effecting operations.
+
+    The first caller for a key runs the operation; concurrent callers with
+    the same key wait for it; later callers within the TTL get the original
+    result back without repeating the side effect. Failures are not cached,
+    so a genuine retry after an error still goes through.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, Future)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _evict(self, now):
+        while self._entries:
+            key, (expires_at, future) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.maxsize and expires_at > now:
+                break
+            if not future.done():
+                break
+            self._entries.popitem(last=False)
+
+    def run_once(self, key: str, fn: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                future = entry[1]
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self._entries[key] = (now + self.ttl, future)
+                owner = True
+
+        if not owner:
+            log_event(logger, "idempotency.hit", sample=False, key=key[:16])
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            with self._lock:
+                if self._entries.get(key, (None, None))[1] is future:
+                    del self._entries[key]
+            future.set_exception(e)
+            raise
+        future.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# One cache for all side-effecting tools
+side_effects = IdempotencyCache(
+    maxsize=config.IDEMPOTENCY_MAX_KEYS,
+    ttl=config.IDEMPOTENCY_TTL_SECONDS,
+)
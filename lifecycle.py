@@ -0,0 +1,180 @@
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+from fastapi.concurrency import run_in_threadpool
+
+import config
+import tools
+from admission import admission
+from audit_sink import audit
+from calendar_client import thread_http
+from logging_setup import log_event
+from sessions import sessions
+from token_store import token_store
+
+logger = logging.getLogger(__name__)
+
+
+class RunTracker:
+    """Agent runs in progress (they live in worker threads), so shutdown can wait for them."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.active = 0
+
+    @contextmanager
+    def track(self):
+        with self._cond:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+    def wait_idle(self, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.active == 0, max(0.0, timeout))
+
+
+runs = RunTracker()
+
+
+# ---------------------------------------------------------
+# Warm-up checks (blocking; run in the threadpool)
+# ---------------------------------------------------------
+def warm_llm(llm_pool):
+    """One cheap models.list per deployment: opens the HTTP/TLS connection the chat calls reuse."""
+    warmed = 0
+    for deployment in llm_pool.deployments:
+        completions = getattr(deployment.llm, "client", None)
+        client = getattr(completions, "_client", None)   # the deployment's openai.AzureOpenAI
+        if client is None:
+            continue
+        client.with_options(max_retries=0, timeout=config.STARTUP_WARMUP_TIMEOUT).models.list()
+        warmed += 1
+    return None if warmed else "skipped"
+
+
+def warm_smtp():
+    """Connect and log in once, so bad credentials or DNS show up at startup."""
+    server = tools.smtp_connect()
+    try:
+        server.noop()
+    finally:
+        server.quit()
+
+
+def warm_calendar():
+    if not token_store.has(config.GOOGLE_ACCOUNT):
+        return "not authorized"
+    thread_http()   # builds the shared client and this thread's connection
+
+
+# ---------------------------------------------------------
+# Lifecycle
+# ---------------------------------------------------------
+class Lifecycle:
+    """
+    Startup: restore what the last shutdown saved (queued emails, sessions),
+    then warm the LLM connection, SMTP login and Calendar client in
+    parallel. A failed check is logged, not fatal.
+
+    Shutdown, within `drain_seconds` overall: stop admitting /chat runs and
+    turn away the queued ones, wait for the runs in progress, send the admin digest, flush the audit
+    sink and email outbox, save what couldn't be sent (and the sessions,
+    if SESSION_SNAPSHOT_FILE is set) to disk, then stop background threads.
+    """
+
+    def __init__(self, warmup_timeout: float, drain_seconds: float):
+        self.warmup_timeout = warmup_timeout
+        self.drain_seconds = drain_seconds
+        self.started = False
+        self.draining = False
+        self.warmup: Dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.started and not self.draining
+
+    async def _check(self, name: str, fn: Callable, *args):
+        started = time.perf_counter()
+        try:
+            result = await run_in_threadpool(fn, *args)
+            self.warmup[name] = result or "ok"
+        except Exception as e:
+            self.warmup[name] = f"failed: {e!r}"
+            log_event(logger, "startup.warmup_failed", level=logging.WARNING, sample=False,
+                      component=name, error=repr(e))
+        log_event(logger, "startup.warmup", sample=False, component=name, status=self.warmup[name],
+                  ms=round((time.perf_counter() - started) * 1000, 1))
+
+    async def startup(self, llm_pool):
+        self.draining = False
+        admission.open()
+
+        queued = tools.load_outbox(config.EMAIL_OUTBOX_FILE)
+        restored = sessions.load(config.SESSION_SNAPSHOT_FILE) if config.SESSION_SNAPSHOT_FILE else 0
+
+        checks = [
+            self._check("llm", warm_llm, llm_pool),
+            self._check("smtp", warm_smtp),
+            self._check("calendar", warm_calendar),
+        ]
+        try:
+            await asyncio.wait_for(asyncio.gather(*checks), self.warmup_timeout)
+        except asyncio.TimeoutError:
+            log_event(logger, "startup.warmup_timeout", level=logging.WARNING, sample=False,
+                      timeout=self.warmup_timeout, done=list(self.warmup))
+
+        self.started = True
+        log_event(logger, "startup.ready", sample=False, warmup=self.warmup,
+                  queued_emails=queued, restored_sessions=restored)
+
+    async def shutdown(self):
+        deadline = time.monotonic() + self.drain_seconds
+
+        def remaining() -> float:
+            return max(0.0, deadline - time.monotonic())
+
+        self.draining = True
+        await admission.close()   # queued requests get 503 now
+
+        # a run counts from admission, before its worker thread enters
+        # runs.track(); then wait for threads whose request already went away
+        drained = await admission.wait_idle(remaining())
+        drained = await run_in_threadpool(runs.wait_idle, remaining()) and drained
+        if not drained:
+            log_event(logger, "shutdown.runs_abandoned", level=logging.WARNING, sample=False,
+                      admitted=admission.running, active=runs.active)
+
+        # the digest goes through the outbox, so it is stopped before the outbox is flushed
+        await run_in_threadpool(tools.admin_digest.stop, remaining())
+        await run_in_threadpool(audit.stop, remaining())
+        unsent = await run_in_threadpool(tools.flush_outbox, remaining())
+        saved_emails = tools.save_outbox(config.EMAIL_OUTBOX_FILE) if unsent else 0
+        saved_sessions = sessions.save(config.SESSION_SNAPSHOT_FILE) if config.SESSION_SNAPSHOT_FILE else 0
+
+        token_store.stop()
+        log_event(logger, "shutdown.done", sample=False, drained=drained, saved_emails=saved_emails,
+                  saved_sessions=saved_sessions, audit_spill_pending=audit.stats()["spill_pending"],
+                  seconds_left=round(remaining(), 1))
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "draining": self.draining,
+            "warmup": self.warmup,
+            "active_runs": runs.active,
+        }
+
+
+lifecycle = Lifecycle(
+    warmup_timeout=config.STARTUP_WARMUP_TIMEOUT,
+    drain_seconds=config.SHUTDOWN_DRAIN_SECONDS,
+)
@@ -0,0 +1,178 @@
+import time
+import logging
+import threading
+from typing import Any, List, Optional
+
+import openai
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import ToolMessage
+
+from llm_scheduler import LLMScheduler, ScheduledAzureChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+ROUTER = "router"   # cheap/fast model for tool-routing steps
+ANSWER = "answer"   # stronger model for final answers
+
+
+def is_failover_error(e: Exception) -> bool:
+    """429, 5xx and transport errors are worth retrying on another deployment."""
+    if isinstance(e, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(e, openai.APIStatusError):
+        return e.status_code >= 500
+    return False
+
+
+# ---------------------------------------------------------
+# Pool member
+# ---------------------------------------------------------
+class Deployment:
+    """One Azure deployment plus its EWMA latency / error stats."""
+
+    def __init__(self, name: str, llm, tiers, alpha: float = 0.2, cooldown: float = 30.0):
+        self.name = name
+        self.llm = llm
+        self.tiers = set(tiers)
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.latency = None         # EWMA seconds, None until first sample
+        self.error_rate = 0.0       # EWMA of 0/1 outcomes
+        self.down_until = 0.0
+        self.calls = 0
+        self.failures = 0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def score(self) -> float:
+        # untried deployments go first so every member gets measured
+        if self.latency is None:
+            return 0.0
+        return self.latency * (1.0 + 10.0 * self.error_rate)
+
+    def record_success(self, elapsed: float):
+        self.calls += 1
+        self.latency = elapsed if self.latency is None else (
+            self.alpha * elapsed + (1 - self.alpha) * self.latency
+        )
+        self.error_rate = (1 - self.alpha) * self.error_rate
+
+    def record_failure(self, now: float):
+        self.calls += 1
+        self.failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.down_until = now + self.cooldown
+
+    def stats(self) -> dict:
+        scheduler = getattr(self.llm, "scheduler", None)
+        return {
+            "tiers": sorted(self.tiers),
+            "latency_ewma": self.latency,
+            "error_rate_ewma": round(self.error_rate, 4),
+            "healthy": self.healthy(time.monotonic()),
+            "calls": self.calls,
+            "failures": self.failures,
+            "scheduler": scheduler.stats() if scheduler else None,
+        }
+
+
+# ---------------------------------------------------------
+# Pool
+# ---------------------------------------------------------
+class LLMPool:
+    """Routes each call to the best deployment for the tier, failing over on errors."""
+
+    def __init__(self, deployments: List[Deployment]):
+        if not deployments:
+            raise ValueError("LLMPool needs at least one deployment")
+        self.deployments = deployments
+        self._lock = threading.Lock()
+
+    def candidates(self, tier: str) -> List[Deployment]:
+        now = time.monotonic()
+        with self._lock:
+            in_tier = [d for d in self.deployments if tier in d.tiers]
+            others = [d for d in self.deployments if tier not in d.tiers]
+            healthy = sorted((d for d in in_tier if d.healthy(now)), key=Deployment.score)
+            healthy += sorted((d for d in others if d.healthy(now)), key=Deployment.score)
+            # if everything is cooling down, still try them, soonest-back first
+            cooling = sorted(
+                (d for d in self.deployments if not d.healthy(now)),
+                key=lambda d: d.down_until,
+            )
+        return healthy + cooling
+
+    def generate(self, tier: str, messages, **kwargs):
+        last_error = None
+        for deployment in self.candidates(tier):
+            started = time.monotonic()
+            try:
+                result = deployment.llm._generate(messages, **kwargs)
+            except Exception as e:
+                if not is_failover_error(e):
+                    raise
+                with self._lock:
+                    deployment.record_failure(time.monotonic())
+                logger.warning(f"Deployment {deployment.name} failed ({type(e).__name__}), failing over")
+                last_error = e
+                continue
+            with self._lock:
+                deployment.record_success(time.monotonic() - started)
+            return result
+        raise last_error
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {d.name: d.stats() for d in self.deployments}
+
+    @classmethod
+    def from_config(cls, deployments: List[dict], api_version: str, max_retries: int,
+                    queue_timeout: float, temperature: float = 0.8) -> "LLMPool":
+        members = []
+        for spec in deployments:
+            scheduler = LLMScheduler(
+                rpm=spec["rpm"], tpm=spec["tpm"], queue_timeout=queue_timeout
+            )
+            llm = ScheduledAzureChatOpenAI(
+                openai_api_version=api_version,
+                azure_deployment=spec["deployment"],
+                azure_endpoint=spec["endpoint"],
+                api_key=spec["api_key"],
+                temperature=temperature,
+                max_retries=max_retries,
+                scheduler=scheduler,
+            )
+            members.append(Deployment(spec["name"], llm, spec["tiers"]))
+        return cls(members)
+
+
+# ---------------------------------------------------------
+# LangChain chat model backed by the pool
+# ---------------------------------------------------------
+class PooledChatModel(BaseChatModel):
+    """
+    Chat model the agent talks to.
+
+    The first step of a turn (no tool output yet) decides which tool to call,
+    so it goes to the router tier; once a tool result ends the prompt the
+    next step is usually the final answer and goes to the answer tier.
+    """
+
+    pool: Any
+    router_tier: str = ROUTER
+    answer_tier: str = ANSWER
+
+    @property
+    def _llm_type(self) -> str:
+        return "azure-openai-pool"
+
+    def pick_tier(self, messages) -> str:
+        if messages and isinstance(messages[-1], ToolMessage):
+            return self.answer_tier
+        return self.router_tier
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        return self.pool.generate(
+            self.pick_tier(messages), messages, stop=stop, run_manager=run_manager, **kwargs
+        )
@@ -0,0 +1,254 @@
+import re
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from typing import Any, Optional
+
+import openai
+from langchain_openai import AzureChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+# Session the current agent run belongs to. Set by the /chat endpoint,
+# read by the scheduled LLM wrapper for fair queuing.
+current_session = contextvars.ContextVar("current_session", default="default")
+current_priority = contextvars.ContextVar("current_priority", default=False)
+
+
+# ---------------------------------------------------------
+# Priority classification
+# ---------------------------------------------------------
+CONFIRM_PATTERN = re.compile(
+    r"^\s*(yes|yep|ok(ay)?|sure)?[\s,!.]*"
+    r"(confirm( meeting)?|yes confirm|go ahead|book it|schedule now|send it)?[\s!.]*$",
+    re.IGNORECASE,
+)
+
+
+def is_priority_turn(message: str, max_chars: int = 40) -> bool:
+    """Short confirm-style turns ("confirm", "go ahead") jump the queue."""
+    message = message.strip()
+    if not message or len(message) > max_chars:
+        return False
+    return bool(CONFIRM_PATTERN.fullmatch(message))
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 chars per token is close enough for quota accounting
+    return max(1, len(text) // 4)
+
+
+# ---------------------------------------------------------
+# Token bucket
+# ---------------------------------------------------------
+class TokenBucket:
+    """Per-minute quota refilled continuously."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def drain(self):
+        self._refill()
+        self.tokens = 0.0
+
+
+class _Ticket:
+    __slots__ = ("session_id", "tokens", "priority", "enqueued")
+
+    def __init__(self, session_id, tokens, priority):
+        self.session_id = session_id
+        self.tokens = tokens
+        self.priority = priority
+        self.enqueued = time.monotonic()
+
+
+class QueueTimeout(Exception):
+    pass
+
+
+# ---------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------
+class LLMScheduler:
+    """
+    Client-side admission for LLM calls.
+
+    - requests/minute and tokens/minute token buckets (deployment quota)
+    - round-robin across sessions so one chatty session can't starve others
+    - a priority lane for short confirm turns
+    """
+
+    def __init__(self, rpm: int, tpm: int, queue_timeout: float = 60.0):
+        self.rpm = TokenBucket(rpm)
+        self.tpm = TokenBucket(tpm)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        # lane -> OrderedDict[session_id, deque[_Ticket]]
+        self._lanes = {True: OrderedDict(), False: OrderedDict()}
+        self._stats = {
+            "granted": 0,
+            "timed_out": 0,
+            "throttled_429": 0,
+            "wait_seconds_total": 0.0,
+            "tokens_reserved": 0,
+            "tokens_used": 0,
+        }
+
+    # ---------- queue helpers ----------
+    def _enqueue(self, ticket):
+        lane = self._lanes[ticket.priority]
+        lane.setdefault(ticket.session_id, deque()).append(ticket)
+
+    def _remove(self, ticket):
+        lane = self._lanes[ticket.priority]
+        queue = lane.get(ticket.session_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(ticket)
+        except ValueError:
+            return
+        # rotate the session to the back so others get the next turn
+        del lane[ticket.session_id]
+        if queue:
+            lane[ticket.session_id] = queue
+
+    def _head(self):
+        for priority in (True, False):
+            lane = self._lanes[priority]
+            if lane:
+                return lane[next(iter(lane))][0]
+        return None
+
+    # ---------- public API ----------
+    def acquire(self, session_id: str = "default", tokens: int = 1, priority: bool = False):
+        ticket = _Ticket(session_id, tokens, priority)
+        deadline = ticket.enqueued + self.queue_timeout
+
+        with self._cond:
+            self._enqueue(ticket)
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timed_out"] += 1
+                        raise QueueTimeout(
+                            f"LLM queue wait exceeded {self.queue_timeout}s"
+                        )
+
+                    if self._head() is ticket:
+                        wait = max(self.rpm.wait_time(1), self.tpm.wait_time(tokens))
+                        if wait == 0:
+                            self.rpm.take(1)
+                            self.tpm.take(tokens)
+                            self._stats["granted"] += 1
+                            self._stats["tokens_reserved"] += tokens
+                            self._stats["wait_seconds_total"] += time.monotonic() - ticket.enqueued
+                            return ticket
+                        self._cond.wait(min(wait, remaining))
+                    else:
+                        self._cond.wait(remaining)
+            finally:
+                self._remove(ticket)
+                self._cond.notify_all()
+
+    def settle(self, ticket, used_tokens: int):
+        """Reconcile the estimate with the token usage the API reported."""
+        if not used_tokens:
+            return
+        with self._cond:
+            diff = ticket.tokens - used_tokens
+            if diff > 0:
+                self.tpm.give_back(diff)
+            else:
+                self.tpm.take(-diff)
+            self._stats["tokens_used"] += used_tokens
+            self._cond.notify_all()
+
+    def throttled(self):
+        """Upstream returned 429: stop issuing until the buckets refill."""
+        with self._cond:
+            self._stats["throttled_429"] += 1
+            self.rpm.drain()
+            self.tpm.drain()
+
+    def stats(self) -> dict:
+        with self._cond:
+            by_lane = {
+                ("priority" if p else "normal"): sum(len(q) for q in lane.values())
+                for p, lane in self._lanes.items()
+            }
+            granted = self._stats["granted"]
+            return {
+                "queue_depth": sum(by_lane.values()),
+                "queue_depth_by_lane": by_lane,
+                "waiting_sessions": sum(len(lane) for lane in self._lanes.values()),
+                "rpm_available": int(self.rpm.tokens),
+                "tpm_available": int(self.tpm.tokens),
+                "avg_wait_seconds": (
+                    self._stats["wait_seconds_total"] / granted if granted else 0.0
+                ),
+                **self._stats,
+            }
+
+
+# ---------------------------------------------------------
+# Scheduled LLM
+# ---------------------------------------------------------
+class ScheduledAzureChatOpenAI(AzureChatOpenAI):
+    """AzureChatOpenAI that waits for a scheduler slot before every call."""
+
+    scheduler: Optional[Any] = None
+    max_completion_estimate: int = 512
+
+    def _reserve(self, messages):
+        prompt = "".join(str(m.content) for m in messages)
+        tokens = estimate_tokens(prompt) + self.max_completion_estimate
+        return self.scheduler.acquire(
+            session_id=current_session.get(),
+            tokens=tokens,
+            priority=current_priority.get(),
+        )
+
+    def _settle(self, ticket, result):
+        usage = (result.llm_output or {}).get("token_usage") or {}
+        self.scheduler.settle(ticket, usage.get("total_tokens", 0))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.scheduler is None:
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+        ticket = self._reserve(messages)
+        try:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except openai.RateLimitError:
+            self.scheduler.throttled()
+            raise
+        self._settle(ticket, result)
+        return result
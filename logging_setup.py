@@ -0,0 +1,161 @@
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from typing import Any, Dict, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+import config
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> Any:
+    limit = limit or config.LOG_MAX_FIELD_CHARS
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}…(+{len(value) - limit} chars)"
+    return value
+
+
+# ---------------------------------------------------------
+# Filters / formatters
+# ---------------------------------------------------------
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records logged with extra={"sample": True}."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sample", False) and record.levelno < logging.WARNING:
+            return random.random() < self.rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": truncate(record.getMessage()),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key != "sample":
+                entry[key] = truncate(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = {
+            k: truncate(v) for k, v in vars(record).items()
+            if k not in _RECORD_ATTRS and k != "sample"
+        }
+        if fields:
+            line += " " + " ".join(f"{k}={v!r}" for k, v in fields.items())
+        return line
+
+
+# ---------------------------------------------------------
+# Setup
+# ---------------------------------------------------------
+def setup_logging():
+    """
+    Route all logging through a QueueHandler so request threads and the
+    event loop only enqueue; a single listener thread formats and writes.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(config.LOG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.LOG_LEVEL)
+
+    for name, level in config.LOG_LEVELS.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_event(logger: logging.Logger, event: str, level: int = logging.INFO,
+              sample: bool = True, **fields):
+    """Structured, sampled log line: log_event(logger, "chat.request", session_id=...)."""
+    if logger.isEnabledFor(level):
+        # truncate before queueing so big payloads aren't held in the queue
+        extra = {
+            (f"{key}_" if key in _RECORD_ATTRS else key): truncate(value)
+            for key, value in fields.items()
+        }
+        logger.log(level, event, extra={"sample": sample, **extra})
+
+
+# ---------------------------------------------------------
+# Agent tracing
+# ---------------------------------------------------------
+class AgentTraceHandler(BaseCallbackHandler):
+    """
+    Sends the agent's step-by-step trace (tool calls, results, timings) to the
+    "agent.trace" logger instead of printing it to stdout like verbose=True.
+    Turn it up with LOG_LEVELS=agent.trace=DEBUG.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("agent.trace")
+        self._started: Dict[Any, float] = {}
+
+    def _trace(self, event, **fields):
+        log_event(self.logger, event, level=logging.DEBUG, sample=False, **fields)
+
+    def on_agent_action(self, action, *, run_id, **kwargs):
+        self._trace("agent.action", tool=action.tool, tool_input=str(action.tool_input), run_id=str(run_id))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        elapsed = round((time.perf_counter() - started) * 1000, 1) if started else None
+        self._trace("agent.tool_end", output=str(output), ms=elapsed, run_id=str(run_id))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+        log_event(self.logger, "agent.tool_error", level=logging.WARNING, sample=False,
+                  error=repr(error), run_id=str(run_id))
+
+    def on_agent_finish(self, finish, *, run_id, **kwargs):
+        self._trace("agent.finish", output=str(finish.return_values.get("output")), run_id=str(run_id))
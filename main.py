@@ -1,11 +1,12 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
-from langchain_openai import AzureChatOpenAI
-from langchain.agents import initialize_agent, AgentType
-from langchain.memory import ConversationBufferMemory
-from langchain.prompts import ChatPromptTemplate
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from tools import (
     web_search,
@@ -15,18 +16,47 @@ from tools import (
     save_meeting_tool,
     schedule_meeting_tool,
 )
+from llm_pool import LLMPool, PooledChatModel
+from meeting_parser import meeting_hints_for
+from meeting_schema import DEFAULT_TIMEZONE, current_hints
+from llm_scheduler import (
+    QueueTimeout,
+    current_session,
+    current_priority,
+    is_priority_turn,
+)
+from logging_setup import setup_logging, log_event, AgentTraceHandler
+from agent_factory import AgentFactory
+from sessions import sessions
+from resilience import breaker_stats
+from idempotency import side_effects
+from audit_sink import audit
+from admission import Overloaded, ShuttingDown, admission
+from lifecycle import lifecycle, runs
+import tools as tool_module
+from datetime import datetime
+from zoneinfo import ZoneInfo
 import config
 import logging
+import time
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Set up logging (queue-based, structured; see logging_setup.py)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------
 # FastAPI app
 # ---------------------------------------------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    # warm connections before traffic; drain and save state on the way out
+    await lifecycle.startup(llm_pool)
+    yield
+    await lifecycle.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 logger.info("FastAPI app initialized")
 
 # ------------------------- NEW -------------------------------------
@@ -43,6 +73,7 @@ app.add_middleware(
 # ------------------------- NEW -------------------------------------
 class ChatRequest(BaseModel):
     message: str
+    session_id: str = "default"
 
 # ---------------------------------------------------------
 # System Prompt
@@ -53,6 +84,8 @@ You are a helpful AI assistant.
 You have access to tools.
 Use a tool only when it is clearly needed.
 Never mention tool names to the user.
+When a request needs several independent tools (for example a profile lookup
+and a web search), call them together in the same step.
 
 ------------------------------------------------
 EMAIL RULES
@@ -88,22 +121,17 @@ STEP 1 — CREATE MEETING DRAFT
 When the user provides meeting details,
 CALL: save_meeting_details
 
-Pass JSON **AS A STRING** in this format:
+Pass the fields as structured arguments:
 
-{
-  "topic": "Topic name",
-  "date": "YYYY-MM-DD",
-  "start_time": "HH:MM",
-  "end_time": "HH:MM",
-  "timezone": "", By default, always set timezone to "IST" unless the user explicitly specifies another timezone.
-  "attendees": ["email@example.com"]
-}
+- topic
+- date        → YYYY-MM-DD
+- start_time  → 24-hour HH:MM
+- end_time    → 24-hour HH:MM (or duration_minutes if the user gave a length)
+- timezone    → "IST" unless the user explicitly specifies another timezone
+- attendees   → list of emails (optional)
 
-Rules:
-✔ date MUST be YYYY-MM-DD  
-✔ time MUST be 24-hour HH:MM  
-✔ attendees optional  
-By default, always set timezone to "IST" unless the user explicitly specifies another timezone.
+Dates, times and timezones are normalized by the tool,
+so pass what the user said if unsure of the exact format.
 
 
 
@@ -138,22 +166,26 @@ Do NOT expose internal tool names.
 
 prompt = ChatPromptTemplate.from_messages([
     ("system",SYSTEM_PROMPT),
-    ("human","{input}")
+    MessagesPlaceholder(variable_name="chat_history"),
+    ("system","{hints}"),
+    ("human","{input}"),
+    MessagesPlaceholder(variable_name="agent_scratchpad")
 ])
 
 
 # ---------------------------------------------------------
 # AzureOpenAI LLm
 # ---------------------------------------------------------
-logger.info("Initializing Azure OpenAI LLM")
-llm = AzureChatOpenAI(
-    openai_api_version = config.AZURE_API_VERSION,
-    azure_deployment = config.AZURE_DEPLOYMENT,
-    azure_endpoint = config.AZURE_OPENAI_ENDPOINT,
-    api_key = config.AZURE_OPENAI_API_KEY,
+logger.info("Initializing Azure OpenAI LLM pool")
+llm_pool = LLMPool.from_config(
+    config.AZURE_DEPLOYMENTS,
+    api_version = config.AZURE_API_VERSION,
+    max_retries = config.LLM_MAX_RETRIES,
+    queue_timeout = config.LLM_QUEUE_TIMEOUT,
     temperature = 0.8
 )
-logger.info("LLM initialized successfully")
+llm = PooledChatModel(pool = llm_pool)
+logger.info(f"LLM pool initialized with {len(llm_pool.deployments)} deployment(s)")
 
 
 # ---------------------------------------------------------
@@ -170,42 +202,111 @@ tools = [
 ]
 logger.info(f"Loaded {len(tools)} tools")
 
-# ---------------------------------------------------------
-# Memory
-# ---------------------------------------------------------
-logger.info("Initializing conversation memory")
-memory = ConversationBufferMemory(
-    memory_key="chat_history",
-    return_messages=True
-)
-logger.info("Memory initialized")
-
 # ---------------------------------------------------------
 # Agent
 # ---------------------------------------------------------
 logger.info("Initializing LangChain agent")
-agent = initialize_agent(
-    tools = tools,
-    llm = llm,
-    agent = AgentType.CHAT_CONVERSATIONAL_REACT_DESCRIPTION,
-    verbose = True,
-    memory = memory,
-    handle_parsing_errors = True
-)
+# OpenAI tools agent: tool arguments arrive as structured JSON from the
+# model, so multi-field tools (meeting drafts) need no string round-trip.
+# Several tool calls in one step run concurrently (see tool_executor.py).
+# Each request gets its own executor bound to its session's memory and
+# drafts (sessions.py); only the immutable parts are shared.
+agent_factory = AgentFactory(llm, tools, prompt, callbacks=[AgentTraceHandler()])
 logger.info("Agent initialized successfully")
 
 # ---------------------------------------------------------
 # Endpoint
 # ---------------------------------------------------------
-@app.post("/chat")
-async def chat(req: ChatRequest):
+def format_hints(hints) -> str:
+    today = datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).strftime("%Y-%m-%d (%A)")
+    if not hints:
+        return f"Today is {today}."
+    return (
+        f"Today is {today}. Meeting details parsed from the user's message: "
+        f"{hints.describe()}. Use these values for the meeting draft."
+    )
+
+
+def run_agent(message: str, session_id: str, priority: bool) -> str:
+    # runs in a worker thread; tag the LLM calls and tool calls made by this run
+    current_session.set(session_id)
+    current_priority.set(priority)
+    hints = meeting_hints_for(message)
+    current_hints.set(hints)
+    # shutdown waits for tracked runs; the session isn't compressed while in use
+    with runs.track(), sessions.in_use(session_id) as memory:
+        executor = agent_factory.executor(memory)
+        result = executor.invoke({"input": message, "hints": format_hints(hints)})
+    return result["output"]
 
-    logger.info(f"Received chat request: {req.message}")
 
-    logger.info("Initializing agent run...")
-    response = agent.run(req.message)
-
-    logger.info("Agent run completed successfully")
-    logger.info(f"Response: {response}")
+@app.post("/chat")
+async def chat(req: ChatRequest):
 
-    return {"reply": response}
\ No newline at end of file
+    log_event(logger, "chat.request", session_id=req.session_id,
+              text=req.message, chars=len(req.message))
+
+    started = time.perf_counter()
+    try:
+        # a double-submitted message joins the run already in progress
+        response = await admission.run(
+            req.session_id,
+            req.message,
+            lambda: run_in_threadpool(run_agent, req.message, req.session_id, is_priority_turn(req.message)),
+        )
+    except Overloaded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ShuttingDown as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except QueueTimeout as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    log_event(logger, "chat.response", session_id=req.session_id, reply=response, ms=elapsed_ms)
+    # record() can wait on a full buffer and write the spill file; keep that off the event loop
+    await run_in_threadpool(audit.record, "chat", req.session_id, message=req.message, reply=response, ms=elapsed_ms)
+
+    return {"reply": response}
+
+
+@app.get("/health/live")
+def health_live():
+    return {"status": "ok"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """503 until warm-up has run and again once shutdown starts draining, so load balancers move traffic."""
+    status = lifecycle.stats()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics/llm")
+def llm_metrics():
+    return llm_pool.stats()
+
+
+@app.get("/metrics/admission")
+def admission_metrics():
+    return admission.stats()
+
+
+@app.get("/metrics/sessions")
+def session_metrics():
+    return sessions.stats()
+
+
+@app.get("/metrics/tools")
+def tool_metrics():
+    return {
+        "breakers": breaker_stats(),
+        "email_outbox": len(tool_module.email_outbox),
+        "email_dead_letters": tool_module.dead_letters,
+        "admin_digest": tool_module.admin_digest.stats(),
+        "idempotency": side_effects.stats(),
+        "audit": audit.stats(),
+        "search_cache": {
+            "size": len(tool_module.search_cache),
+            "fallback_hits": tool_module.search_cache.hits,
+        },
+    }
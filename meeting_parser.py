@@ -0,0 +1,233 @@
+import re
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import dateparser
+
+from logging_setup import log_event
+from meeting_schema import DEFAULT_TIMEZONE, TIMEZONE_ALIASES, normalize_time, normalize_timezone
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------
+# Precompiled patterns
+# ---------------------------------------------------------
+MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+    r"sept?(?:ember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+)
+WEEKDAY = r"(?:mon|tues|tue|wednes|wed|thurs|thu|fri|satur|sat|sun)(?:day)?"
+FULL_WEEKDAY = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+MEETING_PATTERN = re.compile(
+    r"\b(meeting|meet|call|schedule|book|calendar|appointment|sync|discussion|invite)\b",
+    re.IGNORECASE,
+)
+
+# relative phrases the LLM can't resolve on its own (it has no clock).
+# A bare abbreviation is only a weekday after on/this/next/coming, so
+# "I sat down" or "wed to the idea" don't turn into dates.
+RELATIVE_DATE_PATTERN = re.compile(
+    rf"\b(today|tonight|day after tomorrow|tomorrow|in \d{{1,3}} days?|"
+    rf"(?:on |this |next |coming ){WEEKDAY}|{FULL_WEEKDAY})\b",
+    re.IGNORECASE,
+)
+
+ABSOLUTE_DATE_PATTERN = re.compile(
+    rf"\b(\d{{4}}-\d{{2}}-\d{{2}}|\d{{1,2}}[/-]\d{{1,2}}[/-]\d{{2,4}}|"
+    rf"\d{{1,2}}(?:st|nd|rd|th)? {MONTH}(?:,? \d{{4}})?|"
+    rf"{MONTH} \d{{1,2}}(?:st|nd|rd|th)?(?:,? \d{{4}})?)\b",
+    re.IGNORECASE,
+)
+
+TIME_RANGE_PATTERN = re.compile(
+    r"\b(?:from )?(\d{1,2}(?::\d{2})?) ?([ap]\.?m\.?)? ?(?:-|–|to|till|until) ?"
+    r"(\d{1,2}(?::\d{2})?) ?([ap]\.?m\.?)?(?!\w)",
+    re.IGNORECASE,
+)
+
+TIME_PATTERN = re.compile(
+    r"\b(\d{1,2}(?::\d{2})? ?[ap]\.?m\.?|(?:[01]?\d|2[0-3]):[0-5]\d)(?!\w)",
+    re.IGNORECASE,
+)
+
+DURATION_PATTERN = re.compile(
+    r"\bfor (?:(half an hour)|(an|one|\d{1,3}(?:\.\d{1,2})?) ?(hours?|hrs?|minutes?|mins?))\b",
+    re.IGNORECASE,
+)
+
+# Upper-case abbreviations only ("ET" not "et") plus IANA names like Europe/Berlin
+TIMEZONE_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted((k.upper() for k in TIMEZONE_ALIASES if len(k) > 1), key=len, reverse=True))
+    + r"|[A-Z][a-z]+/[A-Z][A-Za-z_]+)\b"
+)
+
+IN_DAYS_PATTERN = re.compile(r"in (\d{1,3}) days?")
+WHITESPACE = re.compile(r"\s+")
+
+
+# ---------------------------------------------------------
+# Hints
+# ---------------------------------------------------------
+@dataclass
+class MeetingHints:
+    """Meeting fields parsed locally from the user's text."""
+
+    date: Optional[str] = None
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    timezone: Optional[str] = None
+    date_phrase: Optional[str] = None
+    relative_date: bool = False
+
+    def fields(self) -> dict:
+        values = {
+            "date": self.date,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_minutes": self.duration_minutes,
+            "timezone": self.timezone,
+        }
+        return {k: v for k, v in values.items() if v is not None}
+
+    def __bool__(self):
+        return bool(self.fields())
+
+    def describe(self) -> str:
+        """One-line summary injected into the agent prompt."""
+        parts = [f"{k}={v}" for k, v in self.fields().items()]
+        if self.date_phrase:
+            parts.append(f'(date from "{self.date_phrase}")')
+        return ", ".join(parts)
+
+
+# ---------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------
+def _resolve_relative(phrase: str, base: datetime) -> Optional[datetime]:
+    if phrase in ("today", "tonight"):
+        return base
+    if phrase == "tomorrow":
+        return base + timedelta(days=1)
+    if phrase == "day after tomorrow":
+        return base + timedelta(days=2)
+    match = IN_DAYS_PATTERN.fullmatch(phrase)
+    if match:
+        return base + timedelta(days=int(match.group(1)))
+
+    words = phrase.split()
+    weekday = WEEKDAYS.index(words[-1][:3])
+    days_ahead = (weekday - base.weekday()) % 7
+    if days_ahead == 0 and words[0] == "next":
+        days_ahead = 7
+    return base + timedelta(days=days_ahead)
+
+
+@lru_cache(maxsize=2048)
+def parse_date_phrase(phrase: str, base_date: str, relative: bool = False) -> Optional[str]:
+    """Resolve a date phrase against base_date (YYYY-MM-DD). Memoized per day."""
+    base = datetime.strptime(base_date, "%Y-%m-%d")
+    if relative:
+        return _resolve_relative(phrase, base).strftime("%Y-%m-%d")
+
+    parsed = dateparser.parse(
+        phrase,
+        languages=["en"],
+        settings={
+            "PREFER_DATES_FROM": "future",
+            "RELATIVE_BASE": base,
+            "DATE_ORDER": "DMY",
+        },
+    )
+    return parsed.strftime("%Y-%m-%d") if parsed else None
+
+
+def _safe_time(value: str) -> Optional[str]:
+    try:
+        return normalize_time(value)
+    except ValueError:
+        return None
+
+
+def _parse_range(match) -> tuple:
+    start, start_ampm, end, end_ampm = match.groups()
+    if not start_ampm and not end_ampm and ":" not in start + end:
+        return None, None  # "2-3" could be anything
+    if end_ampm and not start_ampm:
+        # "4-5pm" -> both pm; "11-1pm" -> 11am
+        start_hour = int(start.split(":")[0])
+        end_hour = int(end.split(":")[0])
+        start_ampm = end_ampm
+        if start_hour > end_hour and start_hour != 12:
+            start_ampm = "am"
+    start_time = _safe_time(f"{start} {start_ampm or ''}")
+    end_time = _safe_time(f"{end} {end_ampm or ''}")
+    return start_time, end_time
+
+
+def _parse_duration(match) -> Optional[int]:
+    half_hour, amount, unit = match.groups()
+    if half_hour:
+        return 30
+    amount = 1.0 if amount.lower() in ("an", "one") else float(amount)
+    minutes = amount * 60 if unit.lower().startswith("h") else amount
+    return int(round(minutes)) or None
+
+
+def extract_meeting_hints(text: str, now: Optional[datetime] = None) -> MeetingHints:
+    """Pull candidate date, times, duration and timezone out of free text."""
+    text = WHITESPACE.sub(" ", text[:2000])
+    hints = MeetingHints()
+
+    match = TIMEZONE_PATTERN.search(text)
+    if match:
+        try:
+            hints.timezone = normalize_timezone(match.group(1))
+        except ValueError:
+            pass
+
+    # "tomorrow" means tomorrow where the meeting is, not where the server is
+    now = now or datetime.now(ZoneInfo(hints.timezone or DEFAULT_TIMEZONE))
+    base_date = now.strftime("%Y-%m-%d")
+
+    # an explicit date wins over a relative phrase elsewhere in the text
+    # ("on 25 December, I am busy today"), unless dateparser rejects it
+    for pattern in (ABSOLUTE_DATE_PATTERN, RELATIVE_DATE_PATTERN):
+        match = pattern.search(text)
+        if not match:
+            continue
+        relative = pattern is RELATIVE_DATE_PATTERN
+        date = parse_date_phrase(match.group(1).lower(), base_date, relative)
+        if date:
+            hints.date, hints.date_phrase, hints.relative_date = date, match.group(1), relative
+            break
+
+    range_match = TIME_RANGE_PATTERN.search(text)
+    if range_match:
+        hints.start_time, hints.end_time = _parse_range(range_match)
+    if not hints.start_time:
+        match = TIME_PATTERN.search(text)
+        if match:
+            hints.start_time = _safe_time(match.group(1))
+
+    match = DURATION_PATTERN.search(text)
+    if match and not hints.end_time:
+        hints.duration_minutes = _parse_duration(match)
+
+    return hints
+
+
+def meeting_hints_for(text: str, now: Optional[datetime] = None) -> Optional[MeetingHints]:
+    """Hints for meeting-related messages only; None otherwise."""
+    if not MEETING_PATTERN.search(text):
+        return None
+    hints = extract_meeting_hints(text, now)
+    if hints:
+        log_event(logger, "meeting.hints", hints=hints.describe())
+    return hints or None
@@ -0,0 +1,183 @@
+import re
+import logging
+import contextvars
+from datetime import datetime, timedelta
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from langchain_core.pydantic_v1 import BaseModel, Field, root_validator, validator
+
+logger = logging.getLogger(__name__)
+
+# MeetingHints parsed locally from the current user message (see meeting_parser).
+# Set per agent run; used to pre-fill and check the draft the LLM sends.
+current_hints = contextvars.ContextVar("current_hints", default=None)
+
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+DEFAULT_DURATION_MINUTES = 60
+
+# Abbreviations people (and the LLM) actually type -> IANA names Calendar accepts
+TIMEZONE_ALIASES = {
+    "ist": "Asia/Kolkata",
+    "india": "Asia/Kolkata",
+    "utc": "UTC",
+    "gmt": "UTC",
+    "z": "UTC",
+    "bst": "Europe/London",
+    "cet": "Europe/Paris",
+    "cest": "Europe/Paris",
+    "eet": "Europe/Athens",
+    "gst": "Asia/Dubai",
+    "pkt": "Asia/Karachi",
+    "sgt": "Asia/Singapore",
+    "hkt": "Asia/Hong_Kong",
+    "jst": "Asia/Tokyo",
+    "kst": "Asia/Seoul",
+    "aest": "Australia/Sydney",
+    "aedt": "Australia/Sydney",
+    "est": "America/New_York",
+    "edt": "America/New_York",
+    "et": "America/New_York",
+    "cst": "America/Chicago",
+    "cdt": "America/Chicago",
+    "ct": "America/Chicago",
+    "mst": "America/Denver",
+    "mdt": "America/Denver",
+    "mt": "America/Denver",
+    "pst": "America/Los_Angeles",
+    "pdt": "America/Los_Angeles",
+    "pt": "America/Los_Angeles",
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y")
+
+TIME_PATTERN = re.compile(
+    r"^\s*(?P<hour>\d{1,2})(?:[:.]?(?P<minute>\d{2}))?\s*(?P<ampm>[ap]\.?m\.?)?\s*$",
+    re.IGNORECASE,
+)
+
+
+# ---------- NORMALIZERS ----------
+def normalize_timezone(value: Optional[str]) -> str:
+    if not value or not value.strip():
+        return DEFAULT_TIMEZONE
+    value = value.strip()
+    name = TIMEZONE_ALIASES.get(value.lower(), value)
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone '{value}'. Use an IANA name like Asia/Kolkata.")
+    return name
+
+
+def normalize_date(value: str) -> str:
+    value = value.strip().replace(",", "")
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date '{value}'. Must be YYYY-MM-DD.")
+
+
+def normalize_time(value: str) -> str:
+    match = TIME_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid time '{value}'. Must be HH:MM (24hr format).")
+
+    hour = int(match.group("hour"))
+    minute = int(match.group("minute") or 0)
+    ampm = (match.group("ampm") or "").lower().replace(".", "")
+
+    if ampm:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid time '{value}'.")
+        hour = hour % 12 + (12 if ampm == "pm" else 0)
+
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Invalid time '{value}'.")
+    return f"{hour:02d}:{minute:02d}"
+
+
+# ---------- SCHEMA ----------
+class MeetingDraft(BaseModel):
+    """Meeting draft passed to save_meeting_details as structured arguments."""
+
+    topic: str = Field("Meeting", description="Meeting title")
+    date: Optional[str] = Field(
+        None, description="Meeting date, YYYY-MM-DD. May be omitted if the prompt lists parsed meeting hints."
+    )
+    start_time: Optional[str] = Field(
+        None, description="Start time, 24-hour HH:MM. May be omitted if the prompt lists parsed meeting hints."
+    )
+    end_time: Optional[str] = Field(
+        None, description="End time, 24-hour HH:MM. Omit to use duration_minutes."
+    )
+    duration_minutes: Optional[int] = Field(
+        None, description="Length in minutes, used when end_time is not given (default 60)"
+    )
+    timezone: str = Field(
+        DEFAULT_TIMEZONE,
+        description="Timezone, default IST (Asia/Kolkata) unless the user says otherwise",
+    )
+    attendees: List[str] = Field(default_factory=list, description="Attendee email addresses")
+
+    @root_validator(pre=True)
+    def _fill_from_hints(cls, values):
+        hints = current_hints.get()
+        if not hints:
+            return values
+        values = dict(values)
+        # hints only fill what the model left empty; they never replace a
+        # value it passed (the prompt already tells it today's date)
+        for key, value in hints.fields().items():
+            if values.get(key) in (None, ""):
+                values[key] = value
+        return values
+
+    @validator("topic", pre=True, always=True)
+    def _topic(cls, v):
+        return (v or "").strip() or "Meeting"
+
+    @validator("date", pre=True)
+    def _date(cls, v):
+        return None if v in (None, "") else normalize_date(str(v))
+
+    @validator("start_time", "end_time", pre=True)
+    def _time(cls, v):
+        return None if v in (None, "") else normalize_time(str(v))
+
+    @validator("timezone", pre=True, always=True)
+    def _timezone(cls, v):
+        return normalize_timezone(v)
+
+    @validator("attendees", pre=True, always=True)
+    def _attendees(cls, v):
+        if not v:
+            return []
+        if isinstance(v, str):
+            v = re.split(r"[,;\s]+", v)
+        seen = []
+        for email in (e.strip().lower() for e in v):
+            if email and email not in seen:
+                seen.append(email)
+        return seen
+
+    @root_validator(skip_on_failure=True)
+    def _end_time(cls, values):
+        if not values.get("date"):
+            raise ValueError("date is required (YYYY-MM-DD).")
+        if not values.get("start_time"):
+            raise ValueError("start_time is required (HH:MM).")
+        start = datetime.strptime(values["start_time"], "%H:%M")
+        if values.get("end_time"):
+            end = datetime.strptime(values["end_time"], "%H:%M")
+        else:
+            minutes = values.get("duration_minutes") or DEFAULT_DURATION_MINUTES
+            end = start + timedelta(minutes=minutes)
+            if end.date() != start.date():
+                raise ValueError("Meeting must end on the same day it starts.")
+            values["end_time"] = end.strftime("%H:%M")
+        if end <= start:
+            raise ValueError("end_time must be after start_time.")
+        return values
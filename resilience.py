@@ -0,0 +1,147 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import config
+from logging_setup import log_event
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+
+# ---------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------
+class CircuitBreaker:
+    """
+    closed    -> calls go through; `failure_threshold` consecutive failures trip it
+    open      -> calls fail fast with CircuitOpenError for `reset_timeout` seconds
+    half_open -> one trial call; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN:
+                if self._trial_running:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} is recovering (circuit half-open)")
+                self._trial_running = True
+
+    def _on_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def _on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.trips += 1
+                    log_event(logger, "breaker.open", level=logging.WARNING, sample=False,
+                              breaker=self.name, failures=self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def call(self, fn: Callable, *args, **kwargs):
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+
+    @property
+    def available(self) -> bool:
+        with self._lock:
+            return self.state != OPEN or time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=config.BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=config.BREAKER_RESET_SECONDS,
+            )
+        return _breakers[name]
+
+
+def breaker_stats() -> dict:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.name: b.stats() for b in breakers}
+
+
+# ---------------------------------------------------------
+# Last-good-result cache (fallback for read-only tools)
+# ---------------------------------------------------------
+class FallbackCache:
+    """Bounded LRU of the last successful result per key."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def __len__(self):
+        return len(self._items)
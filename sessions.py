@@ -0,0 +1,299 @@
+import os
+import sys
+import gzip
+import json
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from langchain_core.memory import BaseMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+import config
+from llm_scheduler import current_session
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------------------------------------
+# Drafts
+# ---------------------------------------------------------
+@dataclass(slots=True)
+class EmailDraft:
+    to_emails: Tuple[str, ...]
+    subject: str
+    body_html: str
+
+
+@dataclass(slots=True)
+class MeetingDetails:
+    topic: str
+    date: str
+    start_time: str
+    end_time: str
+    timezone: str
+    attendees: Tuple[str, ...] = ()
+
+    def as_dict(self) -> dict:
+        draft = asdict(self)
+        draft["attendees"] = list(self.attendees)
+        return draft
+
+
+def intern(value: Optional[str]) -> Optional[str]:
+    """Share one copy of values many sessions repeat (timezones, subjects)."""
+    return sys.intern(value) if value is not None else None
+
+
+# ---------------------------------------------------------
+# Session state
+# ---------------------------------------------------------
+class SessionState:
+    """
+    Everything one chat session owns. The history is a flat list of texts,
+    human and AI turns alternating, so no message objects or role strings
+    are kept per message; LangChain messages are built only while the
+    session's agent runs. Idle sessions keep their history zlib-compressed.
+    """
+
+    __slots__ = ("_history", "email_draft", "meeting_draft", "last_used", "users")
+
+    def __init__(self):
+        self._history: Union[List[str], bytes] = []
+        self.email_draft: Optional[EmailDraft] = None
+        self.meeting_draft: Optional[MeetingDetails] = None
+        self.last_used = time.monotonic()
+        self.users = 0   # agent runs holding this session (see SessionStore.in_use)
+
+    @property
+    def history(self) -> List[str]:
+        if isinstance(self._history, bytes):
+            self.thaw()
+        return self._history
+
+    @property
+    def compressed(self) -> bool:
+        return isinstance(self._history, bytes)
+
+    def messages(self) -> List[BaseMessage]:
+        history = self.history
+        return [
+            HumanMessage(content=text) if index % 2 == 0 else AIMessage(content=text)
+            for index, text in enumerate(history)
+        ]
+
+    def add_turn(self, human: str, ai: str):
+        self.history.extend((human, ai))
+
+    def clear_history(self):
+        self._history = []
+
+    def compress(self) -> bool:
+        """zlib the history if that makes it smaller. Returns True if compressed."""
+        if self.compressed or not self._history:
+            return False
+        packed = zlib.compress(json.dumps(self._history, ensure_ascii=False).encode())
+        if len(packed) >= sum(len(text) for text in self._history):
+            return False
+        self._history = packed
+        return True
+
+    def thaw(self):
+        if self.compressed:
+            self._history = json.loads(zlib.decompress(self._history))
+
+    def snapshot(self) -> list:
+        history = json.loads(zlib.decompress(self._history)) if self.compressed else self._history
+        return [
+            history,
+            asdict(self.email_draft) if self.email_draft else None,
+            asdict(self.meeting_draft) if self.meeting_draft else None,
+        ]
+
+    @classmethod
+    def restore(cls, history: List[str], email: Optional[dict], meeting: Optional[dict]) -> "SessionState":
+        state = cls()
+        state._history = history
+        if email:
+            state.email_draft = EmailDraft(tuple(email["to_emails"]), intern(email["subject"]), email["body_html"])
+        if meeting:
+            state.meeting_draft = MeetingDetails(**{
+                **meeting, "timezone": intern(meeting["timezone"]), "attendees": tuple(meeting["attendees"]),
+            })
+        return state
+
+
+class SessionMemory(BaseMemory):
+    """LangChain memory over a SessionState's history (what ConversationBufferMemory did)."""
+
+    state: Any
+    store: Any = None   # the SessionStore and key, so it can count a thaw
+    session_id: Optional[str] = None
+    memory_key: str = "chat_history"
+    input_key: str = "input"
+    output_key: str = "output"
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def _thaw(self):
+        if self.store is not None and self.state.compressed:
+            self.store.thaw(self.session_id, self.state)
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        self._thaw()
+        return {self.memory_key: self.state.messages()}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        self._thaw()
+        self.state.add_turn(inputs[self.input_key], outputs[self.output_key])
+
+    def clear(self) -> None:
+        self.state.clear_history()
+
+
+# ---------------------------------------------------------
+# Session store
+# ---------------------------------------------------------
+class SessionStore:
+    """
+    session_id -> SessionState, created on first use. Least recently used
+    sessions are dropped beyond `maxsize`, and any session idle for
+    `idle_ttl` seconds is dropped on the next lookup. Histories of sessions
+    idle for `compress_after` seconds are compressed (0 = never), unless an
+    agent run still holds the session (in_use).
+    """
+
+    def __init__(self, maxsize: int, idle_ttl: float, compress_after: float = 0):
+        self.maxsize = maxsize
+        self.idle_ttl = idle_ttl
+        self.compress_after = compress_after
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.evicted = 0
+        self.compressed = 0   # sessions currently compressed
+        self.compressions = 0
+
+    def _evict(self, now):
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.maxsize and now - oldest.last_used < self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+            self.compressed -= oldest.compressed
+
+    def _sweep(self, now):
+        """Compress idle histories. Sessions are in LRU order, so stop at the first recent one."""
+        self._last_sweep = now
+        for state in self._sessions.values():
+            if now - state.last_used < self.compress_after:
+                break
+            if state.users:
+                continue   # a run holds the history; it writes back when done
+            if state.compress():
+                self.compressed += 1
+                self.compressions += 1
+
+    def get(self, session_id: str, use: bool = False) -> SessionState:
+        now = time.monotonic()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._sessions[session_id] = SessionState()
+                self.created += 1
+            else:
+                self._sessions.move_to_end(session_id)
+                self._thaw(state)
+            state.last_used = now
+            state.users += use
+            self._evict(now)
+            if self.compress_after and now - self._last_sweep >= max(1.0, self.compress_after / 4):
+                self._sweep(now)
+            return state
+
+    def _thaw(self, state: SessionState):
+        if state.compressed:
+            state.thaw()
+            self.compressed -= 1
+
+    def thaw(self, session_id: str, state: SessionState):
+        with self._lock:
+            if self._sessions.get(session_id) is state:
+                self._thaw(state)
+            else:
+                state.thaw()   # evicted; no longer counted
+
+    def memory(self, session_id: str) -> SessionMemory:
+        return SessionMemory(state=self.get(session_id), store=self, session_id=session_id)
+
+    @contextmanager
+    def in_use(self, session_id: str) -> Iterator[SessionMemory]:
+        """Memory for one agent run. The sweep leaves the session alone until the run ends."""
+        state = self.get(session_id, use=True)
+        try:
+            yield SessionMemory(state=state, store=self, session_id=session_id)
+        finally:
+            with self._lock:
+                state.users -= 1
+                state.last_used = time.monotonic()
+                if self._sessions.get(session_id) is state:
+                    self._sessions.move_to_end(session_id)
+
+    def save(self, path: str) -> int:
+        """Write every session to a gzipped JSON-lines file (replaced atomically)."""
+        with self._lock:
+            items = [(session_id, state.snapshot()) for session_id, state in self._sessions.items()]
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            for session_id, snapshot in items:
+                f.write(json.dumps([session_id, *snapshot], ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        return len(items)
+
+    def load(self, path: str) -> int:
+        """Restore sessions written by save(), oldest first; they count as just used."""
+        if not os.path.exists(path):
+            return 0
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        with self._lock:
+            for session_id, history, email, meeting in rows:
+                self._sessions[session_id] = SessionState.restore(history, email, meeting)
+                self._sessions.move_to_end(session_id)
+            self._evict(time.monotonic())
+        return len(rows)
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self._sessions),
+            "compressed": self.compressed,
+            "created": self.created,
+            "evicted": self.evicted,
+            "compressions": self.compressions,
+            "max": self.maxsize,
+            "idle_ttl_seconds": self.idle_ttl,
+        }
+
+
+sessions = SessionStore(
+    maxsize=config.SESSION_MAX,
+    idle_ttl=config.SESSION_IDLE_SECONDS,
+    compress_after=config.SESSION_COMPRESS_AFTER_SECONDS,
+)
+
+
+def current_state() -> SessionState:
+    """The SessionState of the agent run in progress (see current_session)."""
+    return sessions.get(current_session.get())
@@ -0,0 +1,22 @@
+"""The admin digest is the only admin email; it must come from the sender account."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admin_digest import AdminDigest  # noqa: E402
+
+
+def test_digest_is_sent_from_the_sender_address():
+    sent = []
+    digest = AdminDigest(send=sent.extend, sender="bot@example.com", recipient="admin@example.com",
+                         interval=3600, max_events=100)
+    digest.notify("email", ["a@example.com"], "Hello")
+    digest.notify("meeting", ["b@example.com"], "Sync")
+    digest.stop()
+
+    assert len(sent) == 1
+    to, msg = sent[0]
+    assert to == "admin@example.com"
+    assert msg["From"] == "bot@example.com"
+    assert msg["Subject"] == "Admin digest: 2 actions (email, meeting)"
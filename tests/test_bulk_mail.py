@@ -0,0 +1,148 @@
+"""Bulk campaign endpoints of automate-scripts/send_titan_mail.py against the local SMTP sink."""
+import email
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "automate-scripts"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_chat import serve  # noqa: E402
+from fakes import SMTPSink  # noqa: E402
+
+TEMPLATE = "<p>Hi {name},</p><p>Code: <b>{code}</b> for {email}</p><style>p { margin: 0 }</style>"
+
+
+@pytest.fixture(scope="module")
+def sink():
+    smtp = SMTPSink(keep=True).start()
+    os.environ.update({
+        "TITAN_SMTP_SERVER": "127.0.0.1",
+        "TITAN_SMTP_PORT": str(smtp.port),
+        "TITAN_SMTP_STARTTLS": "false",
+        "TITAN_SENDER_EMAIL": "campaigns@example.com",
+        "TITAN_APP_PASSWORD": "test",
+        "TITAN_POOL_SIZE": "2",
+        "TITAN_RATE_PER_MINUTE": "0",
+    })
+    yield smtp
+    smtp.shutdown()
+    smtp.server_close()
+
+
+class Client(requests.Session):
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+
+    def request(self, method, url, *args, **kwargs):
+        return super().request(method, self.base_url + url, *args, **kwargs)
+
+
+@pytest.fixture(scope="module")
+def server(sink):
+    import send_titan_mail
+
+    server = serve(send_titan_mail.app, 0)   # runs the lifespan, so the SMTP pool is open
+    yield Client(f"http://127.0.0.1:{server.servers[0].sockets[0].getsockname()[1]}")
+    server.should_exit = True
+
+
+@pytest.fixture
+def client(server, sink):
+    sink.received.clear()
+    return server
+
+
+def finish(client, job):
+    for _ in range(100):
+        snapshot = client.get(job["status_url"]).json()
+        if snapshot["status"] in ("done", "failed"):
+            return snapshot
+        time.sleep(0.05)
+    raise AssertionError(f"job still {snapshot['status']}")
+
+
+def delivered(sink):
+    """recipient -> (subject, html body) for every message the sink accepted."""
+    messages = {}
+    for recipients, raw in sink.received:
+        msg = email.message_from_bytes(raw)
+        html = next(part for part in msg.walk() if part.get_content_type() == "text/html")
+        messages[recipients[0]] = (msg["Subject"], html.get_payload(decode=True).decode())
+    return messages
+
+
+def test_json_job_renders_escapes_and_reports_each_recipient(client, sink):
+    job = client.post("/send-email/bulk", json={
+        "subject": "Hello {name}",
+        "body": TEMPLATE,
+        "recipients": [
+            {"email": "ada@example.com", "fields": {"name": "Ada <admin>", "code": "A&1"}},
+            {"email": "bob@example.com", "fields": {"name": "Bob", "code": "B2"}},
+            {"email": "broken@", "fields": {"name": "Broken"}},
+            {"email": "reject-me@example.com", "fields": {"name": "Rex", "code": "R3"}},
+        ],
+    })
+    assert job.status_code == 202
+    snapshot = finish(client, job.json())
+
+    assert (snapshot["status"], snapshot["total"], snapshot["sent"], snapshot["failed"]) == ("done", 4, 2, 2)
+    assert sorted((e["email"], e["error"]) for e in snapshot["errors"]) == [
+        ("broken@", "invalid address"),
+        ("reject-me@example.com", "recipient refused"),
+    ]
+
+    messages = delivered(sink)
+    assert sorted(messages) == ["ada@example.com", "bob@example.com"]
+    subject, body = messages["ada@example.com"]
+    assert subject == "Hello Ada <admin>"   # headers are not HTML
+    assert "Hi Ada &lt;admin&gt;," in body
+    assert "<b>A&amp;1</b> for ada@example.com" in body
+    assert "<style>p { margin: 0 }</style>" in body   # CSS braces are not placeholders
+    assert "Hi Bob," in messages["bob@example.com"][1]
+
+
+def test_csv_job(client, sink):
+    rows = (
+        "email,name,code\n"
+        "carol@example.com,Carol,<C1>\n"
+        "not-an-address,Nobody,X\n"
+        "reject-dan@example.com,Dan,D4\n"
+        "erin@example.com,Erin,E5\n"
+    )
+    job = client.post("/send-email/bulk/csv", data={"subject": "Code for {name}", "body": TEMPLATE},
+                      files={"file": ("list.csv", rows, "text/csv")})
+    assert job.status_code == 202
+    snapshot = finish(client, job.json())
+
+    assert (snapshot["status"], snapshot["total"], snapshot["sent"], snapshot["failed"]) == ("done", 4, 2, 2)
+    assert sorted((e["email"], e["error"]) for e in snapshot["errors"]) == [
+        ("not-an-address", "invalid address"),
+        ("reject-dan@example.com", "recipient refused"),
+    ]
+    messages = delivered(sink)
+    assert sorted(messages) == ["carol@example.com", "erin@example.com"]
+    assert messages["carol@example.com"][0] == "Code for Carol"
+    assert "<b>&lt;C1&gt;</b>" in messages["carol@example.com"][1]
+
+
+def test_plain_text_job_is_not_escaped(client, sink):
+    job = client.post("/send-email/bulk", json={
+        "subject": "Hi", "body": "Code {code}", "is_html": False,
+        "recipients": [{"email": "frank@example.com", "fields": {"code": "<F&6>"}}],
+    })
+    assert finish(client, job.json())["sent"] == 1
+    msg = email.message_from_bytes(sink.received[0][1])
+    text = next(part for part in msg.walk() if part.get_content_type() == "text/plain")
+    assert text.get_payload(decode=True).decode() == "Code <F&6>"
+
+
+def test_csv_without_email_column_is_rejected(client):
+    response = client.post("/send-email/bulk/csv", data={"subject": "x", "body": "y"},
+                           files={"file": ("list.csv", "name\nAda\n", "text/csv")})
+    assert response.status_code == 400
@@ -0,0 +1,111 @@
+"""LLMPool failover, cooldown, latency re-routing and tier choice against a local Azure stand-in."""
+import os
+import sys
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from fakes import FakeAzureOpenAI  # noqa: E402
+from llm_pool import ANSWER, ROUTER, LLMPool, PooledChatModel  # noqa: E402
+
+QUESTION = [HumanMessage(content="What is the capital of France?")]
+AFTER_TOOL = [
+    HumanMessage(content="search the weather"),
+    AIMessage(content="", additional_kwargs={"tool_calls": [{
+        "id": "call_0", "type": "function", "function": {"name": "web_search", "arguments": "{}"},
+    }]}),
+    ToolMessage(content="sunny", tool_call_id="call_0"),
+]
+
+
+@pytest.fixture
+def azure():
+    """start(deployments) -> (stand-in, PooledChatModel over one pool member per deployment)."""
+    servers = []
+
+    def start(deployments, cooldown=30.0):
+        stub = FakeAzureOpenAI({name: spec for name, spec in deployments.items()}).start()
+        servers.append(stub)
+        pool = LLMPool.from_config(
+            [
+                {"name": name, "deployment": name, "endpoint": stub.url, "api_key": "test",
+                 "rpm": 10000, "tpm": 10000000, "tiers": spec.get("tiers", [ROUTER, ANSWER])}
+                for name, spec in deployments.items()
+            ],
+            api_version="2024-02-01", max_retries=0, queue_timeout=5,
+        )
+        for deployment in pool.deployments:
+            deployment.cooldown = cooldown
+        return stub, PooledChatModel(pool=pool)
+
+    yield start
+    for stub in servers:
+        stub.shutdown()
+        stub.server_close()
+
+
+def calls(stub):
+    return {name: total for name, (total, _, _) in stub.counts().items()}
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_failing_deployment_fails_over_and_cools_down(azure, status):
+    stub, model = azure({"down": {"fail": status}, "up": {}})
+
+    assert model.invoke(QUESTION).content == "Paris is the capital of France."
+    assert stub.counts()["down"] == (1, 1, 0)
+    assert calls(stub)["up"] == 1
+
+    # cooling down: not tried again
+    model.invoke(QUESTION)
+    assert calls(stub) == {"down": 1, "up": 2}
+    assert not model.pool.stats()["down"]["healthy"]
+
+
+def test_deployment_is_tried_again_after_cooldown(azure):
+    stub, model = azure({"down": {"fail": 503}, "up": {"latency": 0.05}}, cooldown=0.2)
+    model.invoke(QUESTION)
+    stub.set("down", fail=None)
+
+    time.sleep(0.25)
+    model.invoke(QUESTION)
+    assert calls(stub)["down"] == 2
+    assert model.pool.stats()["down"]["healthy"]
+
+
+def test_traffic_follows_latency(azure):
+    stub, model = azure({"fast": {"latency": 0.01}, "slow": {"latency": 0.1}})
+    for _ in range(10):
+        model.invoke(QUESTION)
+    assert calls(stub) == {"fast": 9, "slow": 1}   # slow only once, to be measured
+
+    stub.set("fast", latency=0.3)
+    for _ in range(10):
+        model.invoke(QUESTION)
+    after = calls(stub)
+    assert after["slow"] - 1 >= 7, f"traffic did not move: {after}"
+
+
+def test_pick_tier():
+    model = PooledChatModel(pool=None)
+    assert model.pick_tier(QUESTION) == ROUTER
+    assert model.pick_tier(AFTER_TOOL) == ANSWER
+    assert model.pick_tier(AFTER_TOOL[:2]) == ROUTER
+
+
+def test_tool_result_goes_to_the_answer_tier(azure):
+    stub, model = azure({"mini": {"tiers": [ROUTER]}, "full": {"tiers": [ANSWER]}})
+    model.invoke(QUESTION)
+    model.invoke(AFTER_TOOL)
+    assert stub.counts() == {"mini": (1, 0, 0), "full": (1, 0, 1)}
+
+
+def test_answer_tier_down_falls_back_to_router_tier(azure):
+    stub, model = azure({"mini": {"tiers": [ROUTER]}, "full": {"tiers": [ANSWER], "fail": 503}})
+    model.invoke(AFTER_TOOL)
+    assert stub.counts() == {"mini": (1, 0, 1), "full": (1, 1, 1)}
@@ -0,0 +1,59 @@
+"""save_meeting_details must tell the agent why a draft was rejected, and the
+local date hints must not mistake ordinary words for months."""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_scheduler import current_session  # noqa: E402
+from meeting_parser import extract_meeting_hints  # noqa: E402
+from tools import save_meeting_tool  # noqa: E402
+
+DRAFT = {
+    "topic": "Roadmap review",
+    "date": "2026-11-02",
+    "start_time": "16:00",
+    "end_time": "17:00",
+    "timezone": "IST",
+}
+
+
+def test_end_before_start_is_explained():
+    result = save_meeting_tool.run({**DRAFT, "end_time": "15:00"})
+    assert "end_time must be after start_time" in result
+    assert "Tool input validation error" not in result
+
+
+def test_unknown_timezone_is_explained():
+    result = save_meeting_tool.run({**DRAFT, "timezone": "Mars/Olympus"})
+    assert "Unknown timezone" in result
+
+
+def test_valid_draft_is_saved():
+    token = current_session.set("test-meeting-tool")
+    try:
+        result = save_meeting_tool.run(DRAFT)
+    finally:
+        current_session.reset(token)
+    assert "Meeting Draft Created" in result
+    assert "16:00 → 17:00" in result
+
+
+NOW = datetime(2026, 10, 19, 9, 0)
+
+
+@pytest.mark.parametrize("text, date", [
+    ("schedule a meeting tomorrow at 4pm with 2 marketing leads", "2026-10-20"),
+    ("meeting tomorrow 3 maybe 4pm", "2026-10-20"),
+    ("let's decide on 1 separate call next friday", "2026-10-23"),
+    ("call with the mayor 2 mayors today", "2026-10-19"),
+    ("on 25 December, I am busy today", "2026-12-25"),
+    ("meet on Nov 20th at 3pm", "2026-11-20"),
+    ("book it for 3 sept", "2027-09-03"),
+    ("meet on 31 feb, or just tomorrow", "2026-10-20"),
+])
+def test_date_hint(text, date):
+    assert extract_meeting_hints(text, NOW).date == date
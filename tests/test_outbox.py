@@ -0,0 +1,79 @@
+"""The email outbox must never drop a message without a dead-letter record."""
+import json
+import os
+import sys
+import threading
+import time
+from email.mime.text import MIMEText
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import tools  # noqa: E402
+from resilience import get_breaker  # noqa: E402
+
+
+def message(to):
+    msg = MIMEText("hello")
+    msg["To"] = to
+    return to, msg
+
+
+@pytest.fixture
+def smtp_down(monkeypatch, tmp_path):
+    def refuse():
+        raise ConnectionRefusedError("mail server down")
+
+    dead_letter_file = tmp_path / "dead_letters.jsonl"
+    monkeypatch.setattr(tools, "smtp_connect", refuse)
+    monkeypatch.setattr(config, "EMAIL_OUTBOX_MAX", 2)
+    monkeypatch.setattr(config, "EMAIL_DEAD_LETTER_FILE", str(dead_letter_file))
+    yield dead_letter_file
+    tools.flush_outbox()   # stops the retry thread before the outbox is reset
+    tools.email_outbox.clear()
+    tools._outbox_stop.clear()
+    get_breaker("smtp")._on_success()
+
+
+def test_full_outbox_dead_letters_the_overflow(smtp_down):
+    with pytest.raises(tools.EmailRejected) as rejected:
+        tools.send_messages([message(f"user{i}@example.com") for i in range(3)])
+
+    assert rejected.value.queued
+    assert list(rejected.value.rejected) == ["user2@example.com"]
+    assert [to for to, _ in tools.email_outbox] == ["user0@example.com", "user1@example.com"]
+    records = [json.loads(line) for line in smtp_down.read_text().splitlines()]
+    assert [(r["to"], r["error"]) for r in records] == [("user2@example.com", "outbox full")]
+
+
+def test_failed_flush_keeps_the_queue_and_stops_the_retry_thread(smtp_down):
+    assert tools.send_messages([message("user0@example.com"), message("user1@example.com")]) is False
+    worker = tools._outbox_worker
+    assert worker.is_alive()
+
+    started = time.monotonic()
+    assert tools.flush_outbox() == 2
+    worker.join(timeout=5)
+    assert not worker.is_alive()
+    assert time.monotonic() - started < config.BREAKER_RESET_SECONDS
+    assert len(tools.email_outbox) == 2
+
+
+def test_flush_waits_for_the_batch_the_retry_thread_holds(smtp_down, monkeypatch):
+    release = threading.Event()
+    in_delivery = threading.Event()
+
+    def slow_refuse():
+        in_delivery.set()
+        release.wait(5)
+        raise ConnectionRefusedError("mail server down")
+
+    monkeypatch.setattr(config, "BREAKER_RESET_SECONDS", 0.01)
+    tools._queue([message("user0@example.com"), message("user1@example.com")])
+    monkeypatch.setattr(tools, "smtp_connect", slow_refuse)
+    assert in_delivery.wait(5)   # the retry thread has popped the batch
+
+    threading.Timer(0.2, release.set).start()
+    assert tools.flush_outbox() == 2
@@ -0,0 +1,90 @@
+"""A re-confirmed draft whose event already exists must not notify anyone again."""
+import os
+import sys
+import uuid
+
+import pytest
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tools  # noqa: E402
+from llm_scheduler import current_session  # noqa: E402
+from resilience import get_breaker  # noqa: E402
+from sessions import MeetingDetails, current_state  # noqa: E402
+
+
+class FakeEvents:
+    def __init__(self):
+        self.stored = {}
+
+    def insert(self, calendarId, body, fields):
+        def run():
+            if body["id"] in self.stored:
+                raise HttpError(Response({"status": 409}), b'{"error": {"code": 409}}')
+            self.stored[body["id"]] = {**body, "status": "confirmed", "htmlLink": f"https://cal/{body['id']}"}
+            return self.stored[body["id"]]
+        return run
+
+    def get(self, calendarId, eventId, fields):
+        return lambda: self.stored[eventId]
+
+
+class FakeService:
+    def __init__(self):
+        self.calendar = FakeEvents()
+
+    def events(self):
+        return self.calendar
+
+
+@pytest.fixture
+def booking(monkeypatch):
+    service = FakeService()
+    sent = []
+    monkeypatch.setattr(tools, "calendar_service", lambda: service)
+    monkeypatch.setattr(tools, "execute", lambda request: request())
+    monkeypatch.setattr(tools.token_store, "has", lambda account: True)
+    monkeypatch.setattr(tools, "send_meeting_confirmation", lambda **kw: sent.append(("mail", kw["to_email"])))
+    monkeypatch.setattr(tools.admin_digest, "notify", lambda *a, **kw: sent.append(("admin", a[2])))
+    monkeypatch.setattr(tools.audit, "record", lambda *a, **kw: sent.append(("audit", a[0])))
+
+    token = current_session.set(f"test-schedule-{uuid.uuid4().hex}")
+    current_state().meeting_draft = MeetingDetails(
+        topic="Roadmap review", date="2026-11-02", start_time="16:00", end_time="17:00",
+        timezone="Asia/Kolkata", attendees=("a@example.com", "b@example.com"),
+    )
+    yield service, sent
+    current_session.reset(token)
+
+
+def confirm_after_restart():
+    # a new process has an empty idempotency cache
+    tools.side_effects._entries.clear()
+    return tools.schedule_meeting("")
+
+
+def test_reconfirm_does_not_notify_again(booking, monkeypatch):
+    service, sent = booking
+    assert "Meeting Scheduled" in tools.schedule_meeting("")
+    assert sorted(kind for kind, _ in sent) == ["admin", "audit", "mail", "mail"]
+
+    breaker_failures = []
+    monkeypatch.setattr(get_breaker("calendar"), "_on_failure", lambda: breaker_failures.append(1))
+    result = confirm_after_restart()
+    assert "Already Scheduled" in result
+    assert len(sent) == 4
+    assert breaker_failures == []  # a duplicate is not a Calendar failure
+
+
+def test_reconfirm_of_cancelled_event_is_reported(booking):
+    service, sent = booking
+    tools.schedule_meeting("")
+    for event in service.calendar.stored.values():
+        event["status"] = "cancelled"
+
+    result = confirm_after_restart()
+    assert "Cancelled" in result
+    assert "Scheduled" not in result
+    assert len(sent) == 4
@@ -0,0 +1,41 @@
+"""Idle-session compression must not touch a session an agent run still holds."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sessions import SessionStore  # noqa: E402
+
+TURN = ({"input": "when is the roadmap review? " * 20}, {"output": "Monday at 4pm. " * 40})
+
+
+def idle_sweep(store):
+    store._sweep(time.monotonic() + 120)
+
+
+def test_session_in_use_is_not_compressed():
+    store = SessionStore(maxsize=10, idle_ttl=3600, compress_after=60)
+    with store.in_use("a") as memory:
+        memory.save_context(*TURN)
+        idle_sweep(store)
+        assert not memory.state.compressed
+        memory.save_context(*TURN)
+    assert store.stats()["compressed"] == 0
+
+    idle_sweep(store)
+    assert store.stats()["compressed"] == 1
+    assert len(store.get("a").history) == 4
+    assert store.stats()["compressed"] == 0
+
+
+def test_thaw_through_memory_is_counted():
+    store = SessionStore(maxsize=10, idle_ttl=3600, compress_after=60)
+    memory = store.memory("a")
+    memory.save_context(*TURN)
+    idle_sweep(store)
+    assert store.stats()["compressed"] == 1
+
+    memory.save_context(*TURN)
+    assert store.stats()["compressed"] == 0
+    assert len(memory.state.history) == 4
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import base64
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+
+import config
+from logging_setup import log_event
+
+logger = logging.getLogger(__name__)
+
+
+class NotAuthorizedError(Exception):
+    """No stored token for this account; the user has to go through OAuth first."""
+
+
+class StoredCredentials(Credentials):
+    """
+    Google user credentials whose refresh goes through the TokenStore, so
+    threads sharing them refresh once (under the account lock) and the new
+    token is persisted.
+    """
+
+    _store = None
+    _account = None
+
+    def refresh(self, request):
+        self._store.refresh(self._account, stale_token=self.token, request=request)
+
+    def _refresh_now(self, request):
+        super().refresh(request)
+
+
+# ---------------------------------------------------------
+# Encrypted SQLite backend
+# ---------------------------------------------------------
+class _EncryptedBackend:
+    """
+    account -> Fernet-encrypted authorized-user JSON in one SQLite table.
+    Every account has its own key (HKDF of the master key and the account
+    name), so a row copied onto another account doesn't decrypt.
+    """
+
+    def __init__(self, path: str, master_key: bytes):
+        self.path = path
+        self._master = master_key
+        self._lock = threading.Lock()
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "account TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _fernet(self, account: str) -> Fernet:
+        key = HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=f"token-store:{account}".encode()
+        ).derive(self._master)
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    def load(self, account: str) -> Optional[dict]:
+        with self._lock, self._connect() as db:
+            row = db.execute("SELECT data FROM tokens WHERE account = ?", (account,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(self._fernet(account).decrypt(row[0]))
+        except InvalidToken:
+            logger.error(f"Stored token for {account!r} can't be decrypted with the current TOKEN_STORE_KEY")
+            return None
+
+    def save(self, account: str, info: dict):
+        data = self._fernet(account).encrypt(json.dumps(info).encode())
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT INTO tokens (account, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(account) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (account, data, time.time()),
+            )
+
+    def delete(self, account: str):
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM tokens WHERE account = ?", (account,))
+
+    def accounts(self) -> List[str]:
+        with self._lock, self._connect() as db:
+            return [row[0] for row in db.execute("SELECT account FROM tokens ORDER BY account")]
+
+
+def _master_key(path: str) -> bytes:
+    """TOKEN_STORE_KEY if set, else a key file created next to the database (mode 600)."""
+    if config.TOKEN_STORE_KEY:
+        return base64.urlsafe_b64decode(config.TOKEN_STORE_KEY)
+
+    key_file = f"{path}.key"
+    if not os.path.exists(key_file):
+        fd = os.open(key_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(Fernet.generate_key())
+        logger.warning(f"TOKEN_STORE_KEY not set; generated {key_file}. Keep it out of version control.")
+    with open(key_file, "rb") as f:
+        return base64.urlsafe_b64decode(f.read().strip())
+
+
+# ---------------------------------------------------------
+# Token store
+# ---------------------------------------------------------
+class TokenStore:
+    """
+    In-memory cache of per-account credentials in front of the encrypted
+    backend. Each account has one shared credentials object; refreshes are
+    serialized per account, and a background thread refreshes tokens
+    `refresh_ahead` seconds before they expire so requests rarely wait on
+    the token endpoint.
+    """
+
+    def __init__(self, path: str, refresh_ahead: float, check_interval: float):
+        self.path = path
+        self.refresh_ahead = refresh_ahead
+        self.check_interval = check_interval
+        self._backend = None
+        self._cache: Dict[str, StoredCredentials] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    @property
+    def backend(self) -> _EncryptedBackend:
+        with self._lock:
+            if self._backend is None:
+                self._backend = _EncryptedBackend(self.path, _master_key(self.path))
+            return self._backend
+
+    def _lock_for(self, account: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(account, threading.Lock())
+
+    def _wrap(self, account: str, info: dict) -> StoredCredentials:
+        credentials = StoredCredentials.from_authorized_user_info(info)
+        credentials._store = self
+        credentials._account = account
+        return credentials
+
+    # ---------- read / write ----------
+    def get(self, account: str) -> StoredCredentials:
+        """Shared credentials for `account`; raises NotAuthorizedError if there are none."""
+        credentials = self._cache.get(account)
+        if credentials is not None:
+            return credentials
+
+        with self._lock_for(account):
+            credentials = self._cache.get(account)
+            if credentials is None:
+                info = self.backend.load(account) or self._import_legacy(account)
+                if info is None:
+                    raise NotAuthorizedError(f"No Google token stored for account {account!r}")
+                credentials = self._cache[account] = self._wrap(account, info)
+        self.start()
+        return credentials
+
+    def has(self, account: str) -> bool:
+        try:
+            self.get(account)
+            return True
+        except NotAuthorizedError:
+            return False
+
+    def save(self, account: str, credentials: Credentials):
+        """Store freshly authorized credentials (e.g. from an OAuth callback)."""
+        info = json.loads(credentials.to_json())
+        with self._lock_for(account):
+            self.backend.save(account, info)
+            self._cache[account] = self._wrap(account, info)
+        log_event(logger, "token.saved", sample=False, account=account)
+
+    def delete(self, account: str):
+        with self._lock_for(account):
+            self.backend.delete(account)
+            self._cache.pop(account, None)
+
+    def accounts(self) -> List[str]:
+        return self.backend.accounts()
+
+    def _import_legacy(self, account: str) -> Optional[dict]:
+        """One-time import of the plain token.json the scripts used to write."""
+        if account != config.GOOGLE_ACCOUNT or not os.path.exists(config.GOOGLE_TOKEN_FILE):
+            return None
+        with open(config.GOOGLE_TOKEN_FILE) as f:
+            info = json.load(f)
+        self.backend.save(account, info)
+        logger.warning(
+            f"Imported {config.GOOGLE_TOKEN_FILE} into the token store as {account!r}; "
+            f"the plain file can be deleted."
+        )
+        return info
+
+    # ---------- refresh ----------
+    def refresh(self, account: str, stale_token: Optional[str] = None, request=None):
+        """
+        Refresh `account` unless another thread already replaced `stale_token`
+        while this one waited for the lock. The new token is persisted.
+        """
+        credentials = self.get(account)
+        with self._lock_for(account):
+            if credentials.token != stale_token and credentials.valid:
+                return
+            try:
+                credentials._refresh_now(request or Request())
+            except Exception:
+                self.refresh_failures += 1
+                raise
+            self.refreshes += 1
+            self.backend.save(account, json.loads(credentials.to_json()))
+        log_event(logger, "token.refreshed", account=account, expiry=str(credentials.expiry))
+
+    def _expiring(self, credentials: Credentials) -> bool:
+        if not credentials.refresh_token:
+            return False
+        if credentials.expiry is None:
+            return not credentials.token
+        return (credentials.expiry - datetime.utcnow()).total_seconds() < self.refresh_ahead
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.check_interval):
+            for account, credentials in list(self._cache.items()):
+                if not self._expiring(credentials):
+                    continue
+                try:
+                    self.refresh(account, stale_token=credentials.token)
+                except Exception as e:
+                    log_event(logger, "token.refresh_failed", level=logging.WARNING, sample=False,
+                              account=account, error=repr(e))
+
+    def start(self):
+        """Start the background refresher (idempotent)."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._refresh_loop, name="token-refresh", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "accounts_cached": len(self._cache),
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+        }
+
+
+token_store = TokenStore(
+    path=config.TOKEN_STORE_PATH,
+    refresh_ahead=config.TOKEN_REFRESH_AHEAD_SECONDS,
+    check_interval=config.TOKEN_REFRESH_CHECK_SECONDS,
+)
@@ -0,0 +1,171 @@
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentStep
+
+import config
+from logging_setup import log_event
+
+logger = logging.getLogger(__name__)
+
+# Side-effecting tools must run after the step that saved their draft when
+# the model emits both in one turn.
+TOOL_DEPENDS_ON = {
+    "send_email": {"save_email_details"},
+    "schedule_meeting": {"save_meeting_details"},
+}
+
+# Tools whose effect can't be taken back: when one overruns its timeout it
+# is reported as still running, not as failed, so the agent doesn't retry it.
+SIDE_EFFECT_TOOLS = {"send_email", "schedule_meeting"}
+
+_pool = ThreadPoolExecutor(max_workers=config.TOOL_WORKERS, thread_name_prefix="tool")
+_limits = {}
+_limits_lock = threading.Lock()
+
+
+def _limit_for(tool_name: str) -> threading.BoundedSemaphore:
+    """Process-wide cap on concurrent calls of one tool (across all requests)."""
+    with _limits_lock:
+        if tool_name not in _limits:
+            size = config.TOOL_CONCURRENCY.get(tool_name, config.TOOL_CONCURRENCY_DEFAULT)
+            _limits[tool_name] = threading.BoundedSemaphore(size)
+        return _limits[tool_name]
+
+
+def tool_timeout(tool_name: str) -> float:
+    return config.TOOL_TIMEOUTS.get(tool_name, config.TOOL_TIMEOUT_DEFAULT)
+
+
+class _Deferred:
+    """A tool call the base executor asked for but that hasn't run yet."""
+
+    __slots__ = ("action", "run", "future", "started", "started_at", "cancelled", "lock")
+
+    def __init__(self, action, run):
+        self.action = action
+        self.run = run
+        self.future = None
+        self.started = threading.Event()   # set once the call leaves the queue
+        self.started_at = None
+        self.cancelled = False
+        self.lock = threading.Lock()
+
+    def start(self) -> bool:
+        """Mark the call as running unless it was cancelled while queued."""
+        with self.lock:
+            if self.cancelled:
+                return False
+            self.started_at = time.monotonic()
+            self.started.set()
+            return True
+
+    def cancel(self) -> bool:
+        """Drop the call if it hasn't started. False if it is already running."""
+        with self.lock:
+            if self.started.is_set():
+                return False
+            self.cancelled = True
+        self.future.cancel()
+        return True
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs the tool calls of one step concurrently.
+
+    LangChain executes the actions of a multi-tool-call step one after the
+    other. Here each action is deferred, then the whole batch is submitted
+    to a shared pool: independent calls overlap, a call waits only for the
+    earlier calls it depends on (TOOL_DEPENDS_ON), every tool has a process
+    wide concurrency cap and a timeout, and observations are returned in
+    the order the model asked for them.
+
+    A call's timeout starts when it starts running. A call still queued
+    after TOOL_QUEUE_TIMEOUT is cancelled and never runs; a side-effecting
+    call that overruns is reported as still running, since it may yet
+    complete.
+    """
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        parent = super()
+
+        def run():
+            return parent._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        return _Deferred(agent_action, run)
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        deferred = []
+        for item in super()._iter_next_step(
+            name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+        ):
+            if isinstance(item, _Deferred):
+                deferred.append(item)
+            else:
+                yield item
+
+        if deferred:
+            yield from self._run_batch(deferred)
+
+    # ---------- batch execution ----------
+    def _run_batch(self, batch):
+        if len(batch) > 1:
+            log_event(logger, "tools.batch", tools=[d.action.tool for d in batch])
+
+        for index, item in enumerate(batch):
+            depends_on = TOOL_DEPENDS_ON.get(item.action.tool, set())
+            before = [d for d in batch[:index] if d.action.tool in depends_on]
+            # copy the request's context (session, meeting hints) into the worker
+            context = contextvars.copy_context()
+            item.future = _pool.submit(context.run, self._run_one, item, before)
+
+        for item in batch:
+            yield self._result(item)
+
+    def _run_one(self, item, before):
+        if before:
+            wait([d.future for d in before])
+            if any(d.cancelled for d in before):
+                # its draft was never saved; don't act on a stale one
+                item.start()
+                return AgentStep(
+                    action=item.action,
+                    observation=f"{item.action.tool} was not run because the step it depends on did not run.",
+                )
+        with _limit_for(item.action.tool):
+            if not item.start():
+                return None   # cancelled while queued; nobody reads this
+            return item.run()
+
+    def _result(self, item):
+        tool = item.action.tool
+        if not item.started.wait(config.TOOL_QUEUE_TIMEOUT) and item.cancel():
+            log_event(logger, "tools.queue_timeout", level=logging.WARNING, sample=False,
+                      tool=tool, timeout=config.TOOL_QUEUE_TIMEOUT)
+            return AgentStep(
+                action=item.action,
+                observation=f"{tool} did not start within {config.TOOL_QUEUE_TIMEOUT:g}s and was not run. "
+                            f"Tell the user it could not be done right now; it is safe to try again.",
+            )
+
+        timeout = tool_timeout(tool)
+        try:
+            return item.future.result(timeout=max(0.0, item.started_at + timeout - time.monotonic()))
+        except FutureTimeout:
+            item.future.cancel()   # no-op once running; threads can't be interrupted
+            still_running = tool in SIDE_EFFECT_TOOLS
+            log_event(logger, "tools.timeout", level=logging.WARNING, sample=False,
+                      tool=tool, timeout=timeout, still_running=still_running)
+            if still_running:
+                observation = (
+                    f"{tool} is still running after {timeout:g}s, so its outcome is unknown. "
+                    f"Do not retry it. Tell the user it may still complete and to check before trying again."
+                )
+            else:
+                observation = f"{tool} timed out after {timeout:g}s. Tell the user it could not be completed right now."
+            return AgentStep(action=item.action, observation=observation)
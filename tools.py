@@ -1,39 +1,67 @@
 from langchain.tools import tool
-from langchain.tools import Tool
+from langchain.tools import Tool, StructuredTool
+from langchain_core.pydantic_v1 import ValidationError
 import requests
 import logging
 import smtplib
+import socket
+import json
+import threading
+from collections import deque
+from email import message_from_string
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+import config
 from config import sender_email, sender_password, admin_email
-from templates import USER_EMAIL_TEMPLATE, ADMIN_EMAIL_TEMPLATE
-import re
+from templates import USER_EMAIL_TEMPLATE
+from admin_digest import AdminDigest
+from meeting_schema import MeetingDraft
+from email_extract import extract_recipients, extract_message_body
+from logging_setup import log_event
+from resilience import CircuitOpenError, FallbackCache, get_breaker
+from idempotency import idempotency_key, side_effects
+from llm_scheduler import current_session
+from sessions import EmailDraft, MeetingDetails, current_state, intern
 import dateparser
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from token_store import token_store
+from audit_sink import audit
+from calendar_client import EVENT_FIELDS, calendar_service, execute, is_transient_calendar_error
 import os
-import json
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+search_cache = FallbackCache(maxsize=256)
+
+
+def _search(query: str) -> str:
+    res = requests.get(
+        config.DUCKDUCKGO_URL,
+        params={"q": query, "format": "json"},
+        timeout=config.WEB_SEARCH_TIMEOUT,
+    )
+    if res.status_code >= 500:
+        res.raise_for_status()
+    return res.text
+
+
 @tool
 def web_search(query: str) -> str:
     """General web search. 
     DO NOT use this tool for Malay or Malay Jain related questions 
     unless get_malay_info fails.
     """
-    logger.info(f"Performing web search for query: {query}")
+    key = query.strip().lower()
     try:
-        url = f"https://api.duckduckgo.com/?q={query}&format=json"
-        logger.info(f"Making request to URL: {url}")
-        res = requests.get(url, timeout=10)
-        logger.info(f"Received response with status code: {res.status_code}")
-        result = res.text
-        logger.info(f"Search completed successfully, result length: {len(result)}")
+        result = get_breaker("web_search").call(_search, query)
+        search_cache.put(key, result)
+        log_event(logger, "tool.web_search", query=query, chars=len(result))
         return result
     except Exception as e:
         logger.error(f"Web search failed: {str(e)}")
+        cached = search_cache.get(key)
+        if cached is not None:
+            return f"(Search is unavailable; showing an earlier result for this query)\n{cached}"
         return f"Search failed: {str(e)}"
 
 @tool
@@ -43,11 +71,10 @@ def get_malay_info(dummy: str) ->str:
     Do NOT use web_search for Malay Jain unless this tool returns nothing.
     The input is ignored.
     """
-    logger.info("Retrieving Malay information from malay.txt")
     try:
         with open("malay.txt", "r", encoding = "utf-8") as file:
             content = file.read()
-            logger.info(f"Successfully read malay.txt, content length: {len(content)}")
+            log_event(logger, "tool.get_malay_info", chars=len(content))
             return content
     except Exception as e:
         logger.error(f"Failed to read malay.txt: {str(e)}")
@@ -63,7 +90,7 @@ def get_user_email_id(query: str) -> str:
     Return ONLY the email address string, nothing else.
     """
 
-    logger.info(f"Resolving email from query: {query}")
+    log_event(logger, "tool.get_user_email_id", query=query)
 
     q = query.lower()
 
@@ -80,7 +107,240 @@ def get_user_email_id(query: str) -> str:
 # Email Tools
 # --------------------------------------
 
-email_store = {}
+
+
+def smtp_connect():
+    """Open an authenticated SMTP session to the configured server."""
+    server = smtplib.SMTP(config.SMTP_HOST, config.SMTP_PORT, timeout=config.SMTP_TIMEOUT)
+    if config.SMTP_STARTTLS:
+        server.starttls()
+    if sender_password:
+        server.login(sender_email, sender_password)
+    return server
+
+
+# --------------------------------------
+# Delivery with breaker + outbox
+# --------------------------------------
+
+# (to_address, message) pairs waiting for the mail server to come back.
+# EMAIL_OUTBOX_MAX is enforced in _queue(); no maxlen, so putting a failed
+# batch back can't silently push other messages out.
+email_outbox = deque()
+_outbox_lock = threading.Lock()
+_outbox_worker = None
+_outbox_stop = threading.Event()   # set by flush_outbox() at shutdown
+dead_letters = 0   # messages the server refused for good (see _dead_letter)
+
+
+class EmailRejected(Exception):
+    """
+    Some messages were dead-lettered: the mail server refused them for good,
+    or the outbox had no room left. The others were sent (or queued, if
+    `queued`), so the caller must not resend the batch.
+    """
+
+    def __init__(self, rejected: dict, queued: bool):
+        super().__init__("Not delivered: " + ", ".join(f"{to} ({reason})" for to, reason in rejected.items()))
+        self.rejected = rejected
+        self.queued = queued
+
+
+def is_transient_smtp_error(e: Exception) -> bool:
+    """Outages worth retrying later (not bad credentials / rejected recipients)."""
+    if isinstance(e, (CircuitOpenError, smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, socket.timeout)):
+        return True
+    if isinstance(e, smtplib.SMTPResponseException):
+        return 400 <= e.smtp_code < 500   # "try again later"
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in e.recipients.values())
+    return isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException)
+
+
+def is_permanent_smtp_error(e: Exception) -> bool:
+    """The server refused this one message with a 5xx; retrying it can't succeed."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in e.recipients.values())
+    return isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+
+
+def _smtp_reason(error: Exception) -> str:
+    """Why the server refused a message, e.g. "550 No such user"."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        error = smtplib.SMTPResponseException(*next(iter(error.recipients.values())))
+    message = error.smtp_error
+    return f"{error.smtp_code} {message.decode(errors='replace') if isinstance(message, bytes) else message}"
+
+
+def _dead_letter(to: str, msg, reason: str) -> str:
+    """Set a message aside (EMAIL_DEAD_LETTER_FILE) instead of sending or retrying it."""
+    global dead_letters
+    dead_letters += 1
+    log_event(logger, "email.dead_letter", level=logging.ERROR, sample=False, to=to, error=reason)
+    if config.EMAIL_DEAD_LETTER_FILE:
+        with open(config.EMAIL_DEAD_LETTER_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"to": to, "error": reason, "message": msg.as_string()}) + "\n")
+    return reason
+
+
+def deliver(messages: list, rejected: dict = None):
+    """
+    Send (to, msg) pairs over one session. Sent pairs are removed from the
+    list, and so are pairs the server refuses for good (5xx): those are
+    dead-lettered and added to `rejected` (to -> reason), so one bad
+    message can't block the ones behind it. Any other error stops delivery
+    with the failed pair still first in the list.
+    """
+    server = smtp_connect()
+    try:
+        while messages:
+            to, msg = messages[0]
+            try:
+                server.sendmail(sender_email, to, msg.as_string())
+            except Exception as e:
+                if not is_permanent_smtp_error(e):
+                    raise
+                reason = _dead_letter(to, msg, _smtp_reason(e))
+                if rejected is not None:
+                    rejected[to] = reason
+            messages.pop(0)
+    finally:
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+
+def _drain_outbox():
+    global _outbox_worker
+    breaker = get_breaker("smtp")
+    while True:
+        stopping = _outbox_stop.wait(config.BREAKER_RESET_SECONDS)
+        with _outbox_lock:
+            if stopping or not email_outbox:
+                _outbox_worker = None
+                return
+            pending = list(email_outbox)
+            email_outbox.clear()
+        try:
+            breaker.call(deliver, pending)
+            log_event(logger, "email.outbox_flushed", sample=False)
+        except Exception as e:
+            log_event(logger, "email.outbox_retry_failed", level=logging.WARNING, sample=False, error=str(e))
+        finally:
+            # deliver() removes what it sent or dead-lettered; put anything left back in front
+            with _outbox_lock:
+                email_outbox.extendleft(reversed(pending))
+
+
+def send_messages(messages: list) -> bool:
+    """
+    Deliver now, or queue for a background retry if the mail server is down.
+    Returns True if delivered, False if queued. Raises EmailRejected if the
+    server refused some recipients (or the outbox is full), after sending
+    or queueing the rest.
+    Other errors are raised only while nothing has been sent; after a
+    partial send the rest is queued, so a retry by the caller can't mail
+    the first recipients twice.
+    """
+    messages = list(messages)
+    total = len(messages)
+    rejected = {}
+    try:
+        get_breaker("smtp").call(deliver, messages, rejected)
+        delivered = True
+    except Exception as e:
+        if not is_transient_smtp_error(e) and len(messages) + len(rejected) == total:
+            raise
+        rejected.update(_queue(messages))
+        log_event(logger, "email.queued", level=logging.WARNING, sample=False,
+                  count=len(messages), error=str(e))
+        delivered = False
+    if rejected:
+        raise EmailRejected(rejected, queued=not delivered)
+    return delivered
+
+
+def _queue(messages: list) -> dict:
+    """
+    Queue messages for the background retry. Beyond EMAIL_OUTBOX_MAX they
+    are dead-lettered instead; returns those (to -> reason).
+    """
+    global _outbox_worker
+    with _outbox_lock:
+        room = max(0, config.EMAIL_OUTBOX_MAX - len(email_outbox))
+        email_outbox.extend(messages[:room])
+        overflow = messages[room:]
+        if email_outbox and _outbox_worker is None:
+            _outbox_worker = threading.Thread(target=_drain_outbox, daemon=True)
+            _outbox_worker.start()
+    return {to: _dead_letter(to, msg, "outbox full") for to, msg in overflow}
+
+
+def flush_outbox(timeout: float = None) -> int:
+    """
+    Stop the background retry and try to send everything queued right now
+    (shutdown). Returns how many are still queued.
+    """
+    _outbox_stop.set()
+    # the retry thread may hold a popped batch; let it put it back first
+    with _outbox_lock:
+        worker = _outbox_worker
+    if worker is not None:
+        worker.join(timeout)
+        if worker.is_alive():
+            log_event(logger, "email.outbox_worker_busy", level=logging.WARNING, sample=False)
+    with _outbox_lock:
+        pending = list(email_outbox)
+        email_outbox.clear()
+    try:
+        if pending:
+            get_breaker("smtp").call(deliver, pending)
+    except Exception as e:
+        log_event(logger, "email.outbox_flush_failed", level=logging.WARNING, sample=False, error=str(e))
+    finally:
+        with _outbox_lock:
+            email_outbox.extendleft(reversed(pending))
+            return len(email_outbox)
+
+
+def save_outbox(path: str) -> int:
+    """Move the queued emails to `path` so a restart sends them (and this process doesn't)."""
+    with _outbox_lock:
+        pending = list(email_outbox)
+        email_outbox.clear()
+    if not pending:
+        return 0
+    with open(path, "a", encoding="utf-8") as f:
+        for to, msg in pending:
+            f.write(json.dumps({"to": to, "message": msg.as_string()}) + "\n")
+    log_event(logger, "email.outbox_saved", level=logging.WARNING, sample=False, count=len(pending), path=path)
+    return len(pending)
+
+
+def load_outbox(path: str) -> int:
+    """Queue the emails an earlier process saved with save_outbox()."""
+    if not os.path.exists(path):
+        return 0
+    with open(path, encoding="utf-8") as f:
+        pending = [json.loads(line) for line in f if line.strip()]
+    os.remove(path)
+    if pending:
+        _queue([(item["to"], message_from_string(item["message"])) for item in pending])
+        log_event(logger, "email.outbox_loaded", sample=False, count=len(pending))
+    return len(pending)
+
+
+# one periodic admin email instead of an admin copy of every action
+admin_digest = AdminDigest(
+    send=send_messages,
+    sender=sender_email,
+    recipient=admin_email,
+    interval=config.ADMIN_DIGEST_SECONDS,
+    max_events=config.ADMIN_DIGEST_MAX_EVENTS,
+    immediate_kinds=config.ADMIN_IMMEDIATE_EVENTS,
+)
+
 
 @tool
 def save_email_details(text: str) -> str:
@@ -99,39 +359,35 @@ def save_email_details(text: str) -> str:
     - always send a complete message
     """
     
-    logger.info(f"Saving email details from: {text}")
+    log_event(logger, "tool.save_email_details", text=text, chars=len(text))
 
     # --- Extract ALL emails ---
-    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    recipients = extract_recipients(text)
+    emails = recipients.valid
 
     if not emails:
+        if recipients.invalid:
+            return f"Invalid email address: {', '.join(recipients.invalid)}"
         return "No valid email found in message."
 
     # --- Extract message content ---
-    msg_match = re.search(
-        r"'(.*?)'|\"(.*?)\"|saying\s(.+)|message\s*:\s*(.+)",
-        text,
-        re.IGNORECASE
-    )
-
-    if msg_match:
-        body = next(g for g in msg_match.groups() if g).strip()
-    else:
-        body = "Hello!"
+    body = extract_message_body(text) or "Hello!"
 
     subject = "New Message"
 
-    email_store["to_emails"] = emails
-    email_store["subject"] = subject
-    email_store["body_html"] = body
+    # kept on the current session (see sessions.py)
+    current_state().email_draft = EmailDraft(tuple(emails), intern(subject), body)
 
-    return f"Emails saved for: {', '.join(emails)}"
+    result = f"Emails saved for: {', '.join(emails)}"
+    if recipients.invalid:
+        result += f" (skipped invalid: {', '.join(recipients.invalid)})"
+    return result
 
 @tool
 def send_email(trigger: str) -> str:
     """
     Send the MOST RECENT saved email to the intended recipient.
-    ALSO send a notification email to the admin.
+    ALSO notify the admin.
 
     Use this tool ONLY AFTER save_email_details has run.
     
@@ -140,54 +396,68 @@ def send_email(trigger: str) -> str:
     Input is ignored (pass any string).
     """
 
-    try:
-        to_emails = email_store.get("to_emails")
-        subject = email_store.get("subject")
-        body_html = email_store.get("body_html")
+    draft = current_state().email_draft
 
-        if not to_emails:
-            return "No emails saved. Run save_email_details first."
+    if draft is None or not draft.to_emails:
+        return "No emails saved. Run save_email_details first."
 
-        user_html = USER_EMAIL_TEMPLATE.replace("{message}", body_html)
+    to_emails, subject, body_html = list(draft.to_emails), draft.subject, draft.body_html
 
-        admin_html = (
-            ADMIN_EMAIL_TEMPLATE
-                .replace("{to_email}", ", ".join(to_emails))
-                .replace("{subject}", subject)
-                .replace("{message}", body_html)
-        )
+    # A retried or repeated call for the same draft returns the first result
+    # instead of mailing everyone again.
+    key = idempotency_key(
+        current_session.get(),
+        "send_email",
+        {"to": to_emails, "subject": subject, "body": body_html},
+    )
 
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
+    try:
+        return side_effects.run_once(key, lambda: _send_email_draft(to_emails, subject, body_html))
 
-        # send to each user
-        for email in to_emails:
-            msg = MIMEMultipart()
-            msg["From"] = sender_email
-            msg["To"] = email
-            msg["Subject"] = subject
-            msg.attach(MIMEText(user_html, "html"))
+    except Exception as e:
+        logger.error(e)
+        admin_digest.notify("email_failed", to_emails, subject, details=str(e), status="failed")
+        return f"Failed to send email: {str(e)}"
 
-            server.sendmail(sender_email, email, msg.as_string())
 
-        # send admin
-        admin_msg = MIMEMultipart()
-        admin_msg["From"] = sender_email
-        admin_msg["To"] = admin_email
-        admin_msg["Subject"] = f"Email Sent To {', '.join(to_emails)}"
-        admin_msg.attach(MIMEText(admin_html, "html"))
+def _send_email_draft(to_emails, subject, body_html) -> str:
+    user_html = USER_EMAIL_TEMPLATE.replace("{message}", body_html)
 
-        server.sendmail(sender_email, admin_email, admin_msg.as_string())
+    messages = []
 
-        server.quit()
+    # send to each user
+    for email in to_emails:
+        msg = MIMEMultipart()
+        msg["From"] = sender_email
+        msg["To"] = email
+        msg["Subject"] = subject
+        msg.attach(MIMEText(user_html, "html"))
 
-        return f"Email sent to {', '.join(to_emails)} and admin notified."
+        messages.append((email, msg))
+
+    rejected = {}
+    try:
+        delivered = send_messages(messages)
+    except EmailRejected as e:
+        # the others went out (or are queued): report, don't raise, or a retry mails them twice
+        delivered, rejected = not e.queued, e.rejected
+    accepted = [email for email in to_emails if email not in rejected]
+
+    status = "rejected" if not accepted else "sent" if delivered else "queued"
+    audit.record("email", current_session.get(), to=to_emails, subject=subject, status=status,
+                 rejected=list(rejected))
+    # the admin sees it in the next digest
+    admin_digest.notify("email", to_emails, subject, details=body_html, status=status)
+
+    replies = []
+    if rejected:
+        replies.append("Could not deliver to " + ", ".join(f"{to} ({reason})" for to, reason in rejected.items()) + ".")
+    if accepted and not delivered:
+        replies.append(f"Mail server is unavailable; email to {', '.join(accepted)} is queued and will be sent automatically.")
+    elif accepted:
+        replies.append(f"Email sent to {', '.join(accepted)} and admin notified.")
+    return " ".join(replies)
 
-    except Exception as e:
-        logger.error(e)
-        return f"Failed to send email: {str(e)}"
-    
 ''' Old send_email implementation with only sending email to receiver
 
 # @tool
@@ -250,32 +520,6 @@ def send_meeting_confirmation(to_email, topic, date, start, end, link):
             """
         )
 
-        # ---------------------------------
-        # ADMIN EMAIL TEMPLATE
-        # ---------------------------------
-        admin_html = ADMIN_EMAIL_TEMPLATE.replace(
-            "{to_email}", to_email).replace("{subject}",subject).replace(
-                "{message}",
-                f"""
-                A meeting has been scheduled.<br><br>
-                
-                <b>Topic:</b> {topic}<br>
-                <b>Date:</b> {date}<br>
-                <b>Time:</b> {start} -> {end}<br>
-                <b>Attendee:</b> {to_email}<br>
-                <b>Join Link:</b> <a href="{link}">{link}</a><br><br>
-
-                Logged via Friday AI.
-                """
-            )
-        
-        # ---------------------------------
-        # SMTP SETUP
-        # ---------------------------------
-        server = smtplib.SMTP("smtp.gmail.com", 587)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        
         # ---------------------------------
         # SEND TO USER
         # ---------------------------------        
@@ -285,23 +529,10 @@ def send_meeting_confirmation(to_email, topic, date, start, end, link):
         user_msg["Subject"] = subject
         user_msg.attach(MIMEText(user_html, "html"))
 
-        server.sendmail(sender_email, to_email, user_msg.as_string())
-        
         # ---------------------------------
-        # SEND TO USER
+        # DELIVER (queued if the mail server is down)
         # ---------------------------------
-        admin_msg = MIMEMultipart()
-        admin_msg["From"] = send_email
-        admin_msg["To"] = admin_email
-        admin_msg["Subject"] = f"[MEETING CONFIRMED] {topic}"
-        admin_msg.attach(MIMEText(admin_html,"html"))
-        
-        server.sendmail(sender_email, admin_email, admin_msg.as_string())
-
-        # ---------------------------------
-        # CLOSE SETUP
-        # ---------------------------------
-        server.quit()
+        send_messages([(to_email, user_msg)])
 
         return True
 
@@ -314,140 +545,174 @@ def send_meeting_confirmation(to_email, topic, date, start, end, link):
 # Google Calander Tools
 # --------------------------------------
 
-meeting_store = {}
-
-# ---------- VALIDATORS ----------
-def validate_date(date_str):
-    try:
-        datetime.strptime(date_str, "%Y-%m-%d")
-        return True
-    except:
-        return False
-
-
-def validate_time(t):
-    return bool(re.fullmatch(r"\d{2}:\d{2}", t))
-
+# ---------- CORE FUNCTION #1 ----------
+def meeting_draft_error(error: ValidationError) -> str:
+    """Tell the agent why MeetingDraft rejected its arguments, so it can ask the user."""
+    problems = []
+    for item in error.errors():
+        field = ".".join(str(part) for part in item["loc"] if part != "__root__")
+        problems.append(f"{field}: {item['msg']}" if field else item["msg"])
+    return "❌ Invalid meeting details: " + "; ".join(problems)
 
 
-# ---------- CORE FUNCTION #1 ----------
-def save_meeting_details(meeting_json: str) -> str:
+def save_meeting_details(**fields) -> str:
     """
-    Save a meeting draft from structured JSON.
-    ***ALWAYS IN "IST" ONLY***
-    Expected JSON:
-
-    {
-      "topic": "Friday AI architecture",
-      "date": "2025-12-28",
-      "start_time": "16:00",
-      "end_time": "17:00",
-      "timezone": "IST", By default, always set timezone to "IST" unless the user explicitly specifies another timezone.
-      "attendees": ["email@example.com"]
-    }
-    
-
+    Save a meeting draft from structured arguments (see MeetingDraft).
+    Dates, times and timezones are normalized here, e.g. "4pm" -> "16:00"
+    and "IST" -> "Asia/Kolkata".
     """
 
-    try:
-        data = json.loads(meeting_json)
-    except Exception as e:
-        return f"❌ Invalid JSON. Error: {str(e)}"
-
-    topic = data.get("topic", "Meeting")
-    date = data.get("date")
-    start = data.get("start_time")
-    end = data.get("end_time")
-    tz = data.get("timezone", "Asia/Kolkata")
-    # tz = "Asia/Kolkata"
-    attendees = data.get("attendees", [])
-
-    # -------- VALIDATION --------
-    if not date or not validate_date(date):
-        return "❌ Invalid date. Must be YYYY-MM-DD."
-
-    if not start or not validate_time(start):
-        return "❌ Invalid start_time. Must be HH:MM (24hr format)."
-
-    if not end or not validate_time(end):
-        return "❌ Invalid end_time. Must be HH:MM (24hr format)."
-
-    # save draft
-    meeting_store.update({
-        "topic": topic,
-        "date": date,
-        "start_time": start,
-        "end_time": end,
-        "timezone": tz,
-        "attendees": attendees
-    })
+    draft = MeetingDraft(**fields)
+
+    # save draft (on the current session, see sessions.py)
+    current_state().meeting_draft = MeetingDetails(
+        topic=draft.topic,
+        date=draft.date,
+        start_time=draft.start_time,
+        end_time=draft.end_time,
+        timezone=intern(draft.timezone),
+        attendees=tuple(draft.attendees or ()),
+    )
 
     return f"""
 📝 Meeting Draft Created
 
-Title: {topic}
-Date: {date}
-Time: {start} → {end} ({tz})
+Title: {draft.topic}
+Date: {draft.date}
+Time: {draft.start_time} → {draft.end_time} ({draft.timezone})
 
 Say **"confirm meeting"** to schedule.
 """
 
 
 
+def calendar_event_id(key: str) -> str:
+    """
+    Client-supplied Calendar event id. Ids must use base32hex characters
+    (a-v, 0-9) and be 5-1024 long; a lowercase sha256 hex digest is both.
+    """
+    return key.lower()
+
+
+def _insert_or_get(service, event: dict) -> tuple:
+    try:
+        return execute(service.events().insert(calendarId="primary", body=event, fields=EVENT_FIELDS)), True
+    except HttpError as e:
+        if e.resp.status != 409:
+            raise
+    log_event(logger, "calendar.duplicate_insert", sample=False, event_id=event["id"])
+    return execute(service.events().get(calendarId="primary", eventId=event["id"], fields=EVENT_FIELDS)), False
+
+
+def insert_event_once(service, event: dict) -> tuple:
+    """
+    Insert an event that carries a client-supplied id. Returns (event, created);
+    if Calendar already has that id (an earlier attempt got through), the
+    existing event comes back with created=False. A duplicate is not a
+    Calendar failure, so it doesn't count toward opening the breaker.
+    """
+    return get_breaker("calendar").call(_insert_or_get, service, event)
+
+
 # ---------- CORE FUNCTION #2 ----------
 def schedule_meeting(_: str) -> str:
 
-    if not meeting_store:
+    saved = current_state().meeting_draft
+    if saved is None:
         return "❌ No meeting draft found."
 
-    if not os.path.exists("token.json"):
+    if not token_store.has(config.GOOGLE_ACCOUNT):
         return "❌ Google Calendar not authorized."
 
-    creds = Credentials.from_authorized_user_file("token.json")
-    service = build("calendar", "v3", credentials=creds)
+    # Same session + same draft -> same key -> same event id, so a repeated
+    # confirm never books the meeting twice.
+    draft = saved.as_dict()
+    key = idempotency_key(current_session.get(), "schedule_meeting", draft)
+
+    try:
+        return side_effects.run_once(key, lambda: _book_meeting(draft, calendar_event_id(key)))
+    except Exception as e:
+        if not is_transient_calendar_error(e):
+            raise
+        logger.error(f"Calendar insert failed: {str(e)}")
+        return "❌ Google Calendar is unavailable right now. The draft is kept — ask me to confirm again in a minute."
+
 
-    start = f"{meeting_store['date']}T{meeting_store['start_time']}:00"
-    end = f"{meeting_store['date']}T{meeting_store['end_time']}:00"
+def _book_meeting(draft: dict, event_id: str) -> str:
+
+    service = calendar_service()
+
+    start = f"{draft['date']}T{draft['start_time']}:00"
+    end = f"{draft['date']}T{draft['end_time']}:00"
 
     event = {
-        "summary": meeting_store["topic"],
-        "start": {"dateTime": start, "timeZone": meeting_store["timezone"]},
-        "end": {"dateTime": end, "timeZone": meeting_store["timezone"]},
+        "id": event_id,
+        "summary": draft["topic"],
+        "start": {"dateTime": start, "timeZone": draft["timezone"]},
+        "end": {"dateTime": end, "timeZone": draft["timezone"]},
     }
 
-    if meeting_store.get("attendees"):
-        event["attendees"] = [{"email": e} for e in meeting_store["attendees"]]
+    if draft.get("attendees"):
+        event["attendees"] = [{"email": e} for e in draft["attendees"]]
 
-    created = service.events().insert(
-        calendarId="primary",
-        body=event
-    ).execute()
+    created, is_new = insert_event_once(service, event)
 
     event_link = created.get("htmlLink")
 
+    # booked by an earlier confirm (before a restart or after the idempotency
+    # window): attendees, admin and audit already have it
+    if not is_new:
+        if created.get("status") == "cancelled":
+            return f"""
+❌ Meeting Cancelled
+
+"{draft['topic']}" on {draft['date']} was already scheduled and has since been
+cancelled in Google Calendar. Create a new draft to book it again.
+"""
+        return f"""
+✅ Meeting Already Scheduled
+
+Topic: {draft['topic']}
+Date: {draft['date']}
+Time: {draft['start_time']} → {draft['end_time']}
+
+🔗 Event Link:
+{event_link}
+"""
+
+    audit.record("meeting", current_session.get(), topic=draft["topic"], date=draft["date"],
+                 start=draft["start_time"], end=draft["end_time"], timezone=draft["timezone"],
+                 attendees=draft.get("attendees", []), event_id=created.get("id"), link=event_link)
+
     # -------------------------------------------------
     # SEND CONFIRMATION EMAILS TO ATTENDEES
     # -------------------------------------------------
-    attendees = meeting_store.get("attendees", [])
+    attendees = draft.get("attendees", [])
+
+    # one admin notice per meeting, not per attendee
+    admin_digest.notify(
+        "meeting", attendees, f"[MEETING CONFIRMED] {draft['topic']}",
+        details=f"{draft['date']} {draft['start_time']} -> {draft['end_time']} ({draft['timezone']}) {event_link}",
+    )
 
     for email in attendees:
         send_meeting_confirmation(
             to_email=email,
-            topic=meeting_store["topic"],
-            date=meeting_store["date"],
-            start=meeting_store["start_time"],
-            end=meeting_store["end_time"],
+            topic=draft["topic"],
+            date=draft["date"],
+            start=draft["start_time"],
+            end=draft["end_time"],
             link=event_link
         )
 
     return f"""
 ✅ Meeting Scheduled!
 
-Topic: {meeting_store['topic']}
-Date: {meeting_store['date']}
-Time: {meeting_store['start_time']} → {meeting_store['end_time']}
+Topic: {draft['topic']}
+Date: {draft['date']}
+Time: {draft['start_time']} → {draft['end_time']}
 
-📍 Timezone: {meeting_store['timezone']}
+📍 Timezone: {draft['timezone']}
 
 🔗 Event Link:
 {event_link}
@@ -457,13 +722,15 @@ Time: {meeting_store['start_time']} → {meeting_store['end_time']}
 # --------------------------------------
 # ACTUAL LANGCHAIN TOOLS
 # --------------------------------------
-save_meeting_tool = Tool(
-    name="save_meeting_details",
+save_meeting_tool = StructuredTool.from_function(
     func=save_meeting_details,
+    name="save_meeting_details",
+    args_schema=MeetingDraft,
+    handle_validation_error=meeting_draft_error,
     description="""
 Use this to create a meeting draft.
-Pass JSON as a STRING with fields:
-topic, date(YYYY-MM-DD), start_time(HH:MM), end_time(HH:MM), timezone[keep IST as default unless stated otherwise], attendees(optional)
+Fields: topic, date(YYYY-MM-DD), start_time(HH:MM), end_time(HH:MM) or duration_minutes,
+timezone[keep IST as default unless stated otherwise], attendees(optional list of emails)
 """
 )
 